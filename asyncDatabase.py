@@ -0,0 +1,171 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to let asyncio code use the database without blocking its event loop.
+    Every method of `databaseOperations` and `databaseWriteOperations` blocks the calling thread, so a
+    notebook callback or an async front end stalls while SQLite works. `AsyncDatabaseOperations` offers an
+    awaitable counterpart of each of those methods: reads run on a dedicated pool of worker threads, each of
+    which keeps its own pooled connection, and writes run one at a time on a single writer thread. Every call
+    takes a timeout, and a read that is cancelled or times out while running is interrupted inside SQLite.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+from database import *
+
+ASYNC_WORKERS = 4      # Reader threads, each holding its own connection while it runs a call
+ASYNC_TIMEOUT = 30.0   # Default seconds before a call is cancelled, None waits forever
+
+class AsyncDatabaseOperations():
+    """
+    Awaitable database operations for asyncio code.
+
+    Every public method of `databaseOperations` (reads) and `databaseWriteOperations` (writes) is available
+    under the same name as a coroutine method taking the same arguments plus an optional `timeout`, e.g.
+    `await db.know_rentalStatus(5)` or `await db.write_rentTransaction(1001, 5, 3, timeout=2)`.
+
+    Cancellation and timeouts:
+        - A call that has not started yet is dropped.
+        - A running read is interrupted (sqlite3 `interrupt`): its statement stops and the worker is freed.
+        - A running write is left to finish, so a rent or return is never half applied; the caller
+          still gets the CancelledError or TimeoutError and the outcome can be checked with a read.
+
+    Methods:
+        - `run`: Runs any blocking callable on the reader or writer threads, with the same rules.
+        - `close`: Shuts the threads down (also done by `async with`).
+    """
+    def __init__(self, db_name='BicycleRental.db', workers=ASYNC_WORKERS, timeout=ASYNC_TIMEOUT):
+        """
+        Args:
+            db_name (str): Name of the SQLite database file.
+            workers (int): Number of reader threads.
+            timeout (float, optional): Default timeout of every call in seconds, None for no timeout.
+        """
+        self.db_operations = databaseOperations(db_name)
+        self.db_write = databaseWriteOperations(db_name)
+        self.connection_manager = self.db_operations.connection_manager
+        # One connection per reader thread plus the writer, so no call waits on the pool
+        if self.connection_manager.pool_size < workers + 1:
+            self.connection_manager.configure(pool_size=workers + 1)
+        self.timeout = timeout
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="sqlite-async")
+        self.write_executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="sqlite-async-writer")
+
+    async def run(self, function, *args, timeout=None, write=False, **kwargs):
+        """
+        Run a blocking database callable on the reader threads (or the writer thread) and await its result.
+
+        Args:
+            function (callable): The blocking call, e.g. a databaseOperations method.
+            *args, **kwargs: Its arguments.
+            timeout (float, optional): Seconds before the call is cancelled, defaults to the instance timeout.
+            write (bool): Run on the writer thread, without interrupting it once it has started.
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            TimeoutError: If the call did not finish in time.
+            asyncio.CancelledError: If the awaiting task was cancelled.
+        """
+        state = {'thread': None, 'cancelled': False}
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                if state['cancelled']:
+                    raise concurrent.futures.CancelledError()
+                state['thread'] = threading.get_ident()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                with lock:
+                    state['thread'] = None
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.write_executor if write else self.executor, call)
+        try:
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        except (asyncio.CancelledError, TimeoutError):
+            with lock:
+                state['cancelled'] = True
+                if not write and state['thread'] is not None:
+                    self.connection_manager.interrupt(state['thread'])
+            raise
+
+    def close(self):
+        """Shut the reader and writer threads down, waiting for the calls already running."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.write_executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+def async_method(class_name, name, write):
+    """Coroutine method running `name` of the wrapped read or write object."""
+    async def method(self, *args, timeout=None, **kwargs):
+        target = getattr(self.db_write if write else self.db_operations, name)
+        return await self.run(target, *args, timeout=timeout, write=write, **kwargs)
+    method.__name__ = method.__qualname__ = name
+    method.__doc__ = f"Awaitable `{class_name}.{name}`, with an optional `timeout` in seconds."
+    return method
+
+# One coroutine method per public method of the blocking classes
+for operations_class, write in ((databaseOperations, False), (databaseWriteOperations, True)):
+    for name, function in vars(operations_class).items():
+        if not name.startswith('_') and callable(function) and not hasattr(AsyncDatabaseOperations, name):
+            setattr(AsyncDatabaseOperations, name, async_method(operations_class.__name__, name, write))
+
+def test():
+    def slow_query(connection_manager):
+        """A read that takes seconds: counts through a recursive CTE."""
+        with connection_manager.connection() as conn:
+            return conn.execute('''WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 100000000)
+                                   SELECT COUNT(*) FROM n''').fetchone()
+
+    async def main():
+        async with AsyncDatabaseOperations(workers=4, timeout=5) as db:
+            # Many lookups at once, while a ticker checks that the event loop keeps running
+            lags = []
+
+            async def ticker():
+                while True:
+                    start = time.perf_counter()
+                    await asyncio.sleep(0.005)
+                    lags.append(time.perf_counter() - start - 0.005)
+
+            tick = asyncio.create_task(ticker())
+            start = time.perf_counter()
+            statuses = await asyncio.gather(*(db.know_rentalStatus(bicycle_id) for bicycle_id in range(1, 201)))
+            history = await db.read_RentalHistoryTable()
+            rows = await db.searchBicycles('Road Bike', 'type')
+            print(f"200 status lookups, {len(history)} history rows and {len(rows)} search rows in "
+                  f"{time.perf_counter() - start:.3f}s, largest event loop lag {max(lags, default=0) * 1000:.1f} ms")
+            print(statuses[:2])
+
+            # A read that times out is interrupted inside SQLite and frees its worker
+            start = time.perf_counter()
+            try:
+                await db.run(slow_query, db.connection_manager, timeout=0.2)
+            except TimeoutError:
+                print(f"Slow read timed out after {time.perf_counter() - start:.2f}s")
+
+            # Cancelling the awaiting task works the same way
+            task = asyncio.create_task(db.run(slow_query, db.connection_manager))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                print("Slow read cancelled")
+            start = time.perf_counter()
+            print("Next read:", await db.know_rentalStatus(1), f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+            tick.cancel()
+
+    asyncio.run(main())
+
+if __name__ == "__main__":
+    test()
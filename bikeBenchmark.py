@@ -0,0 +1,284 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to catch performance regressions in the rent, return, search and
+    recommendation paths before they reach the counters. It builds synthetic BicycleRental.db fleets at
+    configurable scale, times the user facing calls on them (throughput and p50/p99 latency), saves the
+    results as JSON and compares them with a baseline file. Every fleet is measured in its own process,
+    inside its own directory, so the connection pools and caches of one fleet never see another.
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import sys
+import time
+import numpy as np
+from database import *
+from dataGenerator import BRANDS, TYPES, FRAME_SIZES, syntheticDataGenerator
+from dataLoader import bulkLoader
+
+BENCH_DIR = "benchmarks"
+DEFAULT_SCALES = [(1000, 10000)]  # (bicycles, rentals) of each fleet
+REPEAT = 200                       # Timed calls per operation
+THRESHOLD = 1.2                    # A latency more than 20% above the baseline is a regression
+
+def write_syntheticDatabase(directory, bikes, rentals, seed=0, members=None):
+    """
+    Create BicycleRental.db and members.txt for a synthetic fleet in `directory`.
+
+    The data files and members.txt come from `syntheticDataGenerator` (written under `directory`) and are
+    loaded with `bulkLoader`, with three inventory items per (Brand, Type) pair at least so that every pair has
+    new bikes to recommend for purchase. Each bicycle marked Rented then gets an overdue rental as its most recent one,
+    rented 2 to 3 weeks ago for a week, so it can be returned straight away.
+
+    Args:
+        directory (str): Directory to create the files in.
+        bikes (int): Number of bicycles.
+        rentals (int): Number of Rental_History rows generated before the overdue rentals.
+        seed (int): Seed of the random generator, the same seed gives the same fleet on the same day.
+        members (int, optional): Number of members, defaults to one per 2 bicycles (at least 100).
+
+    Returns:
+        str: Path of the database file.
+    """
+    members = members or max(100, bikes // 2)
+    os.makedirs(directory, exist_ok=True)
+    db_path = os.path.join(directory, "BicycleRental.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    generator = syntheticDataGenerator(seed)
+    generator.write_all(directory, bikes, rentals, max(3 * len(generator.pairs), bikes // 10), members)
+    loader = bulkLoader(db_path)
+    loader.load_all(os.path.join(directory, "data"))
+
+    # Rented bicycles are overdue: later rentals of theirs are dropped so the overdue one is the most recent
+    rng = np.random.default_rng(seed)
+    today = np.datetime64(datetime.date.today(), 'D')
+    with sqlite3.connect(db_path) as conn:
+        rented = [row[0] for row in conn.execute("SELECT BicycleID FROM Bicycle_Info WHERE Status = 'Rented'")]
+        rental_date = today - rng.integers(14, 22, len(rented))
+        overdue = list(zip(rented, rng.integers(1000, 1000 + members, len(rented)).tolist(),
+                           rental_date.astype(str).tolist(), (rental_date + 7).astype(str).tolist()))
+        conn.executemany("DELETE FROM Rental_History WHERE BicycleID = ? AND RentalDate >= ?",
+                         [(bicycle_id, rented_on) for bicycle_id, _, rented_on, _ in overdue])
+        conn.executemany("INSERT INTO Rental_History (BicycleID, MemberID, RentalDate, ReturnDate) VALUES (?,?,?,?)",
+                         overdue)
+    conn.close()
+
+    # Managed indexes and views, and the history view used by the recommendations
+    loader.write_indexes_to_db()
+    loader.createViewTable()
+    return db_path
+
+def summarize(latencies, elapsed):
+    """Latency statistics (milliseconds) and throughput (calls per second) of timed calls."""
+    latencies = np.asarray(latencies) * 1000
+    return {'calls': len(latencies), 'mean_ms': float(latencies.mean()),
+            'p50_ms': float(np.percentile(latencies, 50)), 'p99_ms': float(np.percentile(latencies, 99)),
+            'throughput': len(latencies) / elapsed if elapsed else None}
+
+def timed(calls):
+    """Run an iterable of zero-argument callables, timing each; returns (latencies, total seconds, results)."""
+    latencies, results = [], []
+    start = time.perf_counter()
+    for call in calls:
+        call_start = time.perf_counter()
+        results.append(call())
+        latencies.append(time.perf_counter() - call_start)
+    return latencies, time.perf_counter() - start, results
+
+def run_scale(directory, repeat=REPEAT, seed=0):
+    """
+    Measure every benchmarked call on the fleet in `directory`. Runs in a fresh worker process that
+    changes into the directory, because the application classes open BicycleRental.db and members.txt
+    from the current directory.
+
+    Returns:
+        dict: Operation name -> statistics, see `summarize`.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))  # The application modules, after the chdir
+    os.chdir(directory)
+    os.environ['MPLBACKEND'] = 'Agg'
+    from bikeRent import BicycleRentalSystem
+    from bikeReturn import BicycleReturnSystem
+    from bikeSearch import BikeSearch
+    from bikeSelect import BikeRecommendationSystem
+
+    rng = np.random.default_rng(seed)
+    results = {}
+    rental_system, return_system, search = BicycleRentalSystem(), BicycleReturnSystem(), BikeSearch()
+
+    with sqlite3.connect("BicycleRental.db") as conn:
+        available, overdue = ([row[0] for row in conn.execute(
+            "SELECT BicycleID FROM Bicycle_Info WHERE Status = ? ORDER BY random() LIMIT ?", (status, repeat))]
+            for status in ('Available', 'Rented'))
+    memberships = rental_system.db_operations.memberships
+    members = sorted((record for record in memberships.records() if memberships.is_active(record.member_id)),
+                     key=lambda record: record.member_id)
+
+    # Rent: one bicycle per active member in turn, so no member reaches its limit
+    latencies, elapsed, messages = timed(
+        (lambda member=members[i % len(members)].member_id, bike=bike: rental_system.rent_bicycle(member, bike, 3))
+        for i, bike in enumerate(available))
+    results['rent_bicycle'] = dict(summarize(latencies, elapsed),
+                                   succeeded=sum(message.startswith("**Rental Confirmed") for message in messages))
+
+    # Return: the overdue rentals of the fleet (late fee path)
+    latencies, elapsed, messages = timed((lambda bike=bike: return_system.process_return(bike)) for bike in overdue)
+    results['process_return'] = dict(summarize(latencies, elapsed),
+                                     succeeded=sum("Return cannot be processed" not in message for message in messages))
+
+    facets = [(value, 'Brand') for value in BRANDS] + [(value, 'Type') for value in TYPES] + \
+             [(value, 'Frame_Size') for value in FRAME_SIZES]
+    picks = rng.integers(0, len(facets), repeat)
+    latencies, elapsed, _ = timed((lambda term=facets[i][0], kind=facets[i][1]: search.search_bicycles(term, kind))
+                                  for i in picks)
+    results['search_bicycles'] = summarize(latencies, elapsed)
+
+    latencies, elapsed, systems = timed(BikeRecommendationSystem for _ in range(repeat))
+    results['recommendation_init'] = summarize(latencies, elapsed)
+
+    # The first recommendations build the shared pipeline: a single, cold sample
+    recommendation_system = systems[-1]
+    latencies, elapsed, recommendations = timed([lambda: recommendation_system.generate_goodrecommendations(10)[0]])
+    results['recommendation_first'] = summarize(latencies, elapsed)
+
+    good = recommendations[0]
+    budgets = rng.uniform(500, 50000, repeat)
+    latencies, elapsed, plans = timed((lambda budget=budget: recommendation_system.filter_future_recommendations(good, budget))
+                                      for budget in budgets)
+    results['filter_future_recommendations'] = dict(summarize(latencies, elapsed),
+                                                    succeeded=sum(not plan.empty for plan, _, _ in plans))
+
+    for operation, stats in results.items():
+        if stats.get('succeeded') == 0:
+            print(f"Warning: no {operation} call succeeded on {directory}, only the failure path was timed")
+    return results
+
+class benchmarkSuite():
+    """
+    Builds the synthetic fleets, measures them and compares the results with a baseline.
+
+    Methods:
+        - `run`: Measures every scale and returns the results document.
+        - `save`: Writes a results document as JSON.
+        - `compare`: Lists the latencies that regressed against a baseline document.
+    """
+    def __init__(self, scales=DEFAULT_SCALES, repeat=REPEAT, seed=0, bench_dir=BENCH_DIR):
+        """
+        Args:
+            scales (list): (bicycles, rentals) of each fleet.
+            repeat (int): Timed calls per operation.
+            seed (int): Seed of the fleets and of the benchmark inputs.
+            bench_dir (str): Directory the fleets are generated in.
+        """
+        self.scales = [tuple(scale) for scale in scales]
+        self.repeat = repeat
+        self.seed = seed
+        self.bench_dir = bench_dir
+
+    def run(self):
+        """
+        Generate every fleet (again, so each run starts from the same data) and measure it.
+
+        Returns:
+            dict: 'meta' (versions, date, settings) and 'results' keyed by "<bicycles>x<rentals>".
+        """
+        document = {'meta': {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                             'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                             'repeat': self.repeat, 'seed': self.seed},
+                    'results': {}}
+        context = multiprocessing.get_context('spawn')
+        for bikes, rentals in self.scales:
+            key = f"{bikes}x{rentals}"
+            directory = os.path.abspath(os.path.join(self.bench_dir, f"fleet_{key}_{self.seed}"))
+            start = time.perf_counter()
+            write_syntheticDatabase(directory, bikes, rentals, self.seed)
+            print(f"Fleet {key} generated in {time.perf_counter() - start:.1f}s")
+            with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+                document['results'][key] = executor.submit(run_scale, directory, self.repeat, self.seed).result()
+        return document
+
+    @staticmethod
+    def save(document, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(document, file, indent=2)
+
+    @staticmethod
+    def compare(document, baseline, threshold=THRESHOLD):
+        """
+        Compare p50 and p99 latencies with a baseline document.
+
+        Args:
+            document (dict): Current results.
+            baseline (dict): Results of the baseline run.
+            threshold (float): Ratio current/baseline above which a latency counts as a regression.
+
+        Returns:
+            list: (scale, operation, metric, baseline ms, current ms, ratio) of every regression.
+        """
+        regressions = []
+        for scale, operations in document['results'].items():
+            for operation, stats in operations.items():
+                base = baseline.get('results', {}).get(scale, {}).get(operation)
+                if not base:
+                    continue
+                for metric in ('p50_ms', 'p99_ms'):
+                    if base[metric] > 0 and stats[metric] / base[metric] > threshold:
+                        regressions.append((scale, operation, metric, base[metric], stats[metric],
+                                            stats[metric] / base[metric]))
+        return regressions
+
+def print_results(document):
+    for scale, operations in document['results'].items():
+        print(f"\nFleet {scale}")
+        print(f"{'operation':<32}{'calls':>7}{'p50 ms':>10}{'p99 ms':>10}{'calls/s':>11}{'succeeded':>11}")
+        for operation, stats in operations.items():
+            print(f"{operation:<32}{stats['calls']:>7}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+                  f"{stats['throughput']:>11.1f}{stats.get('succeeded', '-'):>11}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rent, return, search and recommendation paths.")
+    parser.add_argument('--scale', action='append', default=None, metavar='BIKES:RENTALS',
+                        help="fleet size, may be repeated (default 1000:10000)")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="timed calls per operation")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, "results.json"), help="results JSON file")
+    parser.add_argument('--baseline', default=None, help="results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="regression ratio")
+    args = parser.parse_args(argv)
+
+    scales = [tuple(int(part) for part in scale.split(':')) for scale in args.scale] if args.scale else DEFAULT_SCALES
+    suite = benchmarkSuite(scales, args.repeat, args.seed)
+    document = suite.run()
+    suite.save(document, args.output)
+    print_results(document)
+    print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = suite.compare(document, baseline, args.threshold)
+        for scale, operation, metric, base, current, ratio in regressions:
+            print(f"REGRESSION {scale} {operation} {metric}: {base:.3f} ms -> {current:.3f} ms ({ratio:.2f}x)")
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+def test():
+    suite = benchmarkSuite([(200, 2000)], repeat=20, bench_dir=os.path.join(BENCH_DIR, "test"))
+    document = suite.run()
+    print_results(document)
+    for scale, operations in document['results'].items():
+        for operation, stats in operations.items():
+            assert stats.get('succeeded', 1) > 0, f"{scale} {operation}: no call succeeded"
+    print("Regressions against itself:", suite.compare(document, document))
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -42,35 +42,20 @@ class BicycleRentalSystem:
         Returns:
             str: A message indicating the rental status and details.
         """
-        # Validate the member ID
-        valid_member, member_message = self.db_operations.validate_member(member_id)
-        if not valid_member:
-            return f"Rental failed: {member_message}"
-        
-        # Check if the bicycle is available for rent
-        available_bike, bike_message = self.db_operations.know_rentalStatus(bicycle_id)
-        if not available_bike:
-            return f"Rental failed: {bike_message}"
-        
-        # Rent the bicycle and write to the database
-        rental_result = self.db_write.write_rentingBicycle(member_id, bicycle_id, rental_days)
+        # Validate the member, check the limit, rent the bicycle and read its details back in a single transaction
+        rental_result = self.db_write.write_rentTransaction(member_id, bicycle_id, rental_days, check_member=True)
         if rental_result is None:
             return "Rental failed due to a database error."
 
-        # Retrieve details of the rented bicycle
-        bike_details = self.db_operations.know_rentedDetails(bicycle_id)
+        rented, details = rental_result
+        if not rented:
+            return f"Rental failed: {details}"
         
         # If bike details are found, proceed with rental confirmation
-        if bike_details[0]:  
-            details = bike_details[1]
+        if details:  
 
             # Calculate the rental cost based on the rental days
-            if rental_days >= 7:
-                weeks = rental_days // 7
-                extra_days = rental_days % 7
-                rental_paid = (weeks * details['Weekly Rate']) + (extra_days * details['Daily Rate'])
-            else:
-                rental_paid = rental_days * details['Daily Rate']
+            rental_paid = self.rental_cost(details, rental_days)
 
             # Prepare confirmation message with rental details
             confirmation_message = (
@@ -88,6 +73,25 @@ class BicycleRentalSystem:
         else:
             return "Rental confirmed, but bicycle details could not be retrieved."
 
+    @staticmethod
+    def rental_cost(details, rental_days):
+        """
+        Rental cost of a bicycle: whole weeks at the weekly rate and the remaining days at the daily rate,
+        or only the daily rate for rentals shorter than 7 days.
+
+        Args:
+            details (dict): Rental details with 'Daily Rate' and 'Weekly Rate'.
+            rental_days (int): Number of days of the rental.
+
+        Returns:
+            float: The total price of the rental.
+        """
+        if rental_days >= 7:
+            weeks = rental_days // 7
+            extra_days = rental_days % 7
+            return (weeks * details['Weekly Rate']) + (extra_days * details['Daily Rate'])
+        return rental_days * details['Daily Rate']
+
 
 def test():
     """
@@ -0,0 +1,222 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to render the recommendation charts of `display_graphs` to image files
+    without a notebook, so fleet reports can be produced by a scheduled job. Every chart is drawn with
+    the Agg backend in a pool of worker processes, once for every requested budget and top-N value,
+    and a chart whose inputs (data fingerprint, date, parameters and formats) have not changed since
+    the last run is not drawn again.
+"""
+import argparse
+import concurrent.futures
+import datetime
+import hashlib
+import json
+import multiprocessing
+import os
+from database import databaseOperations
+
+REPORT_DIR = "reports"
+CACHE_FILE = ".report_cache.json"  # Output name -> input hash of the files last written, inside REPORT_DIR
+RENDER_VERSION = 2                 # Bump when the charts change so cached files are drawn again
+
+# Charts rendered by the report and the parameters they depend on
+CHARTS = {
+    'score_durability': ('top_n',),
+    'popularity_by_brand': ('top_n',),
+    'purchase_plan': ('top_n', 'budget'),
+}
+
+_graphs = None  # display_graphs object of a worker process, created on its first chart
+
+def init_worker():
+    """Worker process initializer: select the Agg backend before pyplot is imported."""
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+    matplotlib.use('Agg')
+
+def render_chart(db_name, chart, params, paths):
+    """
+    Draw one chart and save it to every path given (the format is taken from the extension).
+    Runs in a worker process; the recommendation pipeline is shared by the charts the worker draws.
+    Each chart starts from the default style and its style changes are undone afterwards, so a chart
+    looks the same whichever charts the worker drew before it.
+
+    Args:
+        db_name (str): Database file the recommendations are computed from.
+        chart (str): Name of the chart, a key of CHARTS.
+        params (dict): Parameters of the chart ('top_n' and, for the purchase plan, 'budget').
+        paths (list): Files to write.
+
+    Returns:
+        tuple: (chart, params, paths written, error message or None).
+    """
+    global _graphs
+    import matplotlib
+    import matplotlib.pyplot as plt
+    from bikeSelect import display_graphs
+    try:
+        if _graphs is None or _graphs.db_name != db_name:
+            _graphs = display_graphs(db_name)
+        # plt.style.use and rcParams changes made by a chart are rolled back when the block ends
+        with matplotlib.rc_context(), plt.style.context('default'):
+            if chart == 'score_durability':
+                fig = _graphs.plot_score_durability_vs_rental_frequency(params['top_n'], show=False)
+            elif chart == 'popularity_by_brand':
+                fig = _graphs.plot_popularity_by_brand(params['top_n'], show=False)
+            elif chart == 'purchase_plan':
+                fig = _graphs.plot_animated_future_recommendations(params['budget'], mode='figure', top_n=params['top_n'])
+            else:
+                raise ValueError(f"Unknown chart: {chart}")
+            if fig is None:
+                return chart, params, [], "No recommendations to plot."
+            for path in paths:
+                fig.savefig(path, facecolor=fig.get_facecolor())
+        plt.close(fig)
+        return chart, params, paths, None
+    except Exception as e:
+        plt.close('all')
+        return chart, params, [], str(e)
+
+class reportGenerator():
+    """
+    Headless batch renderer of the recommendation charts.
+
+    Methods:
+        - `jobs`: Lists the charts to draw for the given budgets and top-N values.
+        - `input_hash`: Hash of everything a chart depends on.
+        - `generate`: Draws the charts whose inputs changed, in parallel, and returns a summary.
+    """
+    def __init__(self, db_name='BicycleRental.db', output_dir=REPORT_DIR, formats=('png', 'svg'), workers=None):
+        """
+        Args:
+            db_name (str): Database file the recommendations are computed from.
+            output_dir (str): Directory the chart files are written to.
+            formats (tuple): File formats to write, e.g. ('png', 'svg').
+            workers (int, optional): Number of worker processes, defaults to the number of CPUs.
+        """
+        self.db_name = db_name
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.workers = workers or os.cpu_count() or 1
+        self.db_operations = databaseOperations(db_name)
+
+    def jobs(self, budgets, top_ns):
+        """
+        List the charts to draw: the top-N charts once per top-N value and the purchase plan once per
+        (top-N, budget) pair.
+
+        Returns:
+            list: (chart, params, output name) tuples.
+        """
+        jobs = []
+        for top_n in top_ns:
+            for chart, depends_on in CHARTS.items():
+                for budget in (budgets if 'budget' in depends_on else [None]):
+                    params = {'top_n': top_n} if budget is None else {'top_n': top_n, 'budget': budget}
+                    name = f"{chart}_top{top_n}" + (f"_budget{budget:g}" if budget is not None else "")
+                    jobs.append((chart, params, name))
+        return jobs
+
+    def input_hash(self, chart, params, fingerprint, today):
+        """Hash of the data fingerprint, the date (scores age by the day), the chart, its parameters and the formats."""
+        inputs = {'chart': chart, 'params': params, 'fingerprint': list(fingerprint or ()),
+                  'date': today, 'formats': self.formats, 'version': RENDER_VERSION}
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def read_cache(self):
+        try:
+            with open(os.path.join(self.output_dir, CACHE_FILE)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def write_cache(self, cache):
+        path = os.path.join(self.output_dir, CACHE_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump(cache, file, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def generate(self, budgets=(500, 5000), top_ns=(10,)):
+        """
+        Draw every chart whose inputs changed since the files were last written.
+
+        Args:
+            budgets (iterable): Budgets of the purchase plan charts.
+            top_ns (iterable): Numbers of good/bad recommendations.
+
+        Returns:
+            dict: Lists of the 'rendered', 'cached' and 'failed' output names.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        fingerprint = self.db_operations.read_dataFingerprint()
+        today = datetime.date.today().isoformat()
+        cache = self.read_cache()
+        summary = {'rendered': [], 'cached': [], 'failed': []}
+
+        pending = []
+        for chart, params, name in self.jobs(budgets, top_ns):
+            digest = self.input_hash(chart, params, fingerprint, today)
+            paths = [os.path.join(self.output_dir, f"{name}.{fmt}") for fmt in self.formats]
+            if cache.get(name) == digest and all(os.path.exists(path) for path in paths):
+                summary['cached'].append(name)
+            else:
+                cache.pop(name, None)
+                pending.append((chart, params, name, digest, paths))
+
+        if pending:
+            context = multiprocessing.get_context('spawn')  # Fresh interpreters, never a forked GUI backend
+            with concurrent.futures.ProcessPoolExecutor(min(self.workers, len(pending)), mp_context=context,
+                                                        initializer=init_worker) as executor:
+                futures = {executor.submit(render_chart, self.db_name, chart, params, paths): (name, digest)
+                           for chart, params, name, digest, paths in pending}
+                for future in concurrent.futures.as_completed(futures):
+                    name, digest = futures[future]
+                    _, _, written, error = future.result()
+                    if error:
+                        print(f"Report error on {name}: {error}")
+                        summary['failed'].append(name)
+                    else:
+                        cache[name] = digest
+                        summary['rendered'].append(name)
+            self.write_cache(cache)
+        return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the bicycle recommendation charts to image files.")
+    parser.add_argument('--db', default='BicycleRental.db', help="database file")
+    parser.add_argument('--out', default=REPORT_DIR, help="output directory")
+    parser.add_argument('--budgets', type=float, nargs='+', default=[500, 5000], help="purchase plan budgets")
+    parser.add_argument('--top', type=int, nargs='+', default=[10], help="numbers of good/bad recommendations")
+    parser.add_argument('--formats', nargs='+', default=['png', 'svg'], choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPUs)")
+    args = parser.parse_args(argv)
+    summary = reportGenerator(args.db, args.out, args.formats, args.workers).generate(args.budgets, args.top)
+    print(f"Rendered {len(summary['rendered'])}, cached {len(summary['cached'])}, failed {len(summary['failed'])} "
+          f"charts in {args.out}")
+    return summary
+
+def test():
+    import tempfile
+    import time
+    output_dir = tempfile.mkdtemp()
+    generator = reportGenerator(output_dir=output_dir, workers=4)
+    for run in ("first", "second"):
+        start = time.perf_counter()
+        summary = generator.generate(budgets=(500, 5000), top_ns=(5, 10))
+        print(f"{run} run: rendered {len(summary['rendered'])}, cached {len(summary['cached'])}, "
+              f"failed {len(summary['failed'])} in {time.perf_counter() - start:.2f}s")
+    print(sorted(os.listdir(output_dir)))
+
+    # A chart comes out the same whether or not restyling charts were drawn before it in the same process
+    init_worker()
+    before, after = os.path.join(output_dir, "before.png"), os.path.join(output_dir, "after.png")
+    render_chart(generator.db_name, 'score_durability', {'top_n': 5}, [before])
+    render_chart(generator.db_name, 'popularity_by_brand', {'top_n': 5}, [os.path.join(output_dir, "brand.png")])
+    render_chart(generator.db_name, 'purchase_plan', {'top_n': 5, 'budget': 5000}, [os.path.join(output_dir, "plan.png")])
+    render_chart(generator.db_name, 'score_durability', {'top_n': 5}, [after])
+    with open(before, "rb") as first, open(after, "rb") as second:
+        assert first.read() == second.read(), "The chart depends on the charts drawn before it"
+    print("Charts are independent of the order they are drawn in")
+
+if __name__ == "__main__":
+    main()
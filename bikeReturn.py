@@ -61,45 +61,60 @@ class BicycleReturnSystem:
         Returns:
             str: A summary message of the return process, including charges and status.
         """
-        # Step 2: Calculate late fees, if applicable
-        records, late_fee_message = self.db_operations.return_lateFeesCalculation(bicycle_id)
-        if records is None:
-            return late_fee_message
-        elif records:
-            self.late_fee, return_date = records 
-            late_fee_status = late_fee_message
-        else:
-            return_date = None
-            late_fee_status = "No late fee."
-
-        # Step 3: Update bicycle's condition and status based on damage
-        self.damage_charge = damage_charge  
-        status_update_result, message = self.db_write.write_returnUpdate(
-            bicycle_id, damage_charge=self.damage_charge, return_date=return_date
+        # Steps 2-4: Late fee, status/condition update and LogTable entry are committed in one transaction
+        self.damage_charge = damage_charge
+        return_result = self.db_write.write_returnTransaction(
+            bicycle_id, damage_charge=self.damage_charge, damage_note=damage_note
         )
+        if return_result is None:
+            return (f"Failed to process return for Bicycle ID: {bicycle_id}")
 
-        # Step 4: Log the return information in LogTable
-        log_result = self.db_write.write_inLogtable(
-            bicycle_id,
-            late_fee=self.late_fee,
-            damage_charge=self.damage_charge,
-            damage_note=damage_note
-        )
+        returned, details = return_result
+        if not returned:
+            return details
+        return self.return_summary(details)
 
-        # If logging was successful, return the detailed summary of the return
-        if log_result:
-            total_charge = self.late_fee + self.damage_charge
-            return_message = (
-                f"**Return Summary for Bicycle ID: {bicycle_id}**\n"
-                f"- Return Status: Successfully returned\n"
-                f"- Late Fee: £{self.late_fee:.2f}\n"
-                f"- Damage Charge: £{self.damage_charge:.2f}\n"
-                f"- Total Charges: **£{total_charge:.2f}**\n"
-                f"- Damage Note: {damage_note if damage_note else 'None'}\n"
-            )
-            return return_message
-        else:
-            return (f"Failed to process return for Bicycle ID: {bicycle_id}")
+    def process_returnBatch(self, returns):
+        """
+        Processes many returns at once, e.g. bicycles collected from the drop box at the end of the day.
+        All successful returns are committed in a single transaction.
+
+        Args:
+            returns (iterable): Bicycle IDs, or (bicycle_id[, damage_charge[, damage_note]]) tuples.
+
+        Returns:
+            list: One summary message per bicycle, in input order.
+        """
+        returns = list(returns)
+        results = self.db_write.write_returnBatch(returns)
+        if results is None:
+            return [f"Failed to process return for Bicycle ID: {item[0] if isinstance(item, (tuple, list)) and item else item}"
+                    for item in returns]
+        return [self.return_summary(details) if returned else details for returned, details in results]
+
+    def return_summary(self, details):
+        """
+        Builds the return summary message from the details of a processed return.
+
+        Args:
+            details (dict): Return details produced by the database write operations.
+
+        Returns:
+            str: A summary message of the return, including charges.
+        """
+        self.late_fee = details['Late Fee']
+        self.damage_charge = details['Damage Charge']
+        damage_note = details['Damage Note']
+        total_charge = self.late_fee + self.damage_charge
+        return_message = (
+            f"**Return Summary for Bicycle ID: {details['Bicycle ID']}**\n"
+            f"- Return Status: Successfully returned\n"
+            f"- Late Fee: £{self.late_fee:.2f}\n"
+            f"- Damage Charge: £{self.damage_charge:.2f}\n"
+            f"- Total Charges: **£{total_charge:.2f}**\n"
+            f"- Damage Note: {damage_note if damage_note else 'None'}\n"
+        )
+        return return_message
 
 def test():
     """
@@ -13,6 +13,11 @@ import sqlite3
 import pandas as pd
 from database import *  # Make sure to have the database operations imported
 
+# Columns of a search result, the ImageURL column becomes the DataFrame index
+RESULT_COLUMNS = ["Bicycle ID", "Brand", "Type", "FrameSize",
+                  "Daily Rate", "Weekly Rate", "Status",
+                  "Date of Purchase", "Condition", "InventoryID", "ImageURL"]
+
 class BikeSearch:
     """
     The BikeSearch class provides methods to search and retrieve bicycle information
@@ -23,38 +28,98 @@ class BikeSearch:
         self.db = databaseOperations() # Initialize database operations instance
         self.types, self.brands, self.frame_sizes = self.db.get_uniquevalues()
         
-    def search_bicycles(self, search_term, search_type):
+    def search_bicycles(self, search_term, search_type, sort_by='BicycleID'):
         """
         Search bicycles by a specified term and type.
 
         Parameters:
             search_term (str): The term to search for, which can be a brand, type, or frame size.
             search_type (str): The category of search (e.g., 'Brand', 'Type', or 'Frame_Size').
+            sort_by (str): Column the results are sorted on (see SEARCH_SORT_KEYS).
 
         Returns:
-            pd.DataFrame: DataFrame containing the search results if found, else an empty DataFrame.
+            pd.DataFrame: DataFrame containing every matching bicycle if found, else an empty DataFrame.
+            The notebook menu shows one page at a time with `search_bicyclesPage` instead.
         """
-        all_values = set(self.types) | set(self.brands) | set(self.frame_sizes)
-
-        # Check if search_term is in the combined set
-        if search_term not in all_values:
+        if not self.is_knownTerm(search_term, search_type):
             return pd.DataFrame()
-        else:
-            bicycles = self.db.searchBicycles(search_term, search_type)
+        bicycles, _ = self.db.searchBicyclesPage({search_type: search_term}, sort_by, page_size=None)
+        return self.to_dataframe(bicycles)
+
+    def search_bicyclesPage(self, search_term, search_type, page=1, page_size=PAGE_SIZE, sort_by='BicycleID'):
+        """
+        Search bicycles by a specified term and type, one page at a time.
+
+        Parameters:
+            search_term (str): The term to search for, which can be a brand, type, or frame size.
+            search_type (str): The category of search (e.g., 'Brand', 'Type', or 'Frame_Size').
+            page (int): Page number to return, starting at 1.
+            page_size (int): Number of bicycles per page.
+            sort_by (str): Column the results are sorted on (see SEARCH_SORT_KEYS).
+
+        Returns:
+            tuple: (pd.DataFrame of the requested page, empty if nothing matched;
+                    bool telling whether another page follows).
+        """
+        if not self.is_knownTerm(search_term, search_type):
+            return pd.DataFrame(), False
+        bicycles, next_key = self.db.searchBicyclesPage({search_type: search_term}, sort_by,
+                                                        page_size=page_size, offset=(page - 1) * page_size)
+        return self.to_dataframe(bicycles), next_key is not None
+
+    def is_knownTerm(self, search_term, search_type):
+        """Check if search_term is a known value of the searched facet, a single facet count lookup."""
+        column = SEARCH_FILTERS.get(search_type.lower())
+        if column not in FACET_COLUMNS:
+            return False
+        facet_key = [None, None, None]
+        facet_key[FACET_COLUMNS.index(column)] = search_term
+        return self.db.fleet_cache.facet_count(*facet_key)[0] > 0
+
+    def search_pages(self, filters, sort_by='BicycleID', descending=False, page_size=PAGE_SIZE):
+        """
+        Page through every bicycle matching several filters at once, without loading them all.
+
+        Parameters:
+            filters (dict): Filter name ('brand', 'type', 'frame_size', 'status') -> value, combined with AND.
+            sort_by (str): Column the results are sorted on (see SEARCH_SORT_KEYS).
+            descending (bool): Sort in descending order.
+            page_size (int): Number of bicycles per page.
+
+        Yields:
+            pd.DataFrame: One page of results, fetched with keyset pagination.
+        """
+        next_key = None
+        while True:
+            bicycles, next_key = self.db.searchBicyclesPage(filters, sort_by, descending, page_size, after=next_key)
             if bicycles:
-                df = pd.DataFrame(bicycles, columns=[
-                        "Bicycle ID", "Brand", "Type", "FrameSize",
-                        "Daily Rate", "Weekly Rate", "Status",
-                        "Date of Purchase","Condition","InventoryID", "ImageURL"
-                ])
-                 
-                if 'ImageURL' in df.columns:
-                    df.set_index('ImageURL', inplace=True)
-                else:
-                    return pd.DataFrame()
-                return df  
-            else:
-                return pd.DataFrame() # Return empty DataFrame if no results
+                yield self.to_dataframe(bicycles)
+            if next_key is None:
+                return
+
+    def facet_counts(self, search_type):
+        """
+        Return the live counts behind a search dropdown.
+
+        Parameters:
+            search_type (str): The category of search ('Brand', 'Type' or 'Frame_Size').
+
+        Returns:
+            dict: value -> (total bicycles, available bicycles), empty for an unknown search type.
+        """
+        column = SEARCH_FILTERS.get(search_type.lower())
+        if column not in FACET_COLUMNS:
+            return {}
+        return self.db.fleet_cache.facet_values(column)
+
+    @staticmethod
+    def to_dataframe(bicycles):
+        """Convert search rows to a DataFrame indexed by ImageURL, or an empty DataFrame if there are none."""
+        if not bicycles:
+            return pd.DataFrame() # Return empty DataFrame if no results
+        df = pd.DataFrame(bicycles, columns=RESULT_COLUMNS)
+        df.set_index('ImageURL', inplace=True)
+        return df
 
 def test():
     """
@@ -77,10 +142,26 @@ def test():
         result = bike_search.search_bicycles("Mountain Bike", "Type")
         print("Search Results for type 'Mountain Bike':\n", result)
 
+        print("Testing paged search by frame size 'Small', 4 per page...")
+        page_no, has_next_page, rows = 1, True, 0
+        while has_next_page:
+            page, has_next_page = bike_search.search_bicyclesPage("Small", "Frame_Size", page=page_no, page_size=4)
+            rows += len(page)
+            page_no += 1
+        assert page_no > 2 and rows == len(bike_search.search_bicycles("Small", "Frame_Size"))
+        print(f"{page_no - 1} pages, {rows} bicycles, same as the unpaged search")
+
+        print("Testing multi-filter search, rented Large bicycles by daily rate, 3 per page...")
+        for page_no, page in enumerate(bike_search.search_pages({'frame_size': 'Large', 'status': 'Rented'}, 'DailyRate', page_size=3), start=1):
+            print(f"Page {page_no}:\n", page[["Bicycle ID", "Type", "FrameSize", "Daily Rate"]])
+
         print("Testing invalid search term 'UnknownTerm'...")
         result = bike_search.search_bicycles("UnknownTerm", "Type")
         print("Search Results for 'UnknownTerm':\n", result)
 
+        print("Live counts per frame size (total, available):", bike_search.facet_counts("Frame_Size"))
+        print("Large Road Bikes (total, available):", bike_search.db.get_facetCounts(type_="Road Bike", frame_size="Large"))
+
         # Output available unique values
         print("\nAvailable types:", bike_search.types)
         print("Available brands:", bike_search.brands)
@@ -1,14 +1,21 @@
 import pandas as pd
 import numpy as np
 import sqlite3
+import math
+import bisect
+import io
+import json
+import threading
+import time
 from database import *
+from columnSnapshot import columnSnapshot
 from datetime import datetime
 from IPython.display import display, clear_output, Markdown, HTML
 import matplotlib.pyplot as plt
 from matplotlib.font_manager import FontProperties
 import matplotlib.font_manager as fm
 import matplotlib.animation as animation
-from matplotlib.collections import PathCollection
+from matplotlib.collections import PathCollection, LineCollection
 
 """
     StudentID : F418164
@@ -16,6 +23,42 @@ from matplotlib.collections import PathCollection
     bikes and recommending new purchases depending upon given user budget and use matplotlib packages to displace relations of recommendations
 """
 
+# Scores used by the durability calculation, unknown values score 0
+CONDITION_SCORES = {'New': 3, 'Good': 2, 'Damaged': 1}
+STATUS_SCORES = {'Available': 2, 'Rented': 1, 'Under Maintenance': 0}
+
+# Weights of the recommendation score
+FREQUENCY_WEIGHT = 1.5  # Rental Frequency Weight
+DURABILITY_WEIGHT = 1.0 # Condition Weight
+AGE_WEIGHT = 0.8        # Age Weight
+
+# Column types of the frames read by BicycleSelectionSystem. Repeated text is stored as categoricals,
+# IDs and counts as nullable integers and dates as datetime64 (missing values become <NA> / NaT).
+HISTORY_DTYPES = {
+    'BicycleID': 'Int64', 'Brand': 'category', 'Type': 'category', 'FrameSize': 'category',
+    'DailyRate': 'Int64', 'WeeklyRate': 'Int64', 'Status': 'category', 'Condition': 'category',
+    'InventoryID': 'Int64', 'Rentals': 'Int64', 'Bikes': 'Int64', 'RentalFrequency': 'Int64',
+}
+HISTORY_DATES = ['DateOfPurchase', 'RentalDate', 'ReturnDate', 'FirstUsed', 'LastUsed']
+INVENTORY_DTYPES = {
+    'InventoryID': 'Int64', 'Price': 'float64', 'BrandName': 'category', 'Size': 'category',
+    'Type': 'category', 'Gender': 'category', 'Speed': 'category', 'Frame': 'category',
+    'BrakeType': 'category', 'Age': 'category', 'Suspension': 'category', 'TireType': 'category',
+    'CustomerRating': 'Int64',
+}
+
+# Views read by historyRecommendation for each aggregation level
+HISTORY_VIEWS = {None: 'BikesHistoryViews', 'bike': 'BikeRentalSummary', 'inventory': 'InventoryRentalSummary'}
+
+# Columns of the recommendation frame that depend on the current date, recomputed after loading a snapshot
+DATE_DEPENDENT_COLUMNS = ['BikeAge', 'DurabilityScore']
+SNAPSHOT_SUFFIX = '.snapshot'  # Snapshot directory of a database file: <db_name>.snapshot
+
+ANIMATION_MAX_FRAMES = 60  # Keyframes rendered by the purchase plan animation, bounds the HTML size for long plans
+
+KNAPSACK_CAPACITY = 100000  # Cells of the knapsack table, bounds the allocator's time whatever the budget
+FINGERPRINT_INTERVAL = 1.0  # Seconds between two checks of whether the recommendation data changed
+
 class BicycleSelectionSystem:
     """
     Bicycle selection and recommendation system for rental operations.
@@ -40,23 +83,48 @@ class BicycleSelectionSystem:
         db_name (str): Name of the SQLite database file (default 'BicycleRental.db').
         """
         self.db_name = db_name
-        self.db_operations = databaseOperations() # Handles database queries
-        self.db_write = databaseWriteOperations() # Handles database write operations
+        self.db_operations = databaseOperations(db_name) # Handles database queries
+        self.db_write = databaseWriteOperations(db_name) # Handles database write operations
+
+    def read_typedFrame(self, query, dtypes, dates=()):
+        """
+        Read a query into a DataFrame with explicit column types instead of the object columns
+        `pd.read_sql_query` infers, so repeated text is held once per distinct value.
 
-    def historyRecommendation(self):
+        Args:
+        query (str): SQL query to run.
+        dtypes (dict): Column name -> dtype for the columns the query returns; others are inferred.
+        dates (iterable): Columns parsed as datetime64, unparseable values become NaT.
+
+        Returns:
+        pd.DataFrame: The typed rows.
+        """
+        with self.db_operations.connection_manager.connection() as conn:
+            df = pd.read_sql_query(query, conn)
+        for column in df.columns:
+            if column in dates:
+                df[column] = pd.to_datetime(df[column], errors='coerce')
+            elif column in dtypes:
+                df[column] = df[column].astype(dtypes[column])
+        return df
+
+    def historyRecommendation(self, level=None):
         """
         Fetch rental history recommendations from the database.
 
-        This function queries the 'BikesHistoryViews' view in the database to get a
-        list of previously rented bicycles and their rental history.
+        By default this function queries the 'BikesHistoryViews' view in the database to get a
+        list of previously rented bicycles and their rental history, one row per rental. With a
+        `level` the history is aggregated inside SQLite (see SUMMARY_VIEWS in database.py) and
+        only one row per bicycle or per inventory item is read into pandas.
+
+        Args:
+        level (str, optional): None for the rental rows, 'bike' or 'inventory' for the aggregated rows.
 
         Returns:
         pd.DataFrame: DataFrame containing rental history data, or None if error occurs.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                df = pd.read_sql_query("SELECT * FROM BikesHistoryViews", conn)
-                return df
+            return self.read_typedFrame(f"SELECT * FROM {HISTORY_VIEWS[level]}", HISTORY_DTYPES, HISTORY_DATES)
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
@@ -72,13 +140,348 @@ class BicycleSelectionSystem:
         pd.DataFrame: DataFrame containing available bicycles, or None if error occurs.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                df = pd.read_sql_query("""SELECT * FROM Inventory_Data;""", conn)
-                return df
+            return self.read_typedFrame("""SELECT * FROM Inventory_Data;""", INVENTORY_DTYPES)
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+
+class recommendationPipeline():
+    """
+    Lazily evaluated, memoised recommendation stages shared by every recommendation object on a database file.
+
+    The stages (load -> clean -> score -> rank) are computed the first time they are asked for, by the
+    function passed to `get`, and kept until the data changes. Changes are detected with
+    `databaseOperations.read_dataFingerprint`, checked at most every `check_interval` seconds and
+    straight away after a rent or return made by this process (the fleet cache version moves).
+    Creating recommendation or graph objects therefore costs nothing until a recommendation is shown.
+    The cleaned recommendation frame is also kept on disk as a `columnSnapshot` under the same
+    fingerprint, so a new process maps it instead of reading the whole rental history again.
+
+    Methods:
+        - `get_pipeline`: Returns the shared pipeline for a database file.
+        - `get`: Returns a stage, computing it if it is missing or the data changed.
+        - `discard`: Drops one memoised stage.
+        - `invalidate`: Drops every memoised stage.
+    """
+    _pipelines = {}                    # db_name -> recommendationPipeline
+    _pipelines_lock = threading.Lock()
+
+    def __init__(self, db_operations, check_interval=FINGERPRINT_INTERVAL):
+        """
+        Args:
+            db_operations (databaseOperations): Database the stages are computed from.
+            check_interval (float): Minimum seconds between two fingerprint queries.
+        """
+        self.db_operations = db_operations
+        self.check_interval = check_interval
+        self.fingerprint = None
+        self.stages = {}              # Stage name -> memoised result
+        self.computed = 0             # Number of stage computations, shows how much work is shared
+        self._checked_at = 0.0
+        self._cache_version = None
+        self._depth = 0               # Nesting of `get` calls, the data is only checked at the outermost one
+        self._lock = threading.RLock()
+        self.aggregates = recommendationAggregates(db_operations)
+        self.rankings = {True: rankedIndex(best=True), False: rankedIndex(best=False)}
+        self.snapshot = columnSnapshot(db_operations.db_name + SNAPSHOT_SUFFIX)
+
+    @classmethod
+    def get_pipeline(cls, db_operations):
+        """Return the pipeline shared by all recommendation objects using the same database file."""
+        with cls._pipelines_lock:
+            pipeline = cls._pipelines.get(db_operations.db_name)
+            if pipeline is None:
+                pipeline = cls(db_operations)
+                cls._pipelines[db_operations.db_name] = pipeline
+            return pipeline
+
+    def refresh(self):
+        """Drop the memoised stages if the data fingerprint changed since they were computed."""
+        now = time.monotonic()
+        cache_version = self.db_operations.fleet_cache.version
+        if cache_version == self._cache_version and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        self._cache_version = cache_version
+        fingerprint = self.db_operations.read_dataFingerprint()
+        if fingerprint is None or fingerprint != self.fingerprint:
+            self.stages.clear()
+            self.fingerprint = fingerprint
+
+    def get(self, stage, compute):
+        """
+        Return the memoised result of a stage, computing it first if needed.
+
+        Args:
+            stage (hashable): Name of the stage, e.g. 'clean' or ('good', 10).
+            compute (callable): Computes the stage; a None result is returned but not memoised.
+        """
+        with self._lock:
+            if self._depth == 0:
+                self.refresh()
+            self._depth += 1
+            try:
+                if stage not in self.stages:
+                    result = compute()
+                    self.computed += 1
+                    if result is None:
+                        return None
+                    self.stages[stage] = result
+                return self.stages[stage]
+            finally:
+                self._depth -= 1
+
+    def discard(self, stage):
+        """Drop one memoised stage."""
+        with self._lock:
+            self.stages.pop(stage, None)
+
+    def invalidate(self):
+        """Drop every memoised stage, the next access recomputes them."""
+        with self._lock:
+            self.stages.clear()
+            self.fingerprint = None
+
+class recommendationAggregates():
+    """
+    Per-bike inputs of the recommendation scores, maintained incrementally from rent and return events.
+
+    For every bicycle it keeps the columns the score needs plus its number of rentals and its first and
+    last "last used" dates (ReturnDate, or RentalDate while no return date is known), and it keeps the
+    rental frequency of every (Type, Brand) pair. This is everything `prepare_recommendation_df` derives
+    from the full BikesHistoryViews join: the best row of a bike is the one used most recently and the
+    worst one the one used longest ago. The store is built with one grouped query, then a rent or return
+    committed by `databaseWriteOperations` only re-reads the bikes involved (an indexed lookup) and moves
+    the frequency of their (Type, Brand) pair. Changes made by other processes are noticed through the
+    data fingerprint and cause a rebuild. Every inventory item whose inputs changed is stamped with a
+    change number, so ranked indexes can catch up with `changed_since`.
+
+    Methods:
+        - `ensure_current`: Rebuilds the store if the database changed without an event.
+        - `on_event`: Listener registered with `writeToSql.add_listener`.
+        - `bike_frame`: Returns the per-bike inputs as a DataFrame.
+        - `inventory_ids`: Returns the InventoryIDs that have bicycles.
+        - `changed_since`: Returns the inventory items changed after a change number.
+    """
+    COLUMNS = ['BicycleID', 'Brand', 'Type', 'FrameSize', 'Status', 'Condition', 'DateOfPurchase',
+               'InventoryID', 'Rentals', 'FirstUsed', 'LastUsed']
+    BIKE_QUERY = f"SELECT {', '.join(COLUMNS)} FROM BikeRentalSummary"  # Aggregated by SQLite, see SUMMARY_VIEWS
+
+    def __init__(self, db_operations):
+        """
+        Args:
+            db_operations (databaseOperations): Database the inputs are read from; the store listens
+                to the rents and returns committed on the same file.
+        """
+        self.db_operations = db_operations
+        self.bikes = {}               # BicycleID -> row tuple in COLUMNS order
+        self.frequency = {}           # (Type, Brand) -> rows of the pair in BikesHistoryViews
+        self.inventory_bikes = {}     # InventoryID -> set of BicycleIDs
+        self.pair_inventories = {}    # (Type, Brand) -> set of InventoryIDs, the items a frequency change moves
+        self.changes = 0              # Change number of the last applied event
+        self.changed = {}             # InventoryID -> change number of its last change
+        self.fingerprint = None
+        self.rebuilds = 0
+        self.events = 0
+        self._lock = threading.RLock()
+        db_operations.add_listener(self.on_event)
+
+    @staticmethod
+    def view_rows(row):
+        """Number of BikesHistoryViews rows of a bike: one per rental, one for a bike never rented."""
+        return max(1, row[8])
+
+    @staticmethod
+    def inventory_of(row):
+        """InventoryID of a bike row, 0 for a bike without one (as the history frame's fillna(0))."""
+        return row[7] if row[7] is not None else 0
+
+    def index_bike(self, row, sign):
+        """Add (sign 1) or remove (sign -1) a bike row from the frequency and lookup dictionaries."""
+        pair, inventory_id = (row[2], row[1]), self.inventory_of(row)
+        self.frequency[pair] = self.frequency.get(pair, 0) + sign * self.view_rows(row)
+        bikes = self.inventory_bikes.setdefault(inventory_id, set())
+        inventories = self.pair_inventories.setdefault(pair, set())
+        if sign > 0:
+            bikes.add(row[0])
+            inventories.add(inventory_id)
+        else:
+            bikes.discard(row[0])
+            if not self.frequency[pair]:
+                del self.frequency[pair]
+            if not bikes:
+                del self.inventory_bikes[inventory_id]
+            # The item stays listed under the pair while another of its bikes has the same Type and Brand
+            if not any((self.bikes[b][2], self.bikes[b][1]) == pair for b in bikes if b in self.bikes):
+                inventories.discard(inventory_id)
+
+    def read_bikes(self, bicycle_ids=None):
+        """Read the inputs of the given bikes (all bikes if None) as a dictionary keyed by BicycleID."""
+        try:
+            with self.db_operations.connection_manager.connection() as conn:
+                if bicycle_ids is None:
+                    rows = conn.execute(self.BIKE_QUERY).fetchall()
+                else:
+                    rows = []
+                    for bicycle_id in bicycle_ids:
+                        rows += conn.execute(self.BIKE_QUERY + " WHERE BicycleID = ?",
+                                             (bicycle_id,)).fetchall()
+                return {row[0]: row for row in rows}
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
 
+    def rebuild(self):
+        """Read every bike again and recount the (Type, Brand) frequencies."""
+        with self._lock:
+            fingerprint = self.db_operations.read_dataFingerprint()
+            bikes = self.read_bikes()
+            if bikes is None:
+                return False
+            self.bikes, self.fingerprint = bikes, fingerprint
+            self.frequency, self.inventory_bikes, self.pair_inventories, self.changed = {}, {}, {}, {}
+            for row in bikes.values():
+                self.index_bike(row, 1)
+            self.rebuilds += 1
+            return True
+
+    def ensure_current(self):
+        """Rebuild the store if it was never built or the database changed without an event."""
+        with self._lock:
+            if self.fingerprint is None or self.fingerprint != self.db_operations.read_dataFingerprint():
+                return self.rebuild()
+            return True
+
+    def on_event(self, event, bicycle_ids):
+        """
+        Apply a committed rent or return: re-read the bikes involved and move their frequencies.
+
+        Args:
+            event (str): 'rent' or 'return'.
+            bicycle_ids (list): IDs of the bicycles rented or returned.
+        """
+        with self._lock:
+            if self.fingerprint is None:
+                return  # Not built yet, the first use reads everything anyway
+            changed = self.read_bikes(bicycle_ids)
+            if changed is None:
+                self.fingerprint = None
+                return
+            self.changes += 1
+            touched = set()
+            for bicycle_id in bicycle_ids:
+                old, new = self.bikes.pop(bicycle_id, None), changed.get(bicycle_id)
+                for row, sign in ((old, -1), (new, 1)):
+                    if row is not None:
+                        if sign > 0:
+                            self.bikes[bicycle_id] = row
+                        self.index_bike(row, sign)
+                        touched.add(self.inventory_of(row))
+                        # A frequency change moves the score of every item of the same Type and Brand
+                        touched |= self.pair_inventories.get((row[2], row[1]), set())
+            for inventory_id in touched:
+                self.changed[inventory_id] = self.changes
+            self.fingerprint = self.db_operations.read_dataFingerprint()
+            self.events += 1
+
+    def changed_since(self, change):
+        """Return the InventoryIDs whose inputs changed after change number `change`."""
+        with self._lock:
+            return {inventory_id for inventory_id, stamp in self.changed.items() if stamp > change}
+
+    def bike_frame(self, inventory_ids=None):
+        """
+        Return the per-bike inputs as a DataFrame in COLUMNS order plus RentalFrequency, dates parsed.
+        Rows are sorted by InventoryID then BicycleID, the order of the BikesHistoryViews rows.
+
+        Args:
+            inventory_ids (iterable, optional): Only return the bikes of these inventory items.
+        """
+        with self._lock:
+            if inventory_ids is None:
+                rows = list(self.bikes.values())
+            else:
+                rows = [self.bikes[bicycle_id] for inventory_id in inventory_ids
+                        for bicycle_id in self.inventory_bikes.get(inventory_id, ())]
+            frequency = dict(self.frequency)
+        df = pd.DataFrame(rows, columns=self.COLUMNS)
+        for column in ('DateOfPurchase', 'FirstUsed', 'LastUsed'):
+            df[column] = pd.to_datetime(df[column], errors='coerce')
+        df['InventoryID'] = df['InventoryID'].fillna(0)
+        df['RentalFrequency'] = [frequency.get(key, 0) for key in zip(df['Type'], df['Brand'])]
+        return df.sort_values(['InventoryID', 'BicycleID'], kind='stable', ignore_index=True)
+
+    def inventory_ids(self):
+        """Return the set of InventoryIDs that have at least one bicycle."""
+        with self._lock:
+            return set(self.inventory_bikes)
+
+class rankedIndex():
+    """
+    Inventory items kept sorted by recommendation score, best first (or worst first), so the best-N
+    or worst-N items are read off the front of the list instead of grouping and sorting every time.
+
+    Scores depend on the day they are computed for (time factor and bike age), so an index remembers
+    the day and the aggregates' rebuild and change numbers it was built for; `BikeRecommendationSystem.
+    ranked_index` replaces only the items changed since then, or everything on a new day or rebuild.
+    Ties are broken on (InventoryID, Brand, Type), the order `nlargest`/`nsmallest` keep after a groupby.
+
+    Methods:
+        - `replace`: Replaces the entries of some inventory items.
+        - `top`: Returns the first n entries as a DataFrame.
+        - `representative`: Returns the details shown for an inventory item.
+    """
+    def __init__(self, best=True):
+        """
+        Args:
+            best (bool): Highest score first if True (good recommendations), lowest first otherwise.
+        """
+        self.best = best
+        self.entries = {}          # InventoryID -> list of (Brand, Type, Score, DurabilityScore, RentalFrequency)
+        self.representatives = {}  # InventoryID -> (FrameSize, Status, Condition, BikeAge)
+        self.order = []            # Sorted (rank score, InventoryID, Brand, Type), rank score is -Score when best
+        self.synced = None         # (day, aggregates rebuilds, aggregates change number) the index is built for
+
+    def sort_key(self, inventory_id, entry):
+        return (-entry[2] if self.best else entry[2], inventory_id, entry[0], entry[1])
+
+    def replace(self, inventory_ids, grouped, representatives):
+        """
+        Replace the entries of `inventory_ids` with the rows of `grouped` and `representatives`
+        (the frames returned by `BikeRecommendationSystem.score_inventories`); items without rows are removed.
+        """
+        for inventory_id in inventory_ids:
+            for entry in self.entries.pop(inventory_id, ()):
+                if pd.isna(entry[2]):
+                    continue
+                key = self.sort_key(inventory_id, entry)
+                position = bisect.bisect_left(self.order, key)
+                if position < len(self.order) and self.order[position] == key:
+                    del self.order[position]
+            self.representatives.pop(inventory_id, None)
+        for inventory_id, brand, bike_type, score, durability, frequency in grouped[
+                ['InventoryID', 'Brand', 'Type', 'Score', 'DurabilityScore', 'RentalFrequency']].itertuples(index=False):
+            entry = (brand, bike_type, score, durability, frequency)
+            self.entries.setdefault(inventory_id, []).append(entry)
+            if not pd.isna(score):  # nlargest/nsmallest leave unscored items out
+                bisect.insort(self.order, self.sort_key(inventory_id, entry))
+        for row in representatives.itertuples(index=False):
+            self.representatives[row[0]] = tuple(row[1:])
+
+    def top(self, n):
+        """Return the first n items as a DataFrame (InventoryID, Brand, Type, Score, DurabilityScore, RentalFrequency)."""
+        rows = []
+        for _, inventory_id, brand, bike_type in self.order[:n]:
+            for entry in self.entries[inventory_id]:
+                if entry[0] == brand and entry[1] == bike_type:
+                    rows.append((inventory_id,) + entry)
+                    break
+        return pd.DataFrame(rows, columns=['InventoryID', 'Brand', 'Type', 'Score', 'DurabilityScore', 'RentalFrequency'])
+
+    def representative(self, inventory_id):
+        """Return (FrameSize, Status, Condition, BikeAge) of an item's highest scoring bike, or Nones."""
+        return self.representatives.get(inventory_id, (None, None, None, np.nan))
+
 class BikeRecommendationSystem(BicycleSelectionSystem):
     """
     BikeRecommendationSystem utilizes data from past rental history and future predictions to recommend bicycles 
@@ -96,25 +499,123 @@ class BikeRecommendationSystem(BicycleSelectionSystem):
     In this class, inheritance is used from `BicycleSelectionSystem` to extend functionalities for bike 
     recommendations, ensuring a modular and maintainable codebase.
     """
-    def __init__(self):
+    def __init__(self, db_name='BicycleRental.db'):
         """
-        Initializes the BikeRecommendationSystem by loading the historical and predicted bike data.
-        Sets up data preparation and recommendation dataframes.
+        Initializes the BikeRecommendationSystem. Nothing is loaded here: the data frames below are
+        computed on first access by the pipeline shared with every other recommendation object.
 
         Attributes:
             HistoryRecommendation_df (DataFrame): Historical data for bike rentals.
             PredictRecommendation_df (DataFrame): Predicted future data for bikes.
             recommendation_df (DataFrame): Data prepared for recommendations.
         """
-        super().__init__()
-        # Load historical and predicted bike data
-        self.HistoryRecommendation_df = self.historyRecommendation()
-        self.PredictRecommendation_df = self.futureRecommendation()
+        super().__init__(db_name)
+        self.pipeline = recommendationPipeline.get_pipeline(self.db_operations)
+
+    def load_stage(self):
+        """Pipeline stage 'load': the raw history view and inventory table."""
+        history_df = self.historyRecommendation()
+        predict_df = self.futureRecommendation()
+        if history_df is None or predict_df is None:
+            return None
+        return {'history': history_df, 'predict': predict_df}
 
-        # Prepare the recommendation DataFrame once during initialization
-        self.recommendation_df = self.data_cleaningPreparation()
-        if self.recommendation_df is not None:
-            self.recommendation_df = self.prepare_recommendation_df(self.recommendation_df)
+    def clean_stage(self):
+        """
+        Pipeline stage 'clean': cleaned copies of the loaded frames and the unscored recommendation frame.
+        It is read from the columnar snapshot while the data fingerprint matches, otherwise it is built
+        from the database and saved as the new snapshot (without the date dependent columns).
+        """
+        fingerprint = self.pipeline.fingerprint
+        frame = self.pipeline.snapshot.load(fingerprint)
+        if frame is not None:
+            return self.cleaned_fromSnapshot(frame)
+        loaded = self.pipeline.get('load', self.load_stage)
+        if loaded is None:
+            return None
+        # fillna/rename return new frames, the loaded ones are left untouched
+        cleaned = self.data_cleaningPreparation(loaded['history'], loaded['predict'])
+        if cleaned is not None and fingerprint is not None:
+            self.pipeline.snapshot.save(cleaned['recommendation'].drop(columns=DATE_DEPENDENT_COLUMNS), fingerprint)
+        return cleaned
+
+    def cleaned_fromSnapshot(self, frame):
+        """
+        Rebuild the 'clean' stage from a snapshot frame: the date dependent columns are computed for
+        today and the history frame is the recommendation frame without RentalFrequency.
+
+        Args:
+            frame (DataFrame): Memory-mapped recommendation frame returned by `columnSnapshot.load`.
+
+        Returns:
+            dict: Same keys as `data_cleaningPreparation`, None if the inventory data is not available.
+        """
+        predict_df = self.PredictRecommendation_df
+        if predict_df is None:
+            return None
+        self.current_date = datetime.now()
+        position = frame.columns.get_loc('RentalFrequency')
+        frame.insert(position, 'DurabilityScore', self.calculate_durabilityScores(frame))
+        frame.insert(position, 'BikeAge', self.calculate_bikeAges(frame))
+        return {'history': frame.drop(columns=['RentalFrequency']), 'predict': predict_df,
+                'recommendation': frame, 'current_date': self.current_date}
+
+    def score_stage(self):
+        """Pipeline stage 'score': the recommendation frame with scores, sorted best first (scored in place)."""
+        cleaned = self.cleaned_data()
+        if cleaned is None:
+            return None
+        return self.prepare_recommendation_df(cleaned['recommendation'])
+
+    def memory_report(self):
+        """
+        Report the memory held by the recommendation frames (deep, so text is counted per value).
+
+        Returns:
+            DataFrame: Rows, columns and MiB per frame, plus a total row; frames that cannot be
+            loaded are left out.
+        """
+        frames = {
+            'HistoryRecommendation_df': self.HistoryRecommendation_df,
+            'PredictRecommendation_df': self.PredictRecommendation_df,
+            'recommendation_df': self.recommendation_df,
+        }
+        report = pd.DataFrame(
+            [(name, len(df), len(df.columns), df.memory_usage(deep=True).sum() / 2**20)
+             for name, df in frames.items() if df is not None],
+            columns=['Frame', 'Rows', 'Columns', 'MiB']).set_index('Frame')
+        report.loc['Total'] = [report['Rows'].sum(), report['Columns'].sum(), report['MiB'].sum()]
+        return report
+
+    def inventory_stage(self):
+        """Pipeline stage 'inventory': Inventory_Data marked 'inuse' or 'new', from the aggregates' InventoryIDs."""
+        predict_df = self.futureRecommendation()
+        if predict_df is None or not self.pipeline.aggregates.ensure_current():
+            return None
+        predict_df = predict_df.rename(columns={'BrandName':'Brand'})
+        in_use_ids = list(self.pipeline.aggregates.inventory_ids())
+        predict_df['Condition'] = np.where(predict_df['InventoryID'].isin(in_use_ids), 'inuse', 'new')
+        return predict_df
+
+    def cleaned_data(self):
+        """Return the memoised 'clean' stage and take over the date its scores were computed for."""
+        cleaned = self.pipeline.get('clean', self.clean_stage)
+        if cleaned is not None:
+            self.current_date = cleaned['current_date']
+        return cleaned
+
+    @property
+    def HistoryRecommendation_df(self):
+        cleaned = self.cleaned_data()
+        return cleaned['history'] if cleaned else None
+
+    @property
+    def PredictRecommendation_df(self):
+        return self.pipeline.get('inventory', self.inventory_stage)
+
+    @property
+    def recommendation_df(self):
+        return self.pipeline.get('score', self.score_stage)
 
     def calculate_durability(self, row):
         """
@@ -128,10 +629,10 @@ class BikeRecommendationSystem(BicycleSelectionSystem):
         """
         try:
             # Condition score based on bike's condition
-            condition_score = {'New': 3, 'Good': 2, 'Damaged': 1}.get(row['Condition'], 0)
+            condition_score = CONDITION_SCORES.get(row['Condition'], 0)
             
             # Status score based on bike's current status
-            status_score = {'Available': 2, 'Rented': 1, 'Under Maintenance': 0}.get(row['Status'], 0)
+            status_score = STATUS_SCORES.get(row['Status'], 0)
             
             # Calculate the time factor based on the last usage
             last_used_date = row['ReturnDate'] if pd.notnull(row['ReturnDate']) else row['RentalDate']
@@ -149,44 +650,115 @@ class BikeRecommendationSystem(BicycleSelectionSystem):
             print(f"Error in calculating durability: {e}")
             return 0  # Return 0 if an error occurs
 
-    def data_cleaningPreparation(self):
+    def calculate_durabilityScores(self, df):
+        """
+        Vectorized version of `calculate_durability` for a whole DataFrame.
+
+        Condition and Status are mapped to their scores column-wise, the last used date falls back from
+        ReturnDate to RentalDate with `np.where`, and the time factor is clipped at 0, so the result is
+        identical to applying `calculate_durability` row by row.
+
+        Args:
+            df (DataFrame): Rows with Condition, Status, RentalDate and ReturnDate (datetime) columns.
+
+        Returns:
+            Series: Durability score of each row.
+        """
+        condition_score = df['Condition'].map(CONDITION_SCORES).fillna(0).to_numpy(dtype=float)
+        status_score = df['Status'].map(STATUS_SCORES).fillna(0).to_numpy(dtype=float)
+
+        return_date = pd.to_datetime(df['ReturnDate'])
+        rental_date = pd.to_datetime(df['RentalDate'])
+        last_used_date = pd.Series(np.where(return_date.notna(), return_date, rental_date), index=df.index)
+        days_since_last_used = (self.current_date - last_used_date).dt.days.to_numpy(dtype=float)
+
+        # No rental history (NaT) gives a time factor of 0
+        time_factor = np.where(np.isnan(days_since_last_used), 0,
+                               np.maximum(0, 1 - days_since_last_used / 365))
+        return pd.Series((condition_score + status_score) * time_factor, index=df.index)
+
+    def calculate_bikeAges(self, df):
+        """Vectorized bike age in years from DateOfPurchase, NaN where the purchase date is unknown."""
+        return (self.current_date - pd.to_datetime(df['DateOfPurchase'])).dt.days / 365
+
+    def check_durabilityParity(self, n_rows=10**6, seed=0):
+        """
+        Compare `calculate_durabilityScores` with `calculate_durability` on a random frame.
+
+        The frame mixes known and unknown conditions and statuses, missing values and dates from
+        several years ago up to a few days in the future.
+
+        Args:
+            n_rows (int): Number of random rows.
+            seed (int): Seed of the random generator, for a reproducible frame.
+
+        Returns:
+            int: Number of rows whose scores differ, 0 when both implementations agree.
+        """
+        if not hasattr(self, 'current_date'):
+            self.current_date = datetime.now()
+        rng = np.random.default_rng(seed)
+        conditions = np.array(list(CONDITION_SCORES) + ['Fair', None], dtype=object)
+        statuses = np.array(list(STATUS_SCORES) + ['Unavailable', None], dtype=object)
+
+        def random_dates(missing):
+            days = rng.integers(-5, 3 * 365, n_rows)
+            dates = pd.Series(pd.Timestamp(self.current_date).normalize() - pd.to_timedelta(days, unit='D'))
+            return dates.mask(rng.random(n_rows) < missing)
+
+        df = pd.DataFrame({
+            'Condition': conditions[rng.integers(0, len(conditions), n_rows)],
+            'Status': statuses[rng.integers(0, len(statuses), n_rows)],
+            'RentalDate': random_dates(0.05),
+            'ReturnDate': random_dates(0.2),
+        })
+        vectorized = self.calculate_durabilityScores(df).to_numpy()
+        row_by_row = df.apply(self.calculate_durability, axis=1).to_numpy(dtype=float)
+        return int(np.sum(vectorized != row_by_row))
+
+    def data_cleaningPreparation(self, history_df, predict_df):
         """
         Prepares the data for recommendation by cleaning, merging, and calculating necessary metrics.
 
+        Args:
+            history_df (DataFrame): Rows of the BikesHistoryViews view.
+            predict_df (DataFrame): Rows of the Inventory_Data table.
+
         Returns:
-            DataFrame: A cleaned and prepared DataFrame for generating recommendations.
+            dict: The cleaned 'history' and 'predict' frames, the 'recommendation' frame for generating
+            recommendations and the 'current_date' the scores were computed for. None on error.
         """
         try:
-            # Clean and prepare the history and predicted recommendation data
-            self.HistoryRecommendation_df = self.HistoryRecommendation_df.fillna(0)
-            self.PredictRecommendation_df = self.PredictRecommendation_df.rename(columns={'BrandName':'Brand'})
+            # Clean and prepare the history and predicted recommendation data. Only a missing InventoryID
+            # is filled, dates stay datetime64 with NaT for bikes that were never rented
+            history_df = history_df.copy()
+            history_df['InventoryID'] = history_df['InventoryID'].fillna(0)
+            predict_df = predict_df.rename(columns={'BrandName':'Brand'})
             
             # Mark bikes as 'inuse' or 'new' based on whether they appear in the history
-            in_use_ids = self.HistoryRecommendation_df['InventoryID'].unique()
-            self.PredictRecommendation_df['Condition'] = self.PredictRecommendation_df['InventoryID'].apply(
-                lambda x: 'inuse' if x in in_use_ids else 'new'
-            )
+            in_use_ids = history_df['InventoryID'].unique()
+            predict_df['Condition'] = np.where(predict_df['InventoryID'].isin(in_use_ids), 'inuse', 'new')
             
-            # Convert date columns to datetime format
+            # Convert date columns to datetime format (already done by historyRecommendation for typed frames)
             self.current_date = datetime.now()
-            self.HistoryRecommendation_df['DateOfPurchase'] = pd.to_datetime(self.HistoryRecommendation_df['DateOfPurchase'], errors='coerce')
-            self.HistoryRecommendation_df['RentalDate'] = pd.to_datetime(self.HistoryRecommendation_df['RentalDate'], errors='coerce')
-            self.HistoryRecommendation_df['ReturnDate'] = pd.to_datetime(self.HistoryRecommendation_df['ReturnDate'], errors='coerce')
+            for column in ('DateOfPurchase', 'RentalDate', 'ReturnDate'):
+                if not pd.api.types.is_datetime64_dtype(history_df[column]):
+                    history_df[column] = pd.to_datetime(history_df[column], errors='coerce')
 
             # Calculate Rental Frequency for each bike type and brand
-            rental_frequency = self.HistoryRecommendation_df.groupby(['Type', 'Brand']).size().reset_index(name='RentalFrequency')
+            rental_frequency = history_df.groupby(['Type', 'Brand']).size().reset_index(name='RentalFrequency')
             
 
             # Calculate bike age based on the DateOfPurchase
-            self.HistoryRecommendation_df['BikeAge'] = self.HistoryRecommendation_df['DateOfPurchase'].apply(
-                lambda x: (self.current_date - x).days / 365 if pd.notnull(x) else None)
+            history_df['BikeAge'] = self.calculate_bikeAges(history_df)
 
-            # Apply durability score calculation
-            self.HistoryRecommendation_df['DurabilityScore'] = self.HistoryRecommendation_df.apply(self.calculate_durability, axis=1)
+            # Apply durability score calculation, column-wise
+            history_df['DurabilityScore'] = self.calculate_durabilityScores(history_df)
 
             # Merge rental frequency with history dataframe
-            recommendation_df = self.HistoryRecommendation_df.merge(rental_frequency, on=['Type', 'Brand'], how='left')
-            return recommendation_df
+            recommendation_df = history_df.merge(rental_frequency, on=['Type', 'Brand'], how='left')
+            return {'history': history_df, 'predict': predict_df,
+                    'recommendation': recommendation_df, 'current_date': self.current_date}
         except Exception as e:
             print(f"Error during data preparation: {e}")
             return None  # Return None if an error occurs during data preparation
@@ -208,9 +780,9 @@ class BikeRecommendationSystem(BicycleSelectionSystem):
                 raise ValueError("Recommendation DataFrame is None.")
             
             # Weights for different factors in the recommendation
-            Weight_1 = 1.5  # Rental Frequency Weight
-            Weight_2 = 1.0  # Condition Weight
-            Weight_3 = 0.8  # Age Weight
+            Weight_1 = FREQUENCY_WEIGHT
+            Weight_2 = DURABILITY_WEIGHT
+            Weight_3 = AGE_WEIGHT
 
             # Calculate the final recommendation score
             recommendation_df['Score'] = (
@@ -227,13 +799,124 @@ class BikeRecommendationSystem(BicycleSelectionSystem):
             print(f"Error preparing recommendation DataFrame: {e}")
             return None  # Return None if an error occurs during preparation
 
-    def filter_future_recommendations(self,final_recommendations, budget=5000):
+    @staticmethod
+    def allocate_roundRobin(prices, budget):
+        """
+        Closed-form version of the unit-by-unit budget loop: passes over the bikes in order, buying one
+        unit of every bike that is still affordable, until a pass buys nothing.
+
+        Instead of simulating each pass, every phase buys `remaining // cost_of_one_pass` full passes at
+        once, then walks one partial pass. A partial pass always leaves at least one bike unaffordable for
+        good, so there are at most as many phases as bikes and the run time does not depend on the budget.
+        Amounts are handled in pence so repeated subtraction cannot drift.
+
+        Args:
+            prices (sequence of float): Unit price of each bike, in allocation order.
+            budget (float): Budget to spend.
+
+        Returns:
+            list: Units allocated to each bike.
+        """
+        prices = [int(round(price * 100)) for price in prices]
+        remaining = int(round(budget * 100))
+        quantities = [0] * len(prices)
+        active = [i for i, price in enumerate(prices) if 0 < price <= remaining]
+        while active:
+            full_passes = remaining // sum(prices[i] for i in active)
+            for i in active:
+                quantities[i] += full_passes
+            remaining -= full_passes * sum(prices[i] for i in active)
+
+            for i in active:
+                if remaining >= prices[i]:
+                    quantities[i] += 1
+                    remaining -= prices[i]
+            active = [i for i in active if prices[i] <= remaining]
+        return quantities
+
+    @staticmethod
+    def allocate_knapsack(prices, values, budget, max_units=None, capacity_cells=KNAPSACK_CAPACITY):
+        """
+        Bounded knapsack: choose how many units of each bike to buy so that the total value is maximal
+        and the total price stays within the budget.
+
+        Prices are converted to pence and divided by their greatest common divisor. If the budget then
+        fits in `capacity_cells` the result is exact. Otherwise the part of the budget the table cannot hold
+        is first spent on the bikes with the best value per pound, and the rest is solved exactly.
+        Unit bounds are split into powers of two, so the run time is bounded by the table and not by the budget.
+
+        Args:
+            prices (sequence of float): Unit price of each bike.
+            values (sequence of float): Value of one unit of each bike, bikes with no positive value are skipped.
+            budget (float): Budget to spend.
+            max_units (int, optional): Maximum units of any single bike, limited only by the budget if None.
+            capacity_cells (int): Size of the dynamic programming table.
+
+        Returns:
+            list: Units allocated to each bike.
+        """
+        prices = [int(round(price * 100)) for price in prices]
+        budget = int(round(budget * 100))
+        quantities = [0] * len(prices)
+        usable = [i for i, (price, value) in enumerate(zip(prices, values)) if 0 < price <= budget and value > 0]
+        if not usable:
+            return quantities
+
+        divisor = math.gcd(*(prices[i] for i in usable))
+        reserve = capacity_cells * divisor
+        for i in sorted(usable, key=lambda i: values[i] / prices[i], reverse=True):
+            if budget <= reserve:
+                break
+            units = min(-(-(budget - reserve) // prices[i]), budget // prices[i])
+            if max_units is not None:
+                units = min(units, max_units)
+            quantities[i] = units
+            budget -= units * prices[i]
+
+        capacity = min(budget // divisor, capacity_cells)
+        weights = {i: prices[i] // divisor for i in usable}
+
+        # Binary splitting turns "up to n units" into 0/1 pieces of 1, 2, 4, ... units
+        pieces = []
+        for i in usable:
+            bound = capacity // weights[i]
+            if max_units is not None:
+                bound = min(bound, max_units - quantities[i])
+            units = 1
+            while bound > 0:
+                take = min(units, bound)
+                pieces.append((i, take))
+                bound -= take
+                units *= 2
+
+        best = np.zeros(capacity + 1)
+        taken = []
+        for i, units in pieces:
+            weight = weights[i] * units
+            candidate = best[:-weight] + values[i] * units
+            improved = np.zeros(capacity + 1, dtype=bool)
+            improved[weight:] = candidate > best[weight:]
+            best[weight:] = np.where(improved[weight:], candidate, best[weight:])
+            taken.append(improved)
+
+        # Walk the pieces backwards from the best reachable capacity to recover the units
+        cell = int(np.argmax(best))
+        for (i, units), improved in zip(reversed(pieces), reversed(taken)):
+            if improved[cell]:
+                quantities[i] += units
+                cell -= weights[i] * units
+        return quantities
+
+    def filter_future_recommendations(self,final_recommendations, budget=5000, mode='round_robin', max_units=None):
         """
         Filters the future bike recommendations based on the budget and preferences.
 
         Args:
             final_recommendations (DataFrame): DataFrame containing final recommendations.
             budget (float): The budget available for purchasing bikes.
+            mode (str): 'round_robin' buys one unit of every affordable bike per pass, 'knapsack'
+                maximises the total recommendation Score of the bikes bought within the budget.
+            max_units (int, optional): Maximum units of a single bike in 'knapsack' mode.
 
         Returns:
             DataFrame: Filtered recommendations within the given budget.
@@ -241,52 +924,30 @@ class BikeRecommendationSystem(BicycleSelectionSystem):
             str: Status message indicating the result.
         """
         try:
-            filtered_future_recommendations = pd.DataFrame()
-            for _, row in final_recommendations.iterrows():
-                target_type = row['Type']
-                target_brand = row['Brand']
-                filtered_df = self.PredictRecommendation_df[
-                (self.PredictRecommendation_df['Brand'] == target_brand) &
-                (self.PredictRecommendation_df['Type'] == target_type) &
-                (self.PredictRecommendation_df['Condition'] == 'new')
-                ]
-                filtered_future_recommendations = pd.concat([filtered_future_recommendations, filtered_df])
-            
-            filtered_future_recommendations = filtered_future_recommendations.drop_duplicates().reset_index(drop=True)
+            # New bikes of every recommended (Brand, Type), in recommendation order, with one join
+            targets = final_recommendations[['Brand', 'Type', 'Score']].reset_index(drop=True)
+            new_bikes = self.PredictRecommendation_df[self.PredictRecommendation_df['Condition'] == 'new']
+            filtered_future_recommendations = targets[['Brand', 'Type']].drop_duplicates().merge(
+                new_bikes, on=['Brand', 'Type'], how='inner'
+            )[new_bikes.columns].drop_duplicates().reset_index(drop=True)
+
             if filtered_future_recommendations.empty:
-                print(f"No bikes found for brand: {target_brand}, type: {target_type}")
+                print("No new bikes found for the recommended brands and types")
                 return filtered_future_recommendations, 0, 'No bikes found within the budget and criteria.'
-            # Initialize budget allocation and quantities
-            total_spent = 0 
-            quantities = [0] * filtered_future_recommendations.shape[0]  
-            remaining_budget = budget  
-            unit_increase_factor = 1  
-
-            # Allocate budget to bikes
-            while remaining_budget > 0:
-                iteration_total_spent = 0  
-                for i, row in filtered_future_recommendations.iterrows():
-                    bike_price = row['Price']
-                    units_to_add = unit_increase_factor
-                    cost_for_units = (bike_price * units_to_add)
-
-                    if remaining_budget >= cost_for_units:
-                        quantities[i] += units_to_add  
-                        remaining_budget -= cost_for_units  
-                        iteration_total_spent += cost_for_units
-                    else:
-                        max_units = (remaining_budget // bike_price)
-                        quantities[i] += max_units
-                        remaining_budget -= (max_units * bike_price)
-                        iteration_total_spent += (max_units * bike_price)
-
-                if iteration_total_spent == 0:
-                    break
 
-                unit_increase_factor *= 1  # Adjust the unit increase factor
+            prices = filtered_future_recommendations['Price'].tolist()
+            if mode == 'knapsack':
+                scores = targets.groupby(['Brand', 'Type'])['Score'].max()
+                values = [scores[(brand, type_)] for brand, type_ in
+                          zip(filtered_future_recommendations['Brand'], filtered_future_recommendations['Type'])]
+                quantities = self.allocate_knapsack(prices, values, budget, max_units)
+            elif mode == 'round_robin':
+                quantities = self.allocate_roundRobin(prices, budget)
+            else:
+                raise ValueError(f"Unknown allocation mode: {mode}")
 
-            total_spent = sum(quantities[i] * filtered_future_recommendations.iloc[i]['Price'] for i in range(len(filtered_future_recommendations)))
-            filtered_future_recommendations.loc[:, 'RecommendedUnits'] = quantities
+            total_spent = sum(units * price for units, price in zip(quantities, prices))
+            filtered_future_recommendations.loc[:, 'RecommendedUnits'] = np.array(quantities, dtype=float)
             total_spent = f"{total_spent:.2f}"
             filtered_future_recommendations.set_index(['ImageURL'], inplace=True)
             
@@ -299,41 +960,132 @@ class BikeRecommendationSystem(BicycleSelectionSystem):
 
 
     def generate_goodrecommendations(self, top_n=10):
-        """Generate top bike recommendations using the shared recommendation DataFrame."""
-        try:
-            if self.recommendation_df is None:
-                raise ValueError("Recommendation DataFrame is not available.")
-
-            grouped_recommendation_df = self.recommendation_df.groupby(
-                ['InventoryID', 'Brand', 'Type'], as_index=False
-            ).agg({
-                'Score': 'max',
-                'DurabilityScore': 'max',
-                'RentalFrequency': 'max',
-            })
-
-            top_bikes = grouped_recommendation_df.nlargest(top_n, 'Score')
-
-            enriched_top_bikes = pd.merge(
-                top_bikes, 
-                self.PredictRecommendation_df.drop(columns=['Brand', 'Type', 'Condition']),  # Avoid duplicates
-                on='InventoryID', 
-                how='left'
-            )
+        """Generate top bike recommendations, memoised by the shared pipeline until the data changes."""
+        recommendations, message = self.pipeline.get(('good', top_n), lambda: self.rank_goodrecommendations(top_n))
+        if recommendations is None:
+            self.pipeline.discard(('good', top_n))  # Errors are not memoised
+            return recommendations, message
+        return recommendations.copy(), message
+
+    def score_inventories(self, best=True, inventory_ids=None):
+        """
+        Score every inventory item from the per-bike aggregates instead of the full history join.
 
-            additional_columns = self.recommendation_df.drop(columns=['InventoryID', 'Brand', 'Type', 'DurabilityScore', 'RentalFrequency', 'Score']).columns
-            
-            additional_data = self.recommendation_df[['InventoryID'] + list(additional_columns)]
+        The best (or worst) BikesHistoryViews row of a bike is its most (or least) recently used one, so
+        the per-bike scores equal the max (or min) of `prepare_recommendation_df` over the bike's rows,
+        and grouping them by (InventoryID, Brand, Type) gives the same table the ranking used to build.
 
-            final_recommendations = pd.merge(
-                enriched_top_bikes, 
-                additional_data.drop_duplicates('InventoryID'), 
-                on='InventoryID', 
-                how='left'
-            )
+        Args:
+            best (bool): Score from the most recently used rows (good recommendations) if True, from the
+                least recently used ones (bad recommendations) otherwise.
+            inventory_ids (iterable, optional): Only score these inventory items.
+
+        Returns:
+            tuple: The grouped DataFrame (InventoryID, Brand, Type, Score, DurabilityScore,
+            RentalFrequency) and, per InventoryID, the FrameSize, Status, Condition and BikeAge of its
+            highest scoring bike.
+
+        Raises:
+            ValueError: If the aggregates cannot be read from the database.
+        """
+        aggregates = self.pipeline.aggregates
+        if not aggregates.ensure_current():
+            raise ValueError("Recommendation aggregates are not available.")
+        self.current_date = datetime.now()
+        bikes = aggregates.bike_frame(inventory_ids)
+        bikes['BikeAge'] = self.calculate_bikeAges(bikes)
+
+        def scores(used):
+            durability = self.calculate_durabilityScores(
+                bikes[['Condition', 'Status']].assign(RentalDate=bikes[used], ReturnDate=bikes[used]))
+            score = (bikes['RentalFrequency'] * FREQUENCY_WEIGHT + durability * DURABILITY_WEIGHT
+                     - bikes['BikeAge'] * AGE_WEIGHT)
+            return durability, score
+
+        best_durability, best_score = scores('LastUsed')
+        if best:
+            bikes['DurabilityScore'], bikes['Score'] = best_durability, best_score
+        else:
+            bikes['DurabilityScore'], bikes['Score'] = scores('FirstUsed')
+
+        grouped = bikes.groupby(['InventoryID', 'Brand', 'Type'], as_index=False).agg({
+            'Score': 'max' if best else 'min',
+            'DurabilityScore': 'max' if best else 'min',
+            'RentalFrequency': 'max' if best else 'min',
+        })
+        # The details shown for an inventory item are those of its highest scoring bike
+        if bikes.empty:
+            return grouped, bikes[['InventoryID', 'FrameSize', 'Status', 'Condition', 'BikeAge']]
+        representatives = bikes.loc[best_score.groupby(bikes['InventoryID']).idxmax(),
+                                    ['InventoryID', 'FrameSize', 'Status', 'Condition', 'BikeAge']]
+        return grouped, representatives
+
+    def ranked_index(self, best=True):
+        """
+        Return the pipeline's ranked index of inventory items, brought up to date first.
+
+        Only the items whose inputs changed since the index was last used are scored again; the
+        whole index is rebuilt when the aggregates were rebuilt or the day changed.
+
+        Args:
+            best (bool): The best-first index if True, the worst-first one otherwise.
 
-            final_recommendations = final_recommendations.drop(columns=['CustomerRating','BicycleID','DailyRate','WeeklyRate','DateOfPurchase','RentalDate','ReturnDate'])
-            final_recommendations.set_index(['ImageURL'], inplace=True)
+        Raises:
+            ValueError: If the aggregates cannot be read from the database.
+        """
+        aggregates = self.pipeline.aggregates
+        if not aggregates.ensure_current():
+            raise ValueError("Recommendation aggregates are not available.")
+        index = self.pipeline.rankings[best]
+        with aggregates._lock:
+            day, rebuilds, change = datetime.now().date(), aggregates.rebuilds, aggregates.changes
+            if index.synced is None or index.synced[:2] != (day, rebuilds):
+                inventory_ids = None
+                index.__init__(best)
+            else:
+                inventory_ids = aggregates.changed_since(index.synced[2])
+            if inventory_ids is None or inventory_ids:
+                grouped, representatives = self.score_inventories(best, inventory_ids)
+                index.replace(inventory_ids or (), grouped, representatives)
+            index.synced = (day, rebuilds, change)
+        return index
+
+    def inventory_lookup(self):
+        """Pipeline stage 'inventory_lookup': the inventory frame keyed by InventoryID for enriching ranked items."""
+        predict_df = self.PredictRecommendation_df
+        if predict_df is None:
+            return None
+        return predict_df.drop(columns=['Brand', 'Type', 'Condition']).set_index('InventoryID')
+
+    def enrich_ranked(self, ranked, index):
+        """
+        Add the inventory details and the details of each item's highest scoring bike to ranked items,
+        with keyed lookups for the selected InventoryIDs only.
+
+        Args:
+            ranked (DataFrame): Items returned by `rankedIndex.top`.
+            index (rankedIndex): Index the items were read from.
+
+        Returns:
+            DataFrame: The recommendations indexed by ImageURL.
+        """
+        lookup = self.pipeline.get('inventory_lookup', self.inventory_lookup)
+        if lookup is None:
+            raise ValueError("Inventory data is not available.")
+        inventory_ids = ranked['InventoryID'].tolist()
+        details = lookup.reindex(inventory_ids).reset_index(drop=True)
+        bikes = pd.DataFrame([index.representative(inventory_id) for inventory_id in inventory_ids],
+                             columns=['FrameSize', 'Status', 'Condition', 'BikeAge'])
+        final_recommendations = pd.concat([ranked.reset_index(drop=True), details, bikes], axis=1)
+        final_recommendations = final_recommendations.drop(columns=['CustomerRating'])
+        final_recommendations.set_index(['ImageURL'], inplace=True)
+        return final_recommendations
+
+    def rank_goodrecommendations(self, top_n=10):
+        """Pipeline stage 'rank': top bike recommendations read off the best-first ranked index."""
+        try:
+            index = self.ranked_index(best=True)
+            final_recommendations = self.enrich_ranked(index.top(top_n), index)
 
             return (final_recommendations, "Recommendations based on top bikes from past rental patterns.")
 
@@ -342,37 +1094,18 @@ class BikeRecommendationSystem(BicycleSelectionSystem):
             return None, f'Error generating recommendations: {e}'
         
     def generate_badrecommendations(self, replace_n=10):
-        """Generate bottom bike recommendations using the shared recommendation DataFrame."""
+        """Generate bottom bike recommendations, memoised by the shared pipeline until the data changes."""
+        recommendations, message = self.pipeline.get(('bad', replace_n), lambda: self.rank_badrecommendations(replace_n))
+        if recommendations is None:
+            self.pipeline.discard(('bad', replace_n))  # Errors are not memoised
+            return recommendations, message
+        return recommendations.copy(), message
+
+    def rank_badrecommendations(self, replace_n=10):
+        """Pipeline stage 'rank': bottom bike recommendations read off the worst-first ranked index."""
         try:
-            if self.recommendation_df is None:
-                raise ValueError("Recommendation DataFrame is not available.")
-
-            grouped_recommendation_df = self.recommendation_df.groupby(
-                ['InventoryID', 'Brand', 'Type'], as_index=False
-            ).agg({
-                'Score': 'min',
-                'DurabilityScore': 'min',
-                'RentalFrequency': 'min',
-            })
-
-            bad_bikes = grouped_recommendation_df.nsmallest(replace_n, 'Score')
-
-            merged_bad_bikes = bad_bikes.merge(
-                self.PredictRecommendation_df.drop(columns=['Brand', 'Type','Condition'], errors='ignore'),
-                on='InventoryID',
-                how='left'
-            )
-            additional_columns = self.recommendation_df.drop(columns=['InventoryID', 'Brand', 'Type', 'DurabilityScore', 'RentalFrequency', 'Score']).columns
-            
-            additional_data = self.recommendation_df[['InventoryID'] + list(additional_columns)]
-            final_recommendations = pd.merge(
-                merged_bad_bikes, 
-                additional_data.drop_duplicates('InventoryID'), 
-                on='InventoryID', 
-                how='left'
-            )
-            final_recommendations = final_recommendations.drop(columns=['CustomerRating','BicycleID','DailyRate','WeeklyRate','DateOfPurchase','RentalDate','ReturnDate'])
-            final_recommendations.set_index(['ImageURL'], inplace=True)
+            index = self.ranked_index(best=False)
+            final_recommendations = self.enrich_ranked(index.top(replace_n), index)
             return final_recommendations, 'Recommendations for bike replacements.'
 
         except Exception as e:
@@ -403,37 +1136,42 @@ class display_graphs(BikeRecommendationSystem):
     system evolves over time.
     """
     
-    def __init__(self):
-        """Initialize the class and generate the recommendations."""
-        super().__init__()  # Initialize the parent class
-        
-        self.good_recommendations, message = self.generate_goodrecommendations()
-        self.bad_recommendations, bad_message = self.generate_badrecommendations()
+    def __init__(self, db_name='BicycleRental.db'):
+        """Initialize the class, the recommendations are generated when a plot first needs them."""
+        super().__init__(db_name)  # Initialize the parent class
 
-    def plot_animated_future_recommendations(self, user_budget):
-        """
-        Plot an animated graph for future purchase recommendations, with dynamic updates for cumulative spending and 
-        remaining budget.
+    @property
+    def good_recommendations(self):
+        return self.generate_goodrecommendations()[0]
 
-        The plot dynamically visualizes the budget allocation by showing how much has been spent and how much is left
-        as different bike units are purchased within the user-defined budget. This visualization helps users better understand
-        how their budget can be used to make purchases.
+    @property
+    def bad_recommendations(self):
+        return self.generate_badrecommendations()[0]
+
+    def purchase_plan(self, user_budget, top_n=10):
+        """
+        Budget allocation behind the animated purchase plot: the budget recommendations sorted by price
+        and, for each of them, the units bought and the cumulative spending and remaining budget.
 
         Args:
             user_budget (float): The total amount of money the user is willing to spend.
+            top_n (int): Number of good recommendations the new bikes are chosen for.
 
         Returns:
-            HTML: The animated plot as HTML content to be rendered in a browser.
+            dict: 'prices', 'units_bought', 'cumulative_spent' and 'remaining_budget' lists and the 'budget',
+            None if there are no future recommendations.
         """
-        future_recommendations,total_spent, purchase_message = self.filter_future_recommendations(self.good_recommendations,user_budget)
+        good_recommendations = self.generate_goodrecommendations(top_n)[0]
+        if good_recommendations is None:
+            return None
+        future_recommendations,total_spent, purchase_message = self.filter_future_recommendations(good_recommendations,user_budget)
         if future_recommendations.empty:
-            print("No future recommendations available.")
-            return
+            return None
 
         # Sort recommendations by price to make the plot more meaningful
         future_recommendations = future_recommendations.sort_values(by='Price')
-        prices = future_recommendations['Price'].values
-        recommended_units = future_recommendations['RecommendedUnits'].values
+        prices = future_recommendations['Price'].to_numpy(dtype=float)
+        recommended_units = future_recommendations['RecommendedUnits'].to_numpy(dtype=float)
 
         # Variables to track cumulative spending and remaining budget
         cumulative_spent = 0
@@ -452,6 +1190,57 @@ class display_graphs(BikeRecommendationSystem):
             cumulative_spent_list.append(cumulative_spent)
             remaining_budget_list.append(remaining_budget)
 
+        return {'budget': user_budget, 'prices': prices.tolist(), 'units_bought': units_bought.tolist(),
+                'cumulative_spent': cumulative_spent_list, 'remaining_budget': remaining_budget_list}
+
+    @staticmethod
+    def keyframes(n_points, max_frames=ANIMATION_MAX_FRAMES):
+        """Indices of the points shown as animation frames: all of them, or `max_frames` evenly spread ending on the last."""
+        if max_frames is None or n_points <= max_frames:
+            return list(range(n_points))
+        return sorted(set(np.linspace(0, n_points - 1, max_frames).round().astype(int).tolist()))
+
+    def plot_animated_future_recommendations(self, user_budget, mode='jshtml', max_frames=ANIMATION_MAX_FRAMES, top_n=10):
+        """
+        Plot an animated graph for future purchase recommendations, with dynamic updates for cumulative spending and 
+        remaining budget.
+
+        The plot dynamically visualizes the budget allocation by showing how much has been spent and how much is left
+        as different bike units are purchased within the user-defined budget. This visualization helps users better understand
+        how their budget can be used to make purchases.
+
+        The figure is drawn once; each frame only updates the data of a line collection, the scatter
+        markers and the budget text (blitting), so a frame costs the same whatever its position. At most
+        `max_frames` keyframes are rendered, which bounds the size of the HTML for long plans.
+
+        Args:
+            user_budget (float): The total amount of money the user is willing to spend.
+            mode (str): 'jshtml' for the animation as HTML, 'svg' for a static SVG of the final plan,
+                'figure' for the matplotlib Figure of the final plan, 'spec' for the plan and keyframes
+                as a JSON string (no rendering at all).
+            max_frames (int, optional): Maximum number of keyframes, None to animate every point.
+            top_n (int): Number of good recommendations the new bikes are chosen for.
+
+        Returns:
+            HTML: The animated plot as HTML content to be rendered in a browser ('jshtml' and 'svg'),
+            Figure: The final plan ('figure'), str: The JSON spec ('spec'), None if there are no
+            future recommendations.
+        """
+        plan = self.purchase_plan(user_budget, top_n)
+        if plan is None:
+            print("No future recommendations available.")
+            return
+        frames = self.keyframes(len(plan['prices']), max_frames)
+        if mode == 'spec':
+            return json.dumps(dict(plan, frames=frames))
+        if mode not in ('jshtml', 'svg', 'figure'):
+            raise ValueError(f"Unknown animation mode: {mode}")
+
+        prices = np.array(plan['prices'])
+        units_bought = np.array(plan['units_bought'])
+        cumulative_spent_list = plan['cumulative_spent']
+        remaining_budget_list = plan['remaining_budget']
+
         # Set font properties for the plot
         plt.rcParams['font.family'] = 'DejaVu Sans'
         plt.rcParams['font.size'] = 11
@@ -459,48 +1248,63 @@ class display_graphs(BikeRecommendationSystem):
         # Create a figure and axis for the plot
         fig, ax = plt.subplots(figsize=(12, 5))
         fig.patch.set_facecolor('#f7f7f7')
-        
+
+        # Set title, labels, and limits with enhanced visuals, once for all frames
+        ax.set_title(f"Purchase Recommendation with in budget", fontsize=18, fontweight='bold', color='#00796b')
+        ax.set_xlabel("Price", fontsize=13, fontweight='bold', color='#37474f')
+        ax.set_ylabel("Recommended Units", fontsize=13, fontweight='bold', color='#37474f')
+        max_units = np.max(units_bought) if np.max(units_bought) != 0 else 1  # Prevent zero-size limit
+        ax.set_ylim(0, max_units * 1.2)
+        ax.set_xlim(np.min(prices) * 0.8, np.max(prices) * 1.2)
+        ax.grid(True, which='both', linestyle='--', linewidth=0.5, color='#b0bec5')
+
+        # Define color gradient for lines based on cumulative budget spent
+        color_gradient = plt.cm.viridis(np.linspace(0, 1, len(cumulative_spent_list)))
+        points = np.column_stack([prices, units_bought])
+        segments = np.stack([points[:-1], points[1:]], axis=1)
+
+        # Artists updated by every frame
+        line = LineCollection([], linewidths=2, label='Budget Allocation Line')
+        ax.add_collection(line)
+        markers = ax.scatter([], [], edgecolor='black', zorder=5)
+        budget_text = ax.text(1.0, 0.95, '', transform=ax.transAxes, fontsize=12, color='#1b5e20',
+                              verticalalignment='top', horizontalalignment='right', fontweight='bold')
+        legend = ax.legend(handles=[line], loc='upper left', fontsize=10, frameon=True, framealpha=0.9)
+        legend.set_visible(False)
+
         # Function to update each frame
         def animate(i):
-            ax.clear()
-            
-            # Define color gradient for lines based on cumulative budget spent
-            color_gradient = plt.cm.viridis(np.linspace(0, 1, len(cumulative_spent_list)))
-            
-            # Draw main line with gradient colors
-            for j in range(1, i + 1):
-                ax.plot(prices[j-1:j+1], units_bought[j-1:j+1], color=color_gradient[j], linewidth=2)
-            
+            line.set_segments(segments[:i])
+            line.set_color(color_gradient[1:i + 1])
             # Enlarged marker at the current point
-            ax.scatter(prices[:i+1], units_bought[:i+1], s=[100] * i + [200], color=color_gradient[:i+1], edgecolor='black', zorder=5)
-
+            markers.set_offsets(points[:i + 1])
+            markers.set_sizes([100] * i + [200])
+            markers.set_facecolors(color_gradient[:i + 1])
             # Display cumulative budget details on each frame
-            ax.text(1.0, 0.95, f'Total Spent: £{round(cumulative_spent_list[i], 2):.2f}\nBudget Left: £{round(remaining_budget_list[i], 2):.2f}', 
-                    transform=ax.transAxes, fontsize=12, color='#1b5e20', verticalalignment='top', horizontalalignment='right', fontweight='bold')
-            
-            # Set title, labels, and limits with enhanced visuals
-            ax.set_title(f"Purchase Recommendation with in budget", fontsize=18, fontweight='bold', color='#00796b')
-            ax.set_xlabel("Price", fontsize=13, fontweight='bold', color='#37474f')
-            ax.set_ylabel("Recommended Units", fontsize=13, fontweight='bold', color='#37474f')
-            
-            # Set axis limits dynamically
-            max_units = np.max(units_bought) if np.max(units_bought) != 0 else 1  # Prevent zero-size limit
-            ax.set_ylim(0, max_units * 1.2)
-            ax.set_xlim(np.min(prices) * 0.8, np.max(prices) * 1.2)
-            
-            ax.grid(True, which='both', linestyle='--', linewidth=0.5, color='#b0bec5')
-            
-            # Add a legend dynamically
-            if i == len(prices) - 1:
-                ax.legend(['Budget Allocation Line'], loc='upper left', fontsize=10, frameon=True, framealpha=0.9)
+            budget_text.set_text(f'Total Spent: £{round(cumulative_spent_list[i], 2):.2f}\nBudget Left: £{round(remaining_budget_list[i], 2):.2f}')
+            # Add a legend on the last frame
+            legend.set_visible(i == len(prices) - 1)
+            return line, markers, budget_text, legend
+
+        if mode == 'figure':
+            animate(len(prices) - 1)
+            return fig
+        if mode == 'svg':
+            animate(len(prices) - 1)
+            buffer = io.StringIO()
+            fig.savefig(buffer, format='svg', facecolor=fig.get_facecolor())
+            plt.close(fig)
+            return HTML(buffer.getvalue())
 
         # Create and display the animated plot
-        anim = animation.FuncAnimation(fig, animate, frames=len(future_recommendations), repeat=False)
-
-        return HTML(anim.to_jshtml())
+        anim = animation.FuncAnimation(fig, animate, frames=frames, init_func=lambda: animate(0),
+                                       blit=True, repeat=False)
+        html = anim.to_jshtml()
+        plt.close(fig)
+        return HTML(html)
         
 
-    def plot_score_durability_vs_rental_frequency(self):
+    def plot_score_durability_vs_rental_frequency(self, top_n=10, show=True):
         """
         Plot a scatter plot to visualize the relationship between rental frequency and durability score, 
         differentiating between good and bad recommendations.
@@ -508,13 +1312,17 @@ class display_graphs(BikeRecommendationSystem):
         This plot helps to analyze the rental frequency and durability score for both good and bad recommendations 
         to better understand the performance of different bikes.
 
+        Args:
+            top_n (int): Number of good and of bad recommendations plotted.
+            show (bool): Show the figure with `plt.show()`; if False it is returned instead (headless reports).
+
         Returns:
-            None
+            Figure: The figure when `show` is False, otherwise None.
         """
         # Create subplots for good and bad recommendations
         fig, axes = plt.subplots(1, 2, figsize=(10, 5), sharey=True)
         categories = ['Good Recommendations', 'Replacement Recommendation']
-        dataframes = [self.good_recommendations, self.bad_recommendations]
+        dataframes = [self.generate_goodrecommendations(top_n)[0], self.generate_badrecommendations(top_n)[0]]
 
         # Plot data for each category
         for ax, category, df in zip(axes, categories, dataframes):
@@ -532,23 +1340,29 @@ class display_graphs(BikeRecommendationSystem):
             ax.set_ylabel('DurabilityScore')
         
         plt.tight_layout()
+        if not show:
+            return fig
         plt.show()
         
 
-    def plot_popularity_by_brand(self):
+    def plot_popularity_by_brand(self, top_n=10, show=True):
         """
         Plot rental frequency by brand and frame size, comparing good and bad recommendations.
         
         This plot visualizes which bike brands and frame sizes are most popular based on rental frequency, 
         helping users see trends in brand popularity.
 
+        Args:
+            top_n (int): Number of good and of bad recommendations plotted.
+            show (bool): Show the figure with `plt.show()`; if False it is returned instead (headless reports).
+
         Returns:
-            None
+            Figure: The figure when `show` is False, otherwise None.
         """
         # Create a figure with subplots for each category
         fig, axes = plt.subplots(1, 2, figsize=(12, 6), sharey=True)
         categories = ['Good Recommendations', 'Replace Recommendations']
-        dataframes = [self.good_recommendations, self.bad_recommendations]
+        dataframes = [self.generate_goodrecommendations(top_n)[0], self.generate_badrecommendations(top_n)[0]]
 
         title_colors = ['#2a9d8f', '#e76f51']  
         font_prop = FontProperties(weight='bold')  
@@ -577,6 +1391,8 @@ class display_graphs(BikeRecommendationSystem):
 
         plt.style.use('ggplot')
         plt.tight_layout()
+        if not show:
+            return fig
         plt.show()
     
 def test():
@@ -593,17 +1409,45 @@ def test():
         display_plots = display_graphs()
         user_budget = 500
 
+        # Test: nothing is computed until a recommendation is asked for, then the stages are shared
+        print(f"Stages computed after creating the objects: {bike_recommendation_system.pipeline.computed}")
+        bike_recommendation_system.generate_goodrecommendations()
+        display_plots.generate_goodrecommendations()
+        print(f"Stages computed after two objects asked for the same recommendations: {bike_recommendation_system.pipeline.computed}")
+        aggregates = bike_recommendation_system.pipeline.aggregates
+        print(f"Recommendation aggregates: {len(aggregates.bikes)} bikes, {aggregates.rebuilds} full builds, "
+              f"{aggregates.events} rent/return events applied")
+        print(f"Ranked index holds {len(bike_recommendation_system.pipeline.rankings[True].order)} scored inventory items")
+        snapshot = bike_recommendation_system.pipeline.snapshot
+        print(f"Recommendation frame: {len(bike_recommendation_system.recommendation_df)} rows, "
+              f"snapshot {snapshot.directory} loaded {snapshot.loads} times, saved {snapshot.saves} times")
+        print("Memory held by the recommendation frames:")
+        print(bike_recommendation_system.memory_report())
+
+        # Test: vectorized durability scores match the row-by-row calculation
+        print("Checking vectorized durability scores against calculate_durability on 10^6 random rows...")
+        mismatches = bike_recommendation_system.check_durabilityParity(10**6)
+        print(f"Durability parity: {'OK' if mismatches == 0 else f'{mismatches} rows differ'}")
+
         # Test: Fetch rental history recommendations
         print("Testing history recommendation function...")
-        history_df = system.historyRecommendation()
+        history_df = select_system.historyRecommendation()
         if history_df is not None:
             print("Rental history recommendations fetched successfully.")
             print(history_df.head()) 
         else:
             print("Failed to fetch rental history recommendations.")
 
+        # Test: the history aggregated inside SQLite gives the frequencies pandas computes from the rental rows
+        inventory_summary = select_system.historyRecommendation(level='inventory')
+        if history_df is not None and inventory_summary is not None:
+            frequency = history_df.groupby(['Type', 'Brand']).size()
+            summary_frequency = inventory_summary.drop_duplicates(['Type', 'Brand']).set_index(['Type', 'Brand'])['RentalFrequency']
+            print(f"Aggregated history: {len(history_df)} rental rows -> {len(select_system.historyRecommendation(level='bike'))} bike rows, "
+                  f"{len(inventory_summary)} inventory rows; frequencies match: {frequency.sort_index().tolist() == summary_frequency.sort_index().tolist()}")
+
         print("\nTesting future recommendation function...")
-        future_df = system.futureRecommendation()
+        future_df = select_system.futureRecommendation()
         if future_df is not None:
             print("Future bicycle recommendations fetched successfully.")
             print(future_df.head())     
@@ -629,11 +1473,19 @@ def test():
         print(f"\nFuture Recommendations based on budget: {filtered_future_recommendations}")
         print(f"\nTotal amount of recommended bikes: {total_spent}")
 
+        (knapsack_recommendations, total_spent, message) = bike_recommendation_system.filter_future_recommendations(good_recommendations, user_budget, mode='knapsack', max_units=2)
+        print(f"\nHighest scoring purchase within budget: {knapsack_recommendations['RecommendedUnits'].to_dict()}")
+        print(f"\nTotal amount of recommended bikes: {total_spent}")
+
         bad_recommendations, bad_message = bike_recommendation_system.generate_badrecommendations()
         print(f"\nBad Recommendations Message: {bad_message}")
         print(bad_recommendations)
         
-        display_plots.plot_animated_future_recommendations(user_budget)
+        start = time.perf_counter()
+        animated = display_plots.plot_animated_future_recommendations(user_budget)
+        print(f"Animated purchase plan: {len(animated.data) // 1024} KiB of HTML in {time.perf_counter() - start:.2f}s")
+        spec = display_plots.plot_animated_future_recommendations(user_budget, mode='spec')
+        print(f"Purchase plan spec: {len(spec)} bytes, keyframes {json.loads(spec)['frames']}")
         display_plots.plot_score_durability_vs_rental_frequency()
         display_plots.plot_popularity_by_brand()
 
@@ -0,0 +1,450 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to let several shop terminals use one BicycleRental.db at the same time.
+    The notebook menu runs every operation serially inside one kernel. The service below exposes renting,
+    returning, searching and the recommendations over HTTP and answers in JSON instead of Markdown. Requests
+    are handled concurrently by a bounded pool of worker threads (further requests wait in a bounded queue and
+    get 503 once it is full, and idle connections are closed after a timeout). Reads use the shared
+    connection pool and fleet cache, while every rent and return goes through a single writer thread, so
+    SQLite only ever sees one writer from this process.
+
+    Endpoints:
+        - GET  /health                                        -> {"status": "ok"}
+        - POST /rent     {"member_id", "bicycle_id", "rental_days"}
+        - POST /return   {"bicycle_id", "damage_charge", "damage_note"}
+        - GET  /search?brand=&type=&frame_size=&status=&sort_by=&descending=&page=&page_size=
+        - GET  /facets?column=Brand|Type|FrameSize
+        - GET  /recommendations?kind=good|bad&top_n=10
+        - GET  /purchase-plan?budget=5000&mode=round_robin|knapsack
+        - GET  /metrics                                       -> Prometheus text, see dbMetrics.py
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import math
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from database import *
+from bikeRent import BicycleRentalSystem
+from bikeReturn import BicycleReturnSystem
+from bikeSearch import BikeSearch, RESULT_COLUMNS
+
+HOST = "127.0.0.1"
+PORT = 8080
+WORKERS = 8           # Requests handled at the same time
+QUEUE_SIZE = 64       # Requests waiting for a worker before new ones get 503
+WRITE_TIMEOUT = 10.0  # Seconds a request waits for the writer thread to start its write before getting 504
+REQUEST_TIMEOUT = 10.0  # Seconds a connection may take to send a request before it is closed
+KEEPALIVE_TIMEOUT = 2.0  # Seconds an idle keep-alive connection holds its worker before it is closed
+MAX_BODY = 64 * 1024  # Largest request body accepted, in bytes
+MAX_RENTAL_DAYS = 365
+
+class serviceError(Exception):
+    """Error answered to the client with an HTTP status and a message."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def json_keys(details):
+    """Turn the 'Title Case' keys of the rental details into snake_case JSON keys."""
+    return {key.lower().replace(' ', '_'): value for key, value in details.items()}
+
+def plain_text(message):
+    """Message without the Markdown emphasis used by the notebook menu."""
+    return str(message).replace('**', '')
+
+def frame_records(frame):
+    """DataFrame (with its index) as a list of JSON records, dates in ISO format."""
+    if frame is None or frame.empty:
+        return []
+    return json.loads(frame.reset_index().to_json(orient='records', date_format='iso'))
+
+def read_int(values, name, default=None, minimum=None, maximum=None):
+    """Integer parameter `name` of a query or body, checked against its bounds."""
+    value = values.get(name, default)
+    if value is None:
+        raise serviceError(400, f"Missing parameter: {name}")
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise serviceError(400, f"Parameter {name} must be an integer.")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise serviceError(400, f"Parameter {name} must be between {minimum} and {maximum}.")
+    return value
+
+class rentalService():
+    """
+    JSON application layer over the rental classes, shared by every request handler.
+
+    Reads run on the request's worker thread. Rents and returns are submitted to a single writer thread and
+    the worker waits for the result, so writes are serialised in arrival order; the recommendation pipeline
+    is built under a lock so concurrent requests do not compute it twice.
+
+    Methods:
+        - `rent`, `return_bicycle`: Write operations, through the writer thread.
+        - `search`, `facets`, `recommendations`, `purchase_plan`: Read operations.
+        - `close`: Stops the writer thread.
+    """
+    def __init__(self, write_timeout=WRITE_TIMEOUT):
+        """
+        Args:
+            write_timeout (float): Seconds to wait for the writer thread before answering 504.
+        """
+        self.rental_system = BicycleRentalSystem()
+        self.return_system = BicycleReturnSystem()
+        self.search_system = BikeSearch()
+        self.write_timeout = write_timeout
+        self.writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self.recommendation_lock = threading.Lock()
+        self._recommendations = None
+
+    def write(self, function, *args):
+        """
+        Run a write on the writer thread and wait for its result.
+
+        A write still queued after `write_timeout` seconds is dropped and answered 504, nothing was written.
+        A write that has started cannot be taken back, so it is waited for and its real outcome returned.
+        """
+        future = self.writer.submit(function, *args)
+        try:
+            return future.result(timeout=self.write_timeout)
+        except concurrent.futures.TimeoutError:
+            if future.cancel():
+                raise serviceError(504, "The database writer is busy, nothing was written, try again.")
+            return future.result()
+
+    def rent(self, body):
+        """Rent a bicycle: 200 with the rental, 409 if it cannot be rented, 503 on a database error."""
+        member_id = read_int(body, 'member_id')
+        bicycle_id = read_int(body, 'bicycle_id')
+        rental_days = read_int(body, 'rental_days', 1, 1, MAX_RENTAL_DAYS)
+        result = self.write(self.rental_system.db_write.write_rentTransaction, member_id, bicycle_id, rental_days,
+                            None, True)
+        if result is None:
+            raise serviceError(503, "Rental failed due to a database error.")
+        rented, details = result
+        if not rented:
+            raise serviceError(409, plain_text(details))
+        rental = json_keys(details)
+        rental['total_price'] = round(self.rental_system.rental_cost(details, rental_days), 2)
+        return 200, {'rented': True, 'rental': rental}
+
+    def return_bicycle(self, body):
+        """Return a bicycle: 200 with the charges, 409 if it cannot be returned, 503 on a database error."""
+        bicycle_id = read_int(body, 'bicycle_id')
+        try:
+            damage_charge = float(body.get('damage_charge') or 0)
+        except (TypeError, ValueError):
+            raise serviceError(400, "Parameter damage_charge must be a number.")
+        if not math.isfinite(damage_charge):
+            raise serviceError(400, "Parameter damage_charge must be a finite number.")
+        if damage_charge < 0:
+            raise serviceError(400, "Parameter damage_charge cannot be negative.")
+        damage_note = body.get('damage_note') or None
+        result = self.write(self.return_system.db_write.write_returnTransaction, bicycle_id, damage_charge, damage_note)
+        if result is None:
+            raise serviceError(503, f"Failed to process return for Bicycle ID: {bicycle_id}")
+        returned, details = result
+        if not returned:
+            raise serviceError(409, plain_text(details))
+        returned_details = json_keys(details)
+        returned_details['total_charges'] = round(details['Late Fee'] + details['Damage Charge'], 2)
+        return 200, {'returned': True, 'return': returned_details}
+
+    def search(self, query):
+        """One page of bicycles matching the brand, type, frame_size and status filters given."""
+        filters = {name: query[name] for name in SEARCH_FILTERS if query.get(name)}
+        sort_by = query.get('sort_by', 'BicycleID')
+        if sort_by not in SEARCH_SORT_KEYS:
+            raise serviceError(400, f"Parameter sort_by must be one of {', '.join(SEARCH_SORT_KEYS)}.")
+        descending = query.get('descending', '').lower() in ('1', 'true', 'yes')
+        page = read_int(query, 'page', 1, 1)
+        page_size = read_int(query, 'page_size', PAGE_SIZE, 1, 500)
+        rows, next_key = self.search_system.db.searchBicyclesPage(filters, sort_by, descending, page_size,
+                                                                  offset=(page - 1) * page_size)
+        keys = [column.lower().replace(' ', '_') for column in RESULT_COLUMNS]
+        bicycles = [dict(zip(keys, row)) for row in rows]
+        return 200, {'page': page, 'page_size': page_size, 'has_next_page': next_key is not None,
+                     'bicycles': bicycles}
+
+    def facets(self, query):
+        """Total and available bicycles per value of a search column."""
+        column = query.get('column', 'Brand')
+        if column not in FACET_COLUMNS:
+            raise serviceError(400, f"Parameter column must be one of {', '.join(FACET_COLUMNS)}.")
+        counts = self.search_system.db.fleet_cache.facet_values(column)
+        return 200, {'column': column, 'values': {value: {'total': total, 'available': available}
+                                                  for value, (total, available) in counts.items()}}
+
+    def recommendation_system(self):
+        """The recommendation system, created on first use (importing it loads pandas and matplotlib)."""
+        if self._recommendations is None:
+            from bikeSelect import BikeRecommendationSystem
+            self._recommendations = BikeRecommendationSystem()
+        return self._recommendations
+
+    def recommendations(self, query):
+        """Good (top) or bad (replacement) bike recommendations."""
+        kind = query.get('kind', 'good')
+        if kind not in ('good', 'bad'):
+            raise serviceError(400, "Parameter kind must be good or bad.")
+        top_n = read_int(query, 'top_n', 10, 1, 100)
+        with self.recommendation_lock:
+            system = self.recommendation_system()
+            if kind == 'good':
+                frame, message = system.generate_goodrecommendations(top_n)
+            else:
+                frame, message = system.generate_badrecommendations(top_n)
+        if frame is None:
+            raise serviceError(503, message)
+        return 200, {'kind': kind, 'message': message, 'recommendations': frame_records(frame)}
+
+    def purchase_plan(self, query):
+        """New bikes to buy for a budget, from the good recommendations."""
+        try:
+            budget = float(query.get('budget', 5000))
+        except ValueError:
+            raise serviceError(400, "Parameter budget must be a number.")
+        if not math.isfinite(budget) or budget < 0:
+            raise serviceError(400, "Parameter budget must be a finite, non-negative number.")
+        mode = query.get('mode', 'round_robin')
+        if mode not in ('round_robin', 'knapsack'):
+            raise serviceError(400, "Parameter mode must be round_robin or knapsack.")
+        with self.recommendation_lock:
+            system = self.recommendation_system()
+            recommendations, message = system.generate_goodrecommendations()
+            if recommendations is None:
+                raise serviceError(503, message)
+            plan, total_spent, message = system.filter_future_recommendations(recommendations, budget, mode)
+        return 200, {'budget': budget, 'mode': mode, 'total_spent': float(total_spent), 'message': message,
+                     'bikes': frame_records(plan)}
+
+    def close(self):
+        self.writer.shutdown(wait=True)
+
+class serviceRequestHandler(BaseHTTPRequestHandler):
+    """Routes a request to the `rentalService` of its server and writes the JSON answer."""
+    protocol_version = "HTTP/1.1"
+    routes = {
+        ('GET', '/health'): lambda service, data: (200, {'status': 'ok', 'time': datetime.datetime.now().isoformat()}),
+        ('POST', '/rent'): rentalService.rent,
+        ('POST', '/return'): rentalService.return_bicycle,
+        ('GET', '/search'): rentalService.search,
+        ('GET', '/facets'): rentalService.facets,
+        ('GET', '/recommendations'): rentalService.recommendations,
+        ('GET', '/purchase-plan'): rentalService.purchase_plan,
+    }
+
+    def setup(self):
+        self.timeout = self.server.request_timeout  # Socket timeout, a silent client cannot hold a worker
+        super().setup()
+
+    def handle(self):
+        """
+        Serve the requests of a keep-alive connection. The connection is closed once it has been idle for
+        KEEPALIVE_TIMEOUT seconds, or after a response while other connections are waiting for a worker.
+        """
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and not self.server.waiting:
+            self.connection.settimeout(min(self.timeout, KEEPALIVE_TIMEOUT))
+            self.handle_one_request()
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def read_body(self):
+        """Decode the JSON object of a POST body."""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            raise serviceError(413, "Request body too large.")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise serviceError(400, "The request body is not valid JSON.")
+        if not isinstance(body, dict):
+            raise serviceError(400, "The request body must be a JSON object.")
+        return body
+
+    def dispatch(self, method):
+        url = urllib.parse.urlsplit(self.path)
+        try:
+            if method == 'GET' and url.path == '/metrics':
+                self.send_text(200, METRICS.to_prometheus(), "text/plain; version=0.0.4")
+                return
+            handler = self.routes.get((method, url.path))
+            if handler is None:
+                known = any(path == url.path for _, path in self.routes)
+                raise serviceError(405 if known else 404, f"No route for {method} {url.path}")
+            data = self.read_body() if method == 'POST' else dict(urllib.parse.parse_qsl(url.query))
+            status, payload = handler(self.server.service, data)
+        except serviceError as e:
+            status, payload = e.status, {'error': e.message}
+        except Exception as e:
+            print(f"Service error on {method} {self.path}: {e}")
+            status, payload = 500, {'error': "Internal server error."}
+        self.send_text(status, json.dumps(payload, default=str), "application/json")
+
+    def send_text(self, status, text, content_type):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        """Requests are not logged to stderr; the database metrics are served at /metrics."""
+
+class boundedHTTPServer(HTTPServer):
+    """
+    HTTP server handing every connection to a fixed pool of worker threads.
+    At most `workers + queue_size` connections are accepted at once, the others are answered 503 straight away.
+    A connection holds its worker until it closes, so idle connections are timed out (see `serviceRequestHandler`).
+    """
+    def __init__(self, address, service, workers=WORKERS, queue_size=QUEUE_SIZE, request_timeout=REQUEST_TIMEOUT):
+        self.request_queue_size = workers + queue_size  # Listen backlog, so bursts are not dropped by the kernel
+        super().__init__(address, serviceRequestHandler)
+        self.service = service
+        self.request_timeout = request_timeout
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-worker")
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.waiting = 0  # Accepted connections waiting for a worker
+        self.waiting_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+                                b"Content-Length: 33\r\nConnection: close\r\n\r\n{\"error\": \"Server is overloaded.\"}")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        with self.waiting_lock:
+            self.waiting += 1
+        self.executor.submit(self.process_request_worker, request, client_address)
+
+    def process_request_worker(self, request, client_address):
+        with self.waiting_lock:
+            self.waiting -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+        self.service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the bicycle rental operations as a JSON HTTP API.")
+    parser.add_argument('--host', default=HOST, help="address to listen on")
+    parser.add_argument('--port', type=int, default=PORT, help="port to listen on")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="requests handled at the same time")
+    parser.add_argument('--queue', type=int, default=QUEUE_SIZE, help="requests waiting before 503 is answered")
+    parser.add_argument('--request-timeout', type=float, default=REQUEST_TIMEOUT,
+                        help="seconds a connection may take to send a request")
+    args = parser.parse_args(argv)
+    server = boundedHTTPServer((args.host, args.port), rentalService(), args.workers, args.queue, args.request_timeout)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def test():
+    """
+    Starts the service on a free port, over a synthetic fleet with active members in a temporary directory,
+    and sends concurrent searches, rents and returns to it, checking that every bicycle is rented at most
+    once and that idle connections do not keep the workers busy.
+    """
+    import os
+    import socket
+    import tempfile
+    import urllib.request
+    import urllib.error
+    from bikeBenchmark import write_syntheticDatabase
+
+    # The application classes open BicycleRental.db and members.txt from the current directory
+    cwd = os.getcwd()
+    directory = tempfile.mkdtemp()
+    write_syntheticDatabase(directory, 200, 2000, seed=3)
+    os.chdir(directory)
+
+    server = boundedHTTPServer(("127.0.0.1", 0), rentalService(), workers=2, request_timeout=1.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def call(method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(base + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    try:
+        print(call('GET', '/health'))
+        status, page = call('GET', '/search?type=Road%20Bike&page_size=3')
+        print(status, page['has_next_page'], [bike['bicycle_id'] for bike in page['bicycles']])
+        print(call('GET', '/facets?column=Type')[1]['values'])
+        print(call('GET', '/search?sort_by=Nope'))
+        for budget in ('nan', 'inf', '-100'):
+            assert call('GET', f'/purchase-plan?budget={budget}')[0] == 400, budget
+        assert call('POST', '/return', {'bicycle_id': 1, 'damage_charge': 'nan'})[0] == 400
+
+        # As many idle connections as workers: they are timed out and /health still answers
+        idle = [socket.create_connection(server.server_address) for _ in range(2)]
+        start = time.perf_counter()
+        status, _ = call('GET', '/health')
+        assert status == 200
+        print(f"/health answered in {time.perf_counter() - start:.2f}s with every worker held by an idle connection")
+        for connection in idle:
+            connection.close()
+
+        # A write that has started is waited for, even past the write timeout
+        server.service.write_timeout = 0.1
+        assert server.service.write(lambda: time.sleep(0.3) or "done") == "done"
+        server.service.write_timeout = WRITE_TIMEOUT
+
+        # Ten terminals try to rent the same five available bicycles at once
+        available = [row[0] for row in server.service.search_system.db.searchBicyclesPage({'status': 'Available'}, page_size=5)[0]]
+        memberships = server.service.rental_system.db_operations.memberships
+        members = [record.member_id for record in memberships.records() if memberships.is_active(record.member_id)]
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(10) as pool:
+            results = list(pool.map(lambda i: call('POST', '/rent', {'member_id': members[i % len(members)],
+                                                                     'bicycle_id': available[i % len(available)],
+                                                                     'rental_days': 3}), range(10)))
+        rented = [body['rental']['bicycle_id'] for status, body in results if status == 200]
+        print(f"{len(results)} concurrent rents in {time.perf_counter() - start:.3f}s: statuses "
+              f"{sorted(status for status, _ in results)}")
+        assert rented and len(rented) == len(set(rented)), "Every bicycle must be rented at most once"
+        # A bicycle of the fleet's overdue rentals, not one rented just now
+        overdue = next(row[0] for row in server.service.search_system.db.searchBicyclesPage({'status': 'Rented'}, page_size=20)[0]
+                       if row[0] not in rented)
+        print(call('POST', '/return', {'bicycle_id': overdue}))
+        print(call('GET', '/recommendations?kind=good&top_n=3')[1]['recommendations'][:1])
+    finally:
+        server.shutdown()
+        server.server_close()
+        os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to keep a prepared DataFrame on disk between runs of the application.
+    Rebuilding the recommendation frame means reading every rental row from BicycleRental.db and parsing
+    its dates again. The snapshot below stores each column of the prepared frame as a .npy file, with
+    text columns dictionary-encoded (integer codes plus one list of categories), and loads them back with
+    memory mapping, so a start-up only maps the files instead of reading the database. A snapshot is
+    tied to the database fingerprint it was made from and is only used while the fingerprint still matches.
+"""
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+
+class columnSnapshot():
+    """
+    Columnar, memory-mapped snapshot of one DataFrame, keyed by a data fingerprint.
+
+    Every saved fingerprint gets its own sub-directory (named after a hash of the fingerprint) holding
+    one .npy file per column and a meta.json describing the columns; meta.json is written last, so a
+    snapshot that was interrupted while saving is never loaded. Older snapshots are removed once a new
+    one is complete.
+
+    Column storage:
+        - numeric and boolean columns: their values.
+        - nullable (masked) integer, float and boolean columns: their values and a missing-value mask.
+        - datetime columns: int64 values, viewed back as datetime64 of the same unit.
+        - text and categorical columns: int32 codes (-1 for missing) and the categories in meta.json,
+          loaded back as pandas categoricals.
+
+    Methods:
+        - `save`: Writes a DataFrame for a fingerprint.
+        - `load`: Returns the memory-mapped DataFrame of a fingerprint, or None.
+        - `clear`: Removes every snapshot.
+    """
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): Directory holding the snapshots, created when the first one is saved.
+        """
+        self.directory = directory
+        self.loads = 0
+        self.saves = 0
+
+    @staticmethod
+    def fingerprint_key(fingerprint):
+        """Directory name of a fingerprint: a short hash of its JSON form."""
+        return hashlib.sha1(json.dumps(list(fingerprint)).encode()).hexdigest()[:16]
+
+    def save(self, frame, fingerprint):
+        """
+        Write `frame` as the snapshot of `fingerprint` and remove older snapshots.
+
+        Args:
+            frame (DataFrame): Frame to store; its index is not kept.
+            fingerprint (tuple): Fingerprint of the data the frame was prepared from.
+
+        Returns:
+            bool: True if the snapshot was written, None if an error occurs.
+        """
+        key = self.fingerprint_key(fingerprint)
+        target = os.path.join(self.directory, key)
+        try:
+            shutil.rmtree(target, ignore_errors=True)
+            os.makedirs(target)
+            columns = []
+            for position, name in enumerate(frame.columns):
+                column = frame[name]
+                file_name = f"{position}.npy"
+                if isinstance(column.dtype, pd.CategoricalDtype) or not (
+                        pd.api.types.is_numeric_dtype(column) or pd.api.types.is_datetime64_dtype(column)):
+                    categorical = pd.Categorical(column)
+                    values = categorical.codes.astype(np.int32)
+                    spec = {'kind': 'category', 'categories': categorical.categories.tolist()}
+                elif pd.api.types.is_extension_array_dtype(column) and hasattr(column.dtype, 'numpy_dtype'):
+                    # Nullable Int64/Float64/boolean: numpy values plus the mask of missing ones
+                    mask = column.isna().to_numpy()
+                    values = column.to_numpy(dtype=column.dtype.numpy_dtype, na_value=column.dtype.numpy_dtype.type(0))
+                    np.save(os.path.join(target, f"{position}.mask.npy"), mask, allow_pickle=False)
+                    spec = {'kind': 'masked', 'dtype': str(column.dtype), 'mask': f"{position}.mask.npy"}
+                elif pd.api.types.is_datetime64_dtype(column):
+                    values = column.to_numpy()
+                    spec = {'kind': 'datetime', 'dtype': str(values.dtype)}
+                    values = values.view(np.int64)
+                else:
+                    values = column.to_numpy()
+                    spec = {'kind': 'numeric'}
+                np.save(os.path.join(target, file_name), values, allow_pickle=False)
+                columns.append(dict(spec, name=name, file=file_name))
+            with open(os.path.join(target, META_FILE + ".tmp"), "w") as file:
+                json.dump({'fingerprint': list(fingerprint), 'rows': len(frame), 'columns': columns}, file)
+            os.replace(os.path.join(target, META_FILE + ".tmp"), os.path.join(target, META_FILE))
+            for entry in os.listdir(self.directory):
+                if entry != key:
+                    shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+            self.saves += 1
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Snapshot error: {e}")
+            shutil.rmtree(target, ignore_errors=True)
+            return None
+
+    def load(self, fingerprint):
+        """
+        Return the snapshot of `fingerprint` with its columns memory-mapped, or None if there is none.
+
+        Args:
+            fingerprint (tuple): Fingerprint of the current data.
+
+        Returns:
+            DataFrame: The stored frame (text columns as categoricals), None if no valid snapshot exists.
+        """
+        if fingerprint is None:
+            return None
+        target = os.path.join(self.directory, self.fingerprint_key(fingerprint))
+        try:
+            with open(os.path.join(target, META_FILE)) as file:
+                meta = json.load(file)
+            if meta['fingerprint'] != list(fingerprint):
+                return None
+            data = {}
+            for spec in meta['columns']:
+                values = np.load(os.path.join(target, spec['file']), mmap_mode='r', allow_pickle=False)
+                if spec['kind'] == 'category':
+                    data[spec['name']] = pd.Categorical.from_codes(values, categories=spec['categories'])
+                elif spec['kind'] == 'masked':
+                    mask = np.load(os.path.join(target, spec['mask']), mmap_mode='r', allow_pickle=False)
+                    array_type = pd.api.types.pandas_dtype(spec['dtype']).construct_array_type()
+                    data[spec['name']] = array_type(values, mask)
+                elif spec['kind'] == 'datetime':
+                    data[spec['name']] = values.view(spec['dtype'])
+                else:
+                    data[spec['name']] = values
+            self.loads += 1
+            return pd.DataFrame(data, copy=False)
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            print(f"Snapshot error: {e}")
+            return None
+
+    def clear(self):
+        """Remove every snapshot."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def test():
+    import tempfile
+    directory = os.path.join(tempfile.mkdtemp(), "test.snapshot")
+    snapshot = columnSnapshot(directory)
+    rng = np.random.default_rng(0)
+    n_rows = 10**6
+    frame = pd.DataFrame({
+        'BicycleID': rng.integers(1, 5000, n_rows),
+        'Brand': rng.choice(['Trek', 'Giant', 'Bianchi', None], n_rows),
+        'Score': rng.random(n_rows),
+        'InventoryID': pd.array(rng.integers(1, 30, n_rows), dtype='Int64'),
+        'RentalDate': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 700, n_rows), unit='D'),
+    })
+    frame.loc[::7, 'RentalDate'] = pd.NaT
+    frame.loc[::11, 'InventoryID'] = pd.NA
+    print("Saved:", snapshot.save(frame, (50, 50, n_rows, n_rows, 12)))
+    loaded = snapshot.load((50, 50, n_rows, n_rows, 12))
+    print("Other fingerprint loads nothing:", snapshot.load((50, 50, n_rows, n_rows, 13)) is None)
+    same = all(loaded[name].astype(object).equals(frame[name].astype(object)) for name in frame.columns)
+    same = same and loaded['InventoryID'].dtype == frame['InventoryID'].dtype
+    print(f"Loaded {len(loaded)} rows, values unchanged: {same}")
+    print(f"Memory: {frame.memory_usage(deep=True).sum() / 2**20:.1f} MiB in the original frame, "
+          f"Brand column {loaded['Brand'].memory_usage(deep=True) / 2**20:.1f} MiB once dictionary-encoded")
+    snapshot.clear()
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,359 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to produce test data of any size in the same formats as the files in ./data.
+    The shipped files hold 50 bicycles, 90 inventory items and 200 rentals, which hides every scaling problem.
+    The generator below writes Inventory_data.txt, Bicycle_Info.txt and Rental_History.txt (tab-delimited,
+    with the '50/day;300/week' rental rate encoding) and members.txt (CSV) with skewed brand, type, bicycle
+    and member popularity and skewed rental durations. Rows are generated and written chunk by chunk, so the
+    memory used does not grow with the number of rows, and the same seed and end date give the same files.
+"""
+import argparse
+import datetime
+import os
+import time
+import numpy as np
+
+CHUNK_SIZE = 100000   # Rows generated and written at a time (part of the seeded output, do not change)
+HISTORY_DAYS = 3 * 365  # Days of rental history before the end date
+LOT_SIZE = 10         # Bicycles bought on the same day
+
+# Values taken from the files in ./data, most popular first where popularity is skewed
+BRANDS = ['Trek', 'Bianchi', 'Cannondale', 'Specialized', 'Giant', 'Merida', 'BMC']
+TYPES = ['Folding Bike', 'Mountain Bike', 'Hybrid', 'Electric Bike', 'Road Bike', 'BMX', 'Gravel Bike']
+FRAME_SIZES = ['Small', 'Medium', 'Large']
+RENTAL_RATES = ['30/day;250/week', '20/day;100/week', '40/day;300/week', '60/day;400/week', '50/day;300/week']
+STATUSES = ['Available', 'Rented', 'Under Maintenance']
+CONDITIONS = ['New', 'Good', 'Damaged']
+INVENTORY_VALUES = {
+    'Size': ['12 Inch', '14 Inch', '16 Inch', '20 Inch', '24 Inch', '26 Inch', '27.5 Inch', '29 Inch'],
+    'Gender': ['Unisex', 'Boys', 'Girls', 'Men', 'Women'],
+    'Speed': ['1 Speed', '6 Speed', '7 Speed', '18 Speed', '21 Speed'],
+    'Frame': ['Aluminum Frame', 'Carbon Fiber', 'High-Tensile Steel Frame', 'Steel Frame', 'Titanium'],
+    'Brake_Type': ['Caliper Brake', 'Disc Brake', 'Hydraulic Brake', 'Rim Brake', 'V Brake'],
+    'Age': ['Adults', 'Kids', 'Youth'],
+    'Suspension': ['Front Suspension', 'Full Suspension', 'No Suspension'],
+    'TireType': ['Tube', 'Tubeless'],
+}
+
+# Header line of each file
+HEADERS = {
+    'Inventory_data.txt': "InventoryID\tPrice\tImage URL\tBrand_Name\tSize\tType\tGender\tSpeed\tFrame\tBrake_Type\tAge\tSuspension\tTireType\tCustomerRating\n",
+    'Bicycle_Info.txt': "BicycleID\tBrand\tType\tFrameSize\tRentalRate\tStatus\tDateOfPurchase\tCondition\n",
+    'Rental_History.txt': "BicycleID\tMemberID\tRentalDate\tReturnDate\n",
+    'members.txt': "MemberID,RentalLimit,MembershipEndDate\n",
+}
+
+def zipf_weights(n, exponent=1.1):
+    """Popularity weights of n items, the first being the most popular."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+def log_uniform_ranks(rng, n, size):
+    """
+    Draw `size` ranks in [0, n) where rank r is drawn with probability roughly proportional to 1 / (r + 1),
+    i.e. a Zipf-like popularity, without building a weight array of n items.
+    """
+    return np.minimum(np.exp(rng.random(size) * np.log(n + 1)).astype(np.int64) - 1, n - 1)
+
+class syntheticDataGenerator():
+    """
+    Seeded generator of the ./data files and members.txt at any size.
+
+    Each file has its own random stream derived from the seed, so a file does not change when another one
+    is generated with different sizes. Popularity and durations:
+        - Brands and types follow Zipf weights; inventory items and bicycles are drawn by (Brand, Type) pair.
+        - A few bicycles and members account for most rentals (log-uniform ranks, scrambled over the IDs).
+        - More rentals at weekends, in summer and towards the end date.
+        - Durations: mostly 1 to a few days, a quarter weekly rentals, and a long tail of months.
+
+    Methods:
+        - `write_inventoryData`, `write_bicycleInfo`, `write_rentalHistory`, `write_members`: Write one file.
+        - `write_all`: Writes the three data files under `data/` and members.txt, like the repository layout.
+    """
+    def __init__(self, seed=0, end_date=None):
+        """
+        Args:
+            seed (int): Seed of the random streams.
+            end_date (date, optional): Last rental date of the history, defaults to today. Pass a fixed date
+                to get identical files on another day.
+        """
+        self.seed = seed
+        self.end_date = np.datetime64(end_date or datetime.date.today(), 'D')
+        brand_weights, type_weights = zipf_weights(len(BRANDS)), zipf_weights(len(TYPES))
+        pair_weights = np.outer(brand_weights, type_weights).ravel()
+        order = np.argsort(-pair_weights, kind='stable')
+        # (Brand, Type) pairs from the most to the least popular, and their weights
+        self.pairs = [(BRANDS[i // len(TYPES)], TYPES[i % len(TYPES)]) for i in order]
+        self.pair_weights = pair_weights[order]
+
+    def random_stream(self, name):
+        """Random generator of one file, derived from the seed and the file name."""
+        return np.random.default_rng([self.seed, sum(map(ord, name))])
+
+    def write_lines(self, path, header, chunks):
+        """Write the header and every chunk of lines to `path`; returns the number of data lines."""
+        rows = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", newline="") as file:
+            file.write(header)
+            for count, text in chunks:
+                file.write(text)
+                rows += count
+        return rows
+
+    def chunk_bounds(self, total):
+        """(start, size) of every chunk of `total` rows."""
+        for start in range(0, total, CHUNK_SIZE):
+            yield start, min(CHUNK_SIZE, total - start)
+
+    def write_inventoryData(self, path, items):
+        """
+        Write Inventory_data.txt with `items` inventory items.
+
+        The first items cover the (Brand, Type) pairs from the most popular one, so every bicycle can be
+        linked to an inventory record; the others are drawn by pair popularity. IDs are zero-padded to at
+        least three digits like '001'.
+
+        Returns:
+            int: Number of items written.
+        """
+        rng = self.random_stream('Inventory_data.txt')
+        width = max(3, len(str(items)))
+
+        def chunks():
+            for start, n in self.chunk_bounds(items):
+                ids = np.arange(start + 1, start + n + 1)
+                pair = rng.choice(len(self.pairs), n, p=self.pair_weights)
+                covered = ids <= len(self.pairs)
+                pair[covered] = ids[covered] - 1
+                price = np.clip(rng.lognormal(np.log(400), 0.6, n), 69.99, 4999.0).round(0) - 0.01
+                rating = rng.choice(5, n, p=[0.1, 0.12, 0.12, 0.24, 0.42]) + 1
+                values = [[values[i] for i in rng.integers(0, len(values), n)] for values in INVENTORY_VALUES.values()]
+                size, gender, speed, frame, brake, age, suspension, tire = values
+                text = "".join(
+                    f"{inventory_id:0{width}d}\t{cost:.2f}\thttps://example.com/bikes/{inventory_id}.jpg\t"
+                    f"{self.pairs[p][0]}\t{s}\t{self.pairs[p][1]}\t{g}\t{sp}\t{f}\t{b}\t{a}\t{su}\t{t}\t{r}\n"
+                    for inventory_id, cost, p, s, g, sp, f, b, a, su, t, r in zip(
+                        ids.tolist(), price.tolist(), pair.tolist(), size, gender, speed, frame, brake, age,
+                        suspension, tire, rating.tolist()))
+                yield n, text
+
+        return self.write_lines(path, HEADERS['Inventory_data.txt'], chunks())
+
+    def write_bicycleInfo(self, path, bikes, inventory_items=None):
+        """
+        Write Bicycle_Info.txt with `bikes` bicycles.
+
+        Bicycles are bought in lots of LOT_SIZE, so purchase dates grow with the BicycleID over the years
+        before the rental history starts.
+
+        Args:
+            path (str): File to write.
+            bikes (int): Number of bicycles.
+            inventory_items (int, optional): Number of inventory items; when it is smaller than the number
+                of (Brand, Type) pairs, bicycles only use the pairs that have an inventory record.
+
+        Returns:
+            int: Number of bicycles written.
+        """
+        rng = self.random_stream('Bicycle_Info.txt')
+        pairs = len(self.pairs) if inventory_items is None else max(1, min(inventory_items, len(self.pairs)))
+        pair_weights = self.pair_weights[:pairs] / self.pair_weights[:pairs].sum()
+        first_purchase = self.end_date - HISTORY_DAYS - 2 * 365
+        purchase_days = HISTORY_DAYS + 2 * 365 - 30
+        lots = max(1, -(-bikes // LOT_SIZE))
+
+        def chunks():
+            for start, n in self.chunk_bounds(bikes):
+                ids = np.arange(start + 1, start + n + 1)
+                pair = rng.choice(pairs, n, p=pair_weights)
+                frame_size = rng.integers(0, len(FRAME_SIZES), n)
+                rate = rng.choice(len(RENTAL_RATES), n, p=[0.28, 0.2, 0.2, 0.18, 0.14])
+                status = rng.choice(len(STATUSES), n, p=[0.7, 0.2, 0.1])
+                condition = rng.choice(len(CONDITIONS), n, p=[0.35, 0.5, 0.15])
+                purchase = (first_purchase + ((ids - 1) // LOT_SIZE) * purchase_days // lots).astype(str)
+                text = "".join(
+                    f"{bike_id}\t{self.pairs[p][0]}\t{self.pairs[p][1]}\t{FRAME_SIZES[f]}\t{RENTAL_RATES[r]}\t"
+                    f"{STATUSES[s]}\t{d}\t{CONDITIONS[c]}\n"
+                    for bike_id, p, f, r, s, d, c in zip(ids.tolist(), pair.tolist(), frame_size.tolist(),
+                                                          rate.tolist(), status.tolist(), purchase.tolist(),
+                                                          condition.tolist()))
+                yield n, text
+
+        return self.write_lines(path, HEADERS['Bicycle_Info.txt'], chunks())
+
+    def rental_days(self, days):
+        """Dates of the `days` days of history and their share of the rentals: trend, summer peak and weekends."""
+        dates = self.end_date - np.arange(days - 1, -1, -1)
+        day_of_year = (dates - dates.astype('datetime64[Y]')).astype(np.int64)
+        weekday = (dates.astype(np.int64) + 3) % 7  # 0 is Monday
+        weights = (np.linspace(0.6, 1.4, days) * (1 + 0.4 * np.sin(2 * np.pi * (day_of_year - 80) / 365))
+                   * np.where(weekday >= 5, 1.5, 1.0))
+        return dates, weights / weights.sum()
+
+    def write_rentalHistory(self, path, rentals, bikes, members, days=HISTORY_DAYS):
+        """
+        Write Rental_History.txt with `rentals` rentals, in RentalDate order.
+
+        Rentals are spread over the `days` days up to the end date; a (BicycleID, MemberID, RentalDate)
+        combination never repeats, so the file can be imported with the natural-key index of dataLoader.
+        Rentals of the last days may end after the end date, they are the active rentals.
+
+        Args:
+            path (str): File to write.
+            rentals (int): Number of rentals.
+            bikes (int): Number of bicycles, rentals use BicycleIDs 1 to `bikes`.
+            members (int): Number of members, rentals use MemberIDs 1000 to 999 + `members`.
+            days (int): Days of history.
+
+        Returns:
+            int: Number of rentals written.
+
+        Raises:
+            ValueError: If a day would need more rentals than there are (bicycle, member) combinations.
+        """
+        rng = self.random_stream('Rental_History.txt')
+        dates, weights = self.rental_days(days)
+        per_day = rng.multinomial(rentals, weights)
+        if rentals and per_day.max() > bikes * members // 2:
+            raise ValueError(f"{per_day.max()} rentals on one day is too many for {bikes} bicycles and {members} members.")
+        # Popularity ranks are scrambled over the IDs with a multiplier coprime to the number of IDs
+        bike_step = next(step for step in range(bikes // 2 + 1, 2 * bikes + 2) if np.gcd(step, bikes) == 1)
+        member_step = next(step for step in range(members // 2 + 1, 2 * members + 2) if np.gcd(step, members) == 1)
+
+        def day_rentals(count):
+            keys = np.empty(0, dtype=np.int64)
+            while len(keys) < count:
+                needed = count - len(keys)
+                bike = log_uniform_ranks(rng, bikes, needed) * bike_step % bikes
+                member = log_uniform_ranks(rng, members, needed) * member_step % members
+                keys = np.concatenate([keys, bike * members + member])
+                _, first = np.unique(keys, return_index=True)
+                keys = keys[np.sort(first)]
+            duration = np.where(rng.random(count) < 0.7, rng.geometric(0.5, count),
+                                np.where(rng.random(count) < 0.85, 7 * rng.geometric(0.6, count),
+                                         np.ceil(rng.lognormal(np.log(120), 0.8, count)).astype(np.int64)))
+            return keys // members + 1, keys % members + 1000, duration
+
+        def chunks():
+            pending, pending_rows = [], 0
+            for date, count in zip(dates, per_day.tolist()):
+                if count:
+                    bike, member, duration = day_rentals(count)
+                    rental_date = str(date)
+                    return_date = (date + duration).astype(str)
+                    pending.append("".join(f"{b}\t{m}\t{rental_date}\t{r}\n" for b, m, r in zip(
+                        bike.tolist(), member.tolist(), return_date.tolist())))
+                    pending_rows += count
+                if pending_rows >= CHUNK_SIZE:
+                    yield pending_rows, "".join(pending)
+                    pending, pending_rows = [], 0
+            if pending:
+                yield pending_rows, "".join(pending)
+
+        return self.write_lines(path, HEADERS['Rental_History.txt'], chunks())
+
+    def write_members(self, path, members):
+        """
+        Write members.txt with `members` members from MemberID 1000.
+
+        Most members may hold 3 bicycles at a time; memberships end between half a year before and two years
+        after the end date, so some of them have expired.
+
+        Returns:
+            int: Number of members written.
+        """
+        rng = self.random_stream('members.txt')
+
+        def chunks():
+            for start, n in self.chunk_bounds(members):
+                limit = rng.choice([1, 2, 3, 5], n, p=[0.05, 0.1, 0.75, 0.1])
+                end_date = (self.end_date + rng.integers(-180, 730, n)).astype(str)
+                yield n, "".join(f"{member_id},{l},{d}\n" for member_id, l, d in zip(
+                    range(1000 + start, 1000 + start + n), limit.tolist(), end_date.tolist()))
+
+        return self.write_lines(path, HEADERS['members.txt'], chunks())
+
+    def write_all(self, output_dir, bikes, rentals, inventory_items=None, members=None, days=HISTORY_DAYS):
+        """
+        Write data/Inventory_data.txt, data/Bicycle_Info.txt, data/Rental_History.txt and members.txt
+        under `output_dir`, the layout the application and dataLoader read.
+
+        Args:
+            output_dir (str): Directory to write into.
+            bikes (int): Number of bicycles.
+            rentals (int): Number of rentals.
+            inventory_items (int, optional): Number of inventory items, defaults to bikes / 10 (at least one per pair).
+            members (int, optional): Number of members, defaults to bikes / 2 (at least 100).
+            days (int): Days of rental history.
+
+        Returns:
+            dict: File path -> number of rows written.
+        """
+        inventory_items = inventory_items or max(len(self.pairs), bikes // 10)
+        members = members or max(100, bikes // 2)
+        data_dir = os.path.join(output_dir, "data")
+        paths = {name: os.path.join(data_dir, name) for name in ('Inventory_data.txt', 'Bicycle_Info.txt', 'Rental_History.txt')}
+        paths['members.txt'] = os.path.join(output_dir, "members.txt")
+        return {
+            paths['Inventory_data.txt']: self.write_inventoryData(paths['Inventory_data.txt'], inventory_items),
+            paths['Bicycle_Info.txt']: self.write_bicycleInfo(paths['Bicycle_Info.txt'], bikes, inventory_items),
+            paths['Rental_History.txt']: self.write_rentalHistory(paths['Rental_History.txt'], rentals, bikes, members, days),
+            paths['members.txt']: self.write_members(paths['members.txt'], members),
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate bicycle rental data files in the ./data formats.")
+    parser.add_argument('--out', default="synthetic", help="output directory (data/ and members.txt are created in it)")
+    parser.add_argument('--bikes', type=int, default=1000, help="number of bicycles")
+    parser.add_argument('--rentals', type=int, default=100000, help="number of rentals")
+    parser.add_argument('--inventory', type=int, default=None, help="number of inventory items (default: bikes / 10)")
+    parser.add_argument('--members', type=int, default=None, help="number of members (default: bikes / 2)")
+    parser.add_argument('--days', type=int, default=HISTORY_DAYS, help="days of rental history")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=None,
+                        help="last rental date, YYYY-MM-DD (default: today)")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    generator = syntheticDataGenerator(args.seed, args.end_date)
+    written = generator.write_all(args.out, args.bikes, args.rentals, args.inventory, args.members, args.days)
+    for path, rows in written.items():
+        print(f"{path}: {rows} rows")
+    print(f"Generated in {time.perf_counter() - start:.1f}s")
+    return written
+
+def test():
+    import filecmp
+    import tempfile
+    import tracemalloc
+    from dataLoader import bulkLoader
+
+    directory = tempfile.mkdtemp()
+    end_date = datetime.date(2025, 6, 30)
+    written = syntheticDataGenerator(seed=7, end_date=end_date).write_all(
+        os.path.join(directory, "a"), bikes=2000, rentals=50000)
+    print(written)
+
+    # Same seed and end date: same files
+    syntheticDataGenerator(seed=7, end_date=end_date).write_all(
+        os.path.join(directory, "b"), bikes=2000, rentals=50000)
+    print("Deterministic:", all(filecmp.cmp(path, path.replace(os.sep + "a" + os.sep, os.sep + "b" + os.sep), shallow=False)
+                                for path in written))
+
+    # The files load without rejected lines
+    loader = bulkLoader(os.path.join(directory, "a", "BicycleRental.db"), chunk_size=10000)
+    for report in loader.load_all(os.path.join(directory, "a", "data")):
+        print(f"{report['table']}: read {report['read']}, inserted {report['inserted']}, rejected {len(report['rejected'])}")
+
+    # Peak memory does not grow with the number of rentals
+    for rentals in (200000, 2000000):
+        tracemalloc.start()
+        syntheticDataGenerator(seed=1).write_rentalHistory(os.path.join(directory, "rentals.txt"), rentals, 5000, 2500)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{rentals} rentals: peak memory {peak / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to load the tab-delimited data files into the SQLite database at scale.
+    Instead of reading a whole file into a Python list and inserting it row by row, each file is streamed
+    in chunks, every chunk is written with `executemany` inside its own transaction, and lines that cannot
+    be parsed are collected into a structured report rather than printed and forgotten.
+    The loader reuses the table definitions and the shared connection pool from database.py.
+"""
+import sqlite3
+import datetime
+import hashlib
+import os
+from database import *
+
+DATA_DIR = "./data"
+CHUNK_SIZE = 50000  # Lines parsed and written per transaction
+
+HASH_WINDOW = 4096  # Bytes before the checkpoint offset hashed to detect a rewritten or truncated file
+
+# Source file of each table inside DATA_DIR
+SOURCE_FILES = {
+    'Inventory_Data': "Inventory_data.txt",
+    'Bicycle_Info': "Bicycle_Info.txt",
+    'Rental_History': "Rental_History.txt",
+}
+
+# Checkpoint of every file imported incrementally: how far it has been read and a hash of the bytes before that point
+IMPORT_CHECKPOINT_TABLE = '''CREATE TABLE IF NOT EXISTS Import_Checkpoints (
+    SourceFile TEXT PRIMARY KEY,       -- Absolute path of the source file
+    ByteOffset INTEGER NOT NULL,       -- Offset just after the last imported line
+    WindowHash TEXT NOT NULL,          -- SHA-256 of the HASH_WINDOW bytes before ByteOffset
+    RowsImported INTEGER NOT NULL,     -- Rows inserted from this file so far
+    UpdatedAt DATE DEFAULT CURRENT_TIMESTAMP
+)'''
+
+# Natural key of a rental, makes re-importing the same lines a no-op
+RENTAL_NATURAL_KEY_INDEX = '''CREATE UNIQUE INDEX IF NOT EXISTS idx_rental_natural_key ON Rental_History (BicycleID, MemberID, RentalDate)'''
+
+class bulkLoader(writeToSql):
+    """
+    Streams the data files into the database in chunks with a structured report per file.
+
+    Each `load_*` method returns a report dictionary:
+        - `table`: Table that was loaded.
+        - `file`: Source file path.
+        - `read`: Number of data lines read.
+        - `inserted`: Number of rows written.
+        - `rejected`: List of {'line', 'text', 'reason'} dictionaries for lines that were not written.
+
+    Methods:
+        - `parse_inventoryLine`, `parse_bicycleLine`, `parse_rentalLine`: Turn one line into a record or raise ValueError.
+        - `stream_chunks`: Reads a file lazily and yields parsed records, their line numbers and rejected lines per chunk.
+        - `load_inventoryData`, `load_bicycleInfo`, `load_rentalHistory`: Load one file into its table.
+        - `load_all`: Loads all three files in dependency order.
+        - `import_rentalHistoryIncremental`: Imports only the lines appended to Rental_History.txt since the last run.
+    """
+    def __init__(self, db_name='BicycleRental.db', chunk_size=CHUNK_SIZE):
+        """
+        Initialize the loader on the shared connection pool.
+
+        Args:
+            db_name (str): Name of the SQLite database file.
+            chunk_size (int): Number of lines written per transaction.
+        """
+        super().__init__(db_name)
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def parse_inventoryLine(fields):
+        """Parse an Inventory_data.txt line into an Inventory_Data record."""
+        if len(fields) != 14:
+            raise ValueError(f"expected 14 fields, found {len(fields)}")
+        InventoryID, Price, ImageURL, BrandName, Size, Type, Gender, Speed, Frame, BrakeType, Age, Suspension, TireType, CustomerRating = fields
+        CustomerRating = int(CustomerRating) if CustomerRating else None
+        return (int(InventoryID), float(Price), ImageURL, BrandName, Size, Type, Gender, Speed, Frame, BrakeType, Age, Suspension, TireType, CustomerRating)
+
+    @staticmethod
+    def parse_bicycleLine(fields):
+        """Parse a Bicycle_Info.txt line, splitting the '50/day;300/week' rental rate into daily and weekly rates."""
+        if len(fields) != 8:
+            raise ValueError(f"expected 8 fields, found {len(fields)}")
+        BicycleID, Brand, Type, FrameSize, RentalRate, Status, DateOfPurchase, Condition = fields
+        try:
+            daily_rate, weekly_rate = RentalRate.split(';')
+            DailyRate = int(daily_rate.replace('/day', '').strip())
+            WeeklyRate = int(weekly_rate.replace('/week', '').strip())
+        except ValueError:
+            raise ValueError(f"invalid rental rate {RentalRate!r}")
+        datetime.date.fromisoformat(DateOfPurchase)
+        return (int(BicycleID), Brand, Type, FrameSize, DailyRate, WeeklyRate, Status, DateOfPurchase, Condition)
+
+    @staticmethod
+    def parse_rentalLine(fields):
+        """Parse a Rental_History.txt line, checking the dates the same way the table CHECK constraint does."""
+        if len(fields) != 4:
+            raise ValueError(f"expected 4 fields, found {len(fields)}")
+        BicycleID, MemberID, RentalDate, ReturnDate = fields
+        datetime.date.fromisoformat(RentalDate)
+        datetime.date.fromisoformat(ReturnDate)
+        if not RentalDate < ReturnDate:
+            raise ValueError("RentalDate is not before ReturnDate")
+        return (int(BicycleID), int(MemberID), RentalDate, ReturnDate)
+
+    def stream_chunks(self, file_path, parse_line, start_offset=0, hold_partial=False):
+        """
+        Lazily read a tab-delimited file and yield it chunk by chunk, so memory use does not grow with the file.
+
+        Args:
+            file_path (str): Path of the file to read.
+            parse_line (callable): Parser turning the list of fields of one line into a record.
+            start_offset (int): Byte offset to start reading from; 0 also skips the header line.
+            hold_partial (bool): Leave a last line without a newline unread, as it may still be being
+                appended (incremental imports); otherwise it is parsed like any other line.
+
+        Yields:
+            tuple: (records, lines, rejected, end_offset) for every chunk, where lines holds the line number
+            of each record ('@<byte offset>' when resuming) and end_offset is the byte offset just after
+            the last line read in the chunk.
+        """
+        with open(file_path, "rb") as file:
+            line_number = 1
+            if start_offset:
+                file.seek(start_offset)
+                line_number = None  # Unknown when resuming, rejected lines are reported by offset
+            else:
+                next(file, None)  # Skip the header line
+            records, lines, rejected = [], [], []
+            offset = file.tell()
+            for raw in file:
+                if hold_partial and not raw.endswith(b"\n"):
+                    break  # Partial last line still being appended, picked up on the next run
+                line = line_number + 1 if line_number is not None else f"@{offset}"
+                offset += len(raw)
+                if line_number is not None:
+                    line_number += 1
+                try:
+                    text = raw.decode("utf-8").rstrip("\r\n")
+                except UnicodeDecodeError as e:
+                    rejected.append({'line': line, 'text': raw.decode("utf-8", errors="replace").rstrip("\r\n"),
+                                     'reason': f"Not valid UTF-8: {e}"})
+                    continue
+                if text.strip():
+                    try:
+                        records.append(parse_line(text.split('\t')))
+                        lines.append(line)
+                    except ValueError as e:
+                        rejected.append({'line': line, 'text': text, 'reason': str(e)})
+                if len(records) + len(rejected) >= self.chunk_size:
+                    yield records, lines, rejected, offset
+                    records, lines, rejected = [], [], []
+            if records or rejected:
+                yield records, lines, rejected, offset
+
+    def write_chunk(self, cursor, insert_sql, records, lines, rejected):
+        """
+        Write one chunk with `executemany`; if a row breaks a constraint, retry the chunk row by row
+        so that only the offending rows are rejected, reported with their line numbers from `lines`.
+
+        Returns:
+            int: Number of rows written.
+        """
+        cursor.execute('''SAVEPOINT chunk''')
+        try:
+            cursor.executemany(insert_sql, records)
+            inserted = max(cursor.rowcount, 0)  # Rows skipped by INSERT OR IGNORE are not counted
+            cursor.execute('''RELEASE chunk''')
+            return inserted
+        except sqlite3.IntegrityError:
+            cursor.execute('''ROLLBACK TO chunk''')
+            cursor.execute('''RELEASE chunk''')
+
+        inserted = 0
+        for record, line in zip(records, lines):
+            try:
+                cursor.execute(insert_sql, record)
+                inserted += max(cursor.rowcount, 0)
+            except sqlite3.IntegrityError as e:
+                rejected.append({'line': line, 'text': '\t'.join(map(str, record)), 'reason': str(e)})
+        return inserted
+
+    def load_file(self, table, file_path, create_sql, insert_sql, parse_line, transform=None):
+        """
+        Stream one file into `table`, one transaction per chunk.
+
+        Args:
+            table (str): Table being loaded.
+            file_path (str): Source file path.
+            create_sql (str): CREATE TABLE statement for the table.
+            insert_sql (str): Parameterised INSERT statement.
+            parse_line (callable): Line parser.
+            transform (callable, optional): Called with (cursor, records, lines, rejected) to finish records
+                before insert, returns the (records, lines) to write.
+
+        Returns:
+            dict: Load report, see the class docstring.
+        """
+        report = {'table': table, 'file': file_path, 'read': 0, 'inserted': 0, 'rejected': []}
+        try:
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(create_sql)
+                conn.commit()
+                for records, lines, rejected, _ in self.stream_chunks(file_path, parse_line):
+                    report['read'] += len(records) + len(rejected)
+                    if transform is not None:
+                        records, lines = transform(cursor, records, lines, rejected)
+                    cursor.execute('''BEGIN''')
+                    report['inserted'] += self.write_chunk(cursor, insert_sql, records, lines, rejected)
+                    report['rejected'].extend(rejected)
+                    conn.commit()
+            self.fleet_cache.invalidate()
+            self.write_indexes_to_db()
+        except FileNotFoundError:
+            report['rejected'].append({'line': None, 'text': None, 'reason': f"File not found: {file_path}"})
+        except sqlite3.Error as e:
+            report['rejected'].append({'line': None, 'text': None, 'reason': f"Database error: {e}"})
+        return report
+
+    def load_inventoryData(self, file_path=f"{DATA_DIR}/{SOURCE_FILES['Inventory_Data']}"):
+        """Stream Inventory_data.txt into Inventory_Data."""
+        return self.load_file('Inventory_Data', file_path, INVENTORY_DATA_TABLE, '''
+            INSERT INTO Inventory_Data (InventoryID, Price, ImageURL, BrandName, Size, Type, Gender, Speed, Frame, BrakeType, Age, Suspension, TireType, CustomerRating)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', self.parse_inventoryLine)
+
+    def load_bicycleInfo(self, file_path=f"{DATA_DIR}/{SOURCE_FILES['Bicycle_Info']}"):
+        """
+        Stream Bicycle_Info.txt into Bicycle_Info, resolving InventoryID with an in-memory hash join
+        on (Brand, Type) built once from Inventory_Data.
+        """
+        inventory_ids = {}
+
+        def link_inventory(cursor, records, lines, rejected):
+            if not inventory_ids:
+                inventory_ids.update(self.read_inventoryLookup(cursor))
+            linked, linked_lines = [], []
+            for record, line in zip(records, lines):
+                inventory_id = inventory_ids.get((record[1], record[2]))
+                if inventory_id is None:
+                    rejected.append({'line': line, 'text': '\t'.join(map(str, record)),
+                                     'reason': f"No matching Inventory record found for Brand '{record[1]}' and Type '{record[2]}'."})
+                else:
+                    linked.append(record + (inventory_id,))
+                    linked_lines.append(line)
+            return linked, linked_lines
+
+        return self.load_file('Bicycle_Info', file_path, BICYCLE_INFO_TABLE, '''
+            INSERT INTO Bicycle_Info (
+                BicycleID, Brand, Type, FrameSize, DailyRate, WeeklyRate,
+                Status, DateOfPurchase, Condition, InventoryID
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', self.parse_bicycleLine, link_inventory)
+
+    def load_rentalHistory(self, file_path=f"{DATA_DIR}/{SOURCE_FILES['Rental_History']}"):
+        """Stream Rental_History.txt into Rental_History."""
+        return self.load_file('Rental_History', file_path, RENTAL_HISTORY_TABLE, '''
+            INSERT INTO Rental_History (BicycleID, MemberID, RentalDate, ReturnDate)
+            VALUES (?, ?, ?, ?)''', self.parse_rentalLine)
+
+    def read_windowHash(self, file, offset):
+        """Hash the HASH_WINDOW bytes of an open binary file that end at `offset`."""
+        start = max(0, offset - HASH_WINDOW)
+        file.seek(start)
+        return hashlib.sha256(file.read(offset - start)).hexdigest()
+
+    def read_checkpoint(self, cursor, file_path):
+        """
+        Return the offset to resume `file_path` from, or 0 if the file is new, shorter than the
+        checkpoint or its bytes before the checkpoint have changed (the file was rewritten).
+        """
+        cursor.execute('''SELECT ByteOffset, WindowHash, RowsImported FROM Import_Checkpoints WHERE SourceFile = ?''', (file_path,))
+        checkpoint = cursor.fetchone()
+        if checkpoint is None:
+            return 0, 0
+        offset, window_hash, rows_imported = checkpoint
+        if os.path.getsize(file_path) < offset:
+            return 0, 0
+        with open(file_path, "rb") as file:
+            if self.read_windowHash(file, offset) != window_hash:
+                return 0, 0
+        return offset, rows_imported
+
+    def write_checkpoint(self, cursor, file_path, offset, rows_imported):
+        """Store the checkpoint of `file_path` on the cursor's open transaction."""
+        with open(file_path, "rb") as file:
+            window_hash = self.read_windowHash(file, offset)
+        cursor.execute('''
+            INSERT INTO Import_Checkpoints (SourceFile, ByteOffset, WindowHash, RowsImported, UpdatedAt)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (SourceFile) DO UPDATE SET
+                ByteOffset = excluded.ByteOffset, WindowHash = excluded.WindowHash,
+                RowsImported = excluded.RowsImported, UpdatedAt = excluded.UpdatedAt
+        ''', (file_path, offset, window_hash, rows_imported))
+
+    def import_rentalHistoryIncremental(self, file_path=f"{DATA_DIR}/{SOURCE_FILES['Rental_History']}"):
+        """
+        Import only the lines appended to the rental history file since the previous run.
+
+        The byte offset reached is checkpointed in Import_Checkpoints in the same transaction as each
+        chunk, so an interrupted import resumes where it stopped. A unique index on the natural key
+        (BicycleID, MemberID, RentalDate) and INSERT OR IGNORE make re-reading lines harmless, which is
+        what happens when the file was rewritten and the import restarts from the beginning.
+
+        Args:
+            file_path (str): Rental history file, appended to by the nightly feeds.
+
+        Returns:
+            dict: Load report (see the class docstring) plus `start_offset`, `end_offset` and
+            `duplicates`, the number of lines that were already in the table.
+        """
+        source = os.path.abspath(file_path)
+        report = {'table': 'Rental_History', 'file': file_path, 'read': 0, 'inserted': 0, 'rejected': [],
+                  'duplicates': 0, 'start_offset': 0, 'end_offset': 0}
+        insert_sql = '''
+            INSERT OR IGNORE INTO Rental_History (BicycleID, MemberID, RentalDate, ReturnDate)
+            VALUES (?, ?, ?, ?)'''
+        try:
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(RENTAL_HISTORY_TABLE)
+                cursor.execute(IMPORT_CHECKPOINT_TABLE)
+                cursor.execute(RENTAL_NATURAL_KEY_INDEX)
+                conn.commit()
+
+                start_offset, rows_imported = self.read_checkpoint(cursor, source)
+                report['start_offset'] = report['end_offset'] = start_offset
+                for records, lines, rejected, end_offset in self.stream_chunks(source, self.parse_rentalLine, start_offset,
+                                                                               hold_partial=True):
+                    cursor.execute('''BEGIN''')
+                    inserted = self.write_chunk(cursor, insert_sql, records, lines, rejected)
+                    rows_imported += inserted
+                    self.write_checkpoint(cursor, source, end_offset, rows_imported)
+                    conn.commit()
+
+                    report['read'] += len(records) + len(rejected)
+                    report['inserted'] += inserted
+                    report['duplicates'] += len(records) - inserted
+                    report['rejected'].extend(rejected)
+                    report['end_offset'] = end_offset
+            self.write_indexes_to_db()
+        except FileNotFoundError:
+            report['rejected'].append({'line': None, 'text': None, 'reason': f"File not found: {file_path}"})
+        except sqlite3.Error as e:
+            report['rejected'].append({'line': None, 'text': None, 'reason': f"Database error: {e}"})
+        return report
+
+    def load_all(self, data_dir=DATA_DIR):
+        """
+        Load inventory, bicycles and rental history in dependency order and create the LogTable.
+
+        Returns:
+            list: One load report per file.
+        """
+        reports = [
+            self.load_inventoryData(f"{data_dir}/{SOURCE_FILES['Inventory_Data']}"),
+            self.load_bicycleInfo(f"{data_dir}/{SOURCE_FILES['Bicycle_Info']}"),
+            self.load_rentalHistory(f"{data_dir}/{SOURCE_FILES['Rental_History']}"),
+        ]
+        self.write_logTable_to_db()
+        return reports
+
+def test():
+    """
+    Test function for debugging the bulk loader.
+    Loads the files in ./data into a scratch database and prints the load reports.
+    """
+    loader = bulkLoader('BulkLoadTest.db')
+    for report in loader.load_all():
+        print(f"{report['table']}: read {report['read']}, inserted {report['inserted']}, rejected {len(report['rejected'])}")
+        for rejected in report['rejected'][:10]:
+            print("   ", rejected)
+
+    # A last line without a newline is loaded (or rejected) by a full load, not dropped
+    import tempfile
+    directory = tempfile.mkdtemp()
+    for last_line, expected in (("7\t1001\t2023-01-01\t2023-01-05", 'inserted'), ("7\t1001\tnot a date\t", 'rejected')):
+        path = os.path.join(directory, "Rental_History.txt")
+        with open(path, "w") as file:
+            file.write("BicycleID\tMemberID\tRentalDate\tReturnDate\n5\t1000\t2023-01-01\t2023-01-03\n" + last_line)
+        report = bulkLoader(os.path.join(directory, f"{expected}.db")).load_rentalHistory(path)
+        rejected = len(report['rejected'])
+        assert report['read'] == 2 and report['inserted'] + rejected == 2 and rejected == (expected == 'rejected'), report
+        print(f"Unterminated last line {expected}: read {report['read']}, inserted {report['inserted']}, "
+              f"rejected {len(report['rejected'])}")
+
+    # A line that is not UTF-8 and a row breaking a constraint are rejected with their line numbers
+    path = os.path.join(directory, "Bicycle_Info.txt")
+    with open(path, "wb") as file:
+        file.write(b"BicycleID\tBrand\tType\tFrameSize\tRentalRate\tStatus\tDateOfPurchase\tCondition\n"
+                   b"1\tTrek\tRoad Bike\tSmall\t30/day;250/week\tAvailable\t2022-01-01\tGood\n"
+                   b"2\tTrek\tRoad Bike\tSmall\t30/day;250/week\tAvailable\t2022-01-01\tCaf\xe9\n"
+                   b"1\tTrek\tRoad Bike\tSmall\t30/day;250/week\tAvailable\t2022-01-01\tGood\n")
+    encoded = bulkLoader(os.path.join(directory, "encoding.db"))
+    encoded.load_inventoryData()
+    report = encoded.load_bicycleInfo(path)
+    assert report['inserted'] == 1 and [rejected['line'] for rejected in report['rejected']] == [3, 4], report
+    print("Rejected lines:", [(rejected['line'], rejected['reason']) for rejected in report['rejected']])
+
+    # Running the incremental import twice must not add any row the second time
+    for run in range(2):
+        report = loader.import_rentalHistoryIncremental()
+        print(f"Incremental run {run + 1}: bytes {report['start_offset']}-{report['end_offset']}, "
+              f"inserted {report['inserted']}, duplicates {report['duplicates']}, rejected {len(report['rejected'])}")
+
+if __name__ == "__main__":
+    """
+    Debugs the loader using the test function
+    """
+    test()
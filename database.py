@@ -13,10 +13,143 @@ By structuring the program with classes and modular methods, we achieve:
 - **Normalisation:** Made sure the database tables, Bicycle_Info, Rental_Histor, Inventory_Data is normalised to 3rd normal form
 
 The main components include classes for reading data files, database writing, and data retrieval.
+All database classes share one pooled connection manager per database file, so connections, prepared
+statements and PRAGMA settings are reused instead of being rebuilt on every call.
 """
 import sqlite3
 import datetime
-import membershipManager as M 
+import threading
+import queue
+import contextlib
+import time
+from membershipStore import membershipStore, MEMBERS_FILE
+from dbMetrics import METRICS, instrument_class
+
+# Connection pool settings used when a database file is opened for the first time
+POOL_SIZE = 5           # Maximum number of open connections per database file
+BUSY_TIMEOUT = 5.0      # Seconds to wait on a locked database (and on an exhausted pool)
+CACHED_STATEMENTS = 256 # Prepared statements kept per connection
+
+# Table definitions, shared by writeToSql and the bulk loaders in dataLoader.py
+BICYCLE_INFO_TABLE = '''CREATE TABLE IF NOT EXISTS "Bicycle_Info" (
+    BicycleID INTEGER PRIMARY KEY,     -- Unique identifier for bicycles
+    Brand TEXT NOT NULL,               -- Brand name (mandatory)
+    Type TEXT NOT NULL,                -- Type of bicycle (mandatory)
+    FrameSize TEXT NOT NULL,           -- Frame size (mandatory)
+    DailyRate INTEGER NOT NULL,        -- Daily rental rate as an integer
+    WeeklyRate INTEGER NOT NULL,       -- Weekly rental rate as an integer
+    Status TEXT NOT NULL,              -- Availability status (e.g., Available/Rented)
+    DateOfPurchase DATE NOT NULL,      -- Purchase date (stored as text in 'YYYY-MM-DD')
+    Condition TEXT NOT NULL,           -- Bicycle condition (e.g., New/Good/Fair)
+    InventoryID INTEGER,               -- Foreign key to Inventory_Data
+    FOREIGN KEY (InventoryID) REFERENCES Inventory_Data(InventoryID)
+)'''
+
+RENTAL_HISTORY_TABLE = '''CREATE TABLE IF NOT EXISTS "Rental_History" (
+    BicycleID INTEGER NOT NULL,                 -- References Bicycle_Info (cannot be null)
+    MemberID INTEGER  NOT NULL,                 -- Can be null (for non-members)
+    RentalDate DATE NOT NULL,                   -- Date of rental (YYYY-MM-DD format)
+    ReturnDate DATE NOT NULL,                   -- Date of return (YYYY-MM-DD format),
+
+    -- Foreign key constraints
+    FOREIGN KEY (BicycleID) REFERENCES Bicycle_Info(BicycleID)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+
+    -- Ensure rental dates are valid
+    CHECK (RentalDate < ReturnDate)
+)'''
+
+INVENTORY_DATA_TABLE = '''CREATE TABLE IF NOT EXISTS "Inventory_Data" (
+    InventoryID INTEGER PRIMARY KEY,         -- Primary Key for Inventory table
+    Price REAL NOT NULL,                     -- Purchase price of the bicycle
+    ImageURL TEXT NOT NULL,                  -- URL for the bicycle image
+    BrandName TEXT NOT NULL,                 -- Brand name of the bicycle
+    Size TEXT NOT NULL,                      -- Size (e.g., M, L, S)
+    Type TEXT NOT NULL,                      -- Type of bicycle (e.g., Mountain, Road)
+    Gender TEXT NOT NULL,                    -- Gender (e.g., Unisex, Men, Women)
+    Speed TEXT NOT NULL,                     -- Number of speeds
+    Frame TEXT NOT NULL,                     -- Frame material (e.g., Carbon, Aluminum)
+    BrakeType TEXT NOT NULL,                 -- Brake type (e.g., Disc, V-Brake)
+    Age TEXT NOT NULL,                       -- Age group (e.g., 1 for one year)
+    Suspension TEXT NOT NULL, 
+    TireType TEXT NOT NULL, 
+    CustomerRating INTEGER
+)'''
+
+LOG_TABLE = '''CREATE TABLE IF NOT EXISTS LogTable (
+    LogID INTEGER PRIMARY KEY AUTOINCREMENT,
+    BicycleID INTEGER,
+    ActionDate DATE DEFAULT CURRENT_TIMESTAMP,
+    LateFee REAL DEFAULT NULL,
+    DamageCharge REAL DEFAULT NULL,
+    DamageNote TEXT DEFAULT NULL,
+    StatusChange TEXT,
+    FOREIGN KEY (BicycleID) REFERENCES Bicycle_Info (BicycleID)
+)'''
+
+# Copy of members.txt kept in the database so a rental can validate the member inside its own transaction
+MEMBERS_TABLE = '''CREATE TABLE IF NOT EXISTS Members (
+    MemberID INTEGER PRIMARY KEY,      -- Member ID from members.txt
+    RentalLimit INTEGER NOT NULL,      -- Maximum number of active rentals
+    MembershipEndDate DATE NOT NULL    -- Membership is active before this date (YYYY-MM-DD)
+)'''
+
+# Schema version stored in PRAGMA user_version, bumped whenever the managed schema below changes
+SCHEMA_VERSION = 2
+
+# Managed secondary indexes: name -> (table, CREATE statement).
+# Each one matches the predicates of a hot lookup so none of them needs a full table scan.
+INDEXES = {
+    # get_currentRentals / write_rentTransaction: MemberID = ? AND DATE(ReturnDate) > DATE('now')
+    'idx_rental_member_returndate': ('Rental_History',
+        '''CREATE INDEX IF NOT EXISTS idx_rental_member_returndate ON Rental_History (MemberID, DATE(ReturnDate))'''),
+    # return_lateFeesCalculation / know_rentedDetails: BicycleID = ? ORDER BY RentalDate
+    'idx_rental_bicycle_rentaldate': ('Rental_History',
+        '''CREATE INDEX IF NOT EXISTS idx_rental_bicycle_rentaldate ON Rental_History (BicycleID, RentalDate)'''),
+    # searchBicycles: LOWER(Type/Brand/FrameSize) = LOWER(?)
+    'idx_bicycle_lower_type': ('Bicycle_Info',
+        '''CREATE INDEX IF NOT EXISTS idx_bicycle_lower_type ON Bicycle_Info (LOWER(Type))'''),
+    'idx_bicycle_lower_brand': ('Bicycle_Info',
+        '''CREATE INDEX IF NOT EXISTS idx_bicycle_lower_brand ON Bicycle_Info (LOWER(Brand))'''),
+    'idx_bicycle_lower_framesize': ('Bicycle_Info',
+        '''CREATE INDEX IF NOT EXISTS idx_bicycle_lower_framesize ON Bicycle_Info (LOWER(FrameSize))'''),
+    # Bicycle_Info <-> Inventory_Data joins and the (Brand, Type) lookup when loading bicycles
+    'idx_bicycle_inventory': ('Bicycle_Info',
+        '''CREATE INDEX IF NOT EXISTS idx_bicycle_inventory ON Bicycle_Info (InventoryID)'''),
+    'idx_inventory_brand_type': ('Inventory_Data',
+        '''CREATE INDEX IF NOT EXISTS idx_inventory_brand_type ON Inventory_Data (BrandName, Type)'''),
+    'idx_log_bicycle': ('LogTable',
+        '''CREATE INDEX IF NOT EXISTS idx_log_bicycle ON LogTable (BicycleID)'''),
+}
+
+# Managed aggregation views: name -> (tables read, CREATE statement).
+# They aggregate the row-per-rental history inside SQLite so only one row per bicycle or per inventory
+# item reaches Python. A WHERE on BicycleID is pushed into BikeRentalSummary's GROUP BY, so single bikes
+# are read with primary key and idx_rental_bicycle_rentaldate lookups.
+SUMMARY_VIEWS = {
+    # One row per bicycle with its score inputs. "Used" dates are ReturnDate, or RentalDate when there is
+    # no return date; BikeAge is in years, counted in whole days up to today's local date.
+    'BikeRentalSummary': (('Bicycle_Info', 'Rental_History'),
+        '''CREATE VIEW IF NOT EXISTS BikeRentalSummary AS
+            SELECT B.BicycleID, B.Brand, B.Type, B.FrameSize, B.Status, B.Condition, B.DateOfPurchase, B.InventoryID,
+                COUNT(R.BicycleID) AS Rentals,                              -- Rental_History rows of the bike
+                MIN(COALESCE(R.ReturnDate, R.RentalDate)) AS FirstUsed,     -- Least recent use
+                MAX(COALESCE(R.ReturnDate, R.RentalDate)) AS LastUsed,      -- Most recent use
+                (julianday(DATE('now', 'localtime')) - julianday(B.DateOfPurchase)) / 365 AS BikeAge
+            FROM Bicycle_Info B LEFT JOIN Rental_History R ON R.BicycleID = B.BicycleID
+            GROUP BY B.BicycleID'''),
+    # One row per (InventoryID, Brand, Type). RentalFrequency counts the BikesHistoryViews rows of the
+    # (Type, Brand) pair: one per rental plus one per bicycle that was never rented.
+    'InventoryRentalSummary': (('Bicycle_Info', 'Rental_History'),
+        '''CREATE VIEW IF NOT EXISTS InventoryRentalSummary AS
+            SELECT COALESCE(InventoryID, 0) AS InventoryID, Brand, Type,
+                COUNT(*) AS Bikes, SUM(Rentals) AS Rentals,
+                MIN(FirstUsed) AS FirstUsed, MAX(LastUsed) AS LastUsed,
+                MIN(BikeAge) AS NewestBikeAge, MAX(BikeAge) AS OldestBikeAge,
+                SUM(SUM(MAX(Rentals, 1))) OVER (PARTITION BY Type, Brand) AS RentalFrequency
+            FROM BikeRentalSummary
+            GROUP BY COALESCE(InventoryID, 0), Brand, Type'''),
+}
 
 class readFromFile():
     """
@@ -121,6 +254,463 @@ class readFromFile():
         
         return records
 
+class connectionManager():
+    """
+    Thread-aware pool of SQLite connections for one database file.
+
+    A single manager is kept per database file (see `get_manager`), so every `writeToSql`,
+    `databaseOperations` and `databaseWriteOperations` instance working on that file shares the
+    same open connections. Each connection is opened once in WAL mode with a busy timeout and a
+    prepared statement cache, then handed out and returned through `connection()`.
+
+    Methods:
+        - `get_manager`: Returns the shared manager for a database file.
+        - `configure`: Changes the pool size or busy timeout at runtime.
+        - `connection`: Context manager that checks out a connection, commits or rolls back, and returns it.
+        - `interrupt`: Aborts the statement running on the connection held by another thread.
+        - `close_all`: Closes every idle connection held by the pool.
+    """
+    _managers = {}                     # db_name -> connectionManager
+    _managers_lock = threading.Lock()
+
+    def __init__(self, db_name, pool_size=POOL_SIZE, busy_timeout=BUSY_TIMEOUT, cached_statements=CACHED_STATEMENTS):
+        """
+        Initialise an empty pool, connections are opened lazily on first use.
+
+        Args:
+            db_name (str): Path of the SQLite database file.
+            pool_size (int): Maximum number of connections open at the same time.
+            busy_timeout (float): Seconds to wait for a lock held by another connection.
+            cached_statements (int): Number of prepared statements cached on each connection.
+        """
+        self.db_name = db_name
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.opened = 0                  # Connections currently owned by the pool (idle or in use)
+        self._idle = queue.LifoQueue()   # LIFO keeps the most recently used (warm) connection in front
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Connection held by the current thread, for nested use
+        self._in_use = {}                # Thread ident -> connection it holds, for `interrupt`
+        self.schema_checked = False      # Set once the schema migration has run for this file
+        self.fleet_cache = None          # fleetCache of this file, created by fleetCache.get_cache
+        self.listeners = []              # Callbacks told about committed rents and returns, see writeToSql.add_listener
+        self.members_version = None      # (members file, store version) last copied into the Members table
+
+    @classmethod
+    def get_manager(cls, db_name, **settings):
+        """
+        Return the manager shared by all objects using `db_name`, creating it on first use.
+
+        Args:
+            db_name (str): Path of the SQLite database file.
+            **settings: Optional `pool_size`, `busy_timeout` or `cached_statements` overrides.
+
+        Returns:
+            connectionManager: The shared manager for the database file.
+        """
+        with cls._managers_lock:
+            manager = cls._managers.get(db_name)
+            if manager is None:
+                manager = cls(db_name, **settings)
+                cls._managers[db_name] = manager
+            elif settings:
+                manager.configure(**settings)
+            return manager
+
+    def configure(self, pool_size=None, busy_timeout=None, cached_statements=None):
+        """
+        Update the pool settings; the busy timeout is applied to idle connections straight away.
+
+        Args:
+            pool_size (int, optional): New maximum number of open connections.
+            busy_timeout (float, optional): New busy timeout in seconds.
+            cached_statements (int, optional): Statement cache size for connections opened from now on.
+        """
+        if pool_size is not None:
+            self.pool_size = pool_size
+        if cached_statements is not None:
+            self.cached_statements = cached_statements
+        if busy_timeout is not None:
+            self.busy_timeout = busy_timeout
+            idle = self._drain()
+            for conn in idle:
+                conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+                self._idle.put(conn)
+
+    def _open(self):
+        """Open a new connection and apply the per-connection PRAGMA settings once."""
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout,
+                               check_same_thread=False, cached_statements=self.cached_statements)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        conn.execute("PRAGMA journal_mode = WAL")    # Readers no longer block the writer
+        conn.execute("PRAGMA synchronous = NORMAL")  # Safe with WAL, avoids an fsync per commit
+        conn.set_trace_callback(METRICS.trace_statement)  # SQL timing and slow-query log, see dbMetrics.py
+        return conn
+
+    def _acquire(self):
+        """Take an idle connection, open a new one if the pool is not full, otherwise wait."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self.opened < self.pool_size
+            if can_open:
+                self.opened += 1
+        if can_open:
+            try:
+                return self._open()
+            except sqlite3.Error:
+                with self._lock:
+                    self.opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.busy_timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Connection pool exhausted for {self.db_name}")
+
+    def _release(self, conn):
+        """Return a connection to the pool, closing it if the pool has shrunk."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            shrink = self.opened > self.pool_size
+            if shrink:
+                self.opened -= 1
+        if shrink:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    def _drain(self):
+        """Remove and return every idle connection."""
+        idle = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                return idle
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Check out a pooled connection for the duration of a `with` block.
+
+        The transaction is committed when the block finishes and rolled back if it raises.
+        Nested use in the same thread gets the connection already held by that thread, so a
+        method calling another method never waits on the pool for a second connection.
+
+        Yields:
+            sqlite3.Connection: A connection to the managed database file.
+        """
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            try:
+                yield held
+            except sqlite3.Error:
+                METRICS.record_error()
+                raise
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._in_use[threading.get_ident()] = conn
+        changes = conn.total_changes
+        try:
+            yield conn
+            conn.commit()
+            METRICS.record_changes(conn.total_changes - changes)
+        except BaseException as e:
+            conn.rollback()
+            if isinstance(e, sqlite3.Error):
+                METRICS.record_error()
+            raise
+        finally:
+            METRICS.end_statement()
+            self._local.conn = None
+            self._in_use.pop(threading.get_ident(), None)
+            self._release(conn)
+
+    def interrupt(self, thread_id):
+        """
+        Abort the statement running on the connection held by thread `thread_id`, if it holds one.
+        The statement fails with sqlite3.OperationalError('interrupted') in that thread and its
+        transaction is rolled back; with no statement running the call does nothing.
+
+        Returns:
+            bool: True if the thread held a connection.
+        """
+        conn = self._in_use.get(thread_id)
+        if conn is None:
+            return False
+        conn.interrupt()
+        return True
+
+    def close_all(self):
+        """Close every idle connection; connections in use are closed when they are returned."""
+        for conn in self._drain():
+            conn.close()
+            with self._lock:
+                self.opened -= 1
+
+# One cached row of the fleet: the Bicycle_Info columns followed by the ImageURL of its inventory item
+FLEET_COLUMNS = ('BicycleID', 'Brand', 'Type', 'FrameSize', 'DailyRate', 'WeeklyRate', 'Status',
+                 'DateOfPurchase', 'Condition', 'InventoryID', 'ImageURL')
+CACHE_TTL = 60.0  # Seconds before the fleet cache is reloaded, bounds staleness from writers in other processes
+
+# Paged search (searchBicyclesPage): filter name -> Bicycle_Info column, and the columns results can be sorted on
+SEARCH_FILTERS = {'brand': 'Brand', 'type': 'Type', 'frame_size': 'FrameSize', 'status': 'Status'}
+SEARCH_SORT_KEYS = ('BicycleID', 'Brand', 'Type', 'FrameSize', 'DailyRate', 'WeeklyRate',
+                    'Status', 'DateOfPurchase', 'Condition')
+PAGE_SIZE = 25  # Default number of bicycles per search page
+
+FACET_COLUMNS = ('Brand', 'Type', 'FrameSize')  # Columns the search dropdowns are built from
+
+# SQL of the hot lookups and of the rent and return transactions, shared by the methods running it
+# and `check_queryPlans`, which checks that each one still finds its rows through an index
+CURRENT_RENTALS_SQL = '''SELECT COUNT(*) FROM Rental_History WHERE MemberID = ? AND  DATE(ReturnDate) > DATE('now')'''
+LATE_FEE_SQL = '''
+    SELECT B.DailyRate, R.RentalDate, R.ReturnDate
+    FROM Rental_History R
+    JOIN Bicycle_Info B ON R.BicycleID = B.BicycleID
+    WHERE B.BicycleID = ? AND LOWER(B.Status) = LOWER('rented')
+    ORDER BY R.RentalDate DESC
+    LIMIT 1'''
+RENTED_DETAILS_SQL = '''
+    SELECT B.Brand, B.Type, B.DailyRate, B.WeeklyRate, B.Status, R.RentalDate, R.ReturnDate
+    FROM Bicycle_Info B
+    JOIN Rental_History R ON B.BicycleID = R.BicycleID
+    WHERE R.BicycleID = ? AND R.ReturnDate > DATE('now')'''
+RENT_BICYCLE_SQL = """UPDATE Bicycle_Info SET Status = 'Rented' WHERE BicycleID = ? AND LOWER(Status) = 'available'"""
+RENTAL_RECORD_SQL = '''
+    SELECT B.BicycleID, B.Brand, B.Type, B.DailyRate, B.WeeklyRate, B.Status, R.RentalDate, R.ReturnDate
+    FROM Rental_History R
+    JOIN Bicycle_Info B ON B.BicycleID = R.BicycleID
+    WHERE R.rowid = ?'''
+OPEN_RENTAL_SQL = '''
+    SELECT R.rowid, R.ReturnDate,
+           MAX(CAST(julianday(:today) - julianday(R.ReturnDate) AS INTEGER), 0) AS OverdueDays,
+           MAX(CAST(julianday(:today) - julianday(R.ReturnDate) AS INTEGER), 0) * (B.DailyRate + 5) AS LateFee
+    FROM Rental_History R
+    JOIN Bicycle_Info B ON R.BicycleID = B.BicycleID
+    WHERE B.BicycleID = :bicycle_id AND LOWER(B.Status) = 'rented'
+    ORDER BY R.RentalDate DESC
+    LIMIT 1'''
+RETURN_BICYCLE_SQL = '''UPDATE Bicycle_Info SET Status = ?, Condition = ? WHERE BicycleID = ?'''
+CLOSE_RENTAL_SQL = '''UPDATE Rental_History SET ReturnDate = ? WHERE rowid = ? AND ReturnDate < ?'''
+
+class facetIndex():
+    """
+    Live bicycle counts for every combination of Brand, Type and FrameSize values.
+
+    Each bicycle is counted under the 8 keys obtained by replacing any of its three facet values with
+    None (meaning "any"), so a question such as "how many available Large Road Bikes" is a single
+    dictionary lookup, and renting or returning a bicycle only touches those 8 keys.
+    The index is owned and kept up to date by `fleetCache`.
+    """
+    def __init__(self):
+        self.counts = {}   # (brand or None, type or None, frame size or None) -> [total, available]
+
+    @staticmethod
+    def _keys(row):
+        """The 8 keys a fleet row is counted under."""
+        brand, type_, frame_size = (row[FLEET_COLUMNS.index(column)] for column in FACET_COLUMNS)
+        return [(b, t, f) for b in (brand, None) for t in (type_, None) for f in (frame_size, None)]
+
+    @staticmethod
+    def _available(row):
+        return str(row[FLEET_COLUMNS.index('Status')]).lower() == 'available'
+
+    def rebuild(self, rows):
+        """Count a freshly loaded fleet; values keep the order in which they first appear."""
+        self.counts = {}
+        for row in rows:
+            self.add(row)
+
+    def add(self, row, sign=1):
+        """Count (or with sign=-1 uncount) one fleet row."""
+        available = sign if self._available(row) else 0
+        for key in self._keys(row):
+            counts = self.counts.setdefault(key, [0, 0])
+            counts[0] += sign
+            counts[1] += available
+
+    def count(self, brand=None, type_=None, frame_size=None):
+        """Return (total, available) for the given facet values, None meaning any value."""
+        return tuple(self.counts.get((brand, type_, frame_size), (0, 0)))
+
+    def values(self, column):
+        """Return {value: (total, available)} for one of FACET_COLUMNS, in order of first appearance."""
+        position = FACET_COLUMNS.index(column)
+        values = {}
+        for key, (total, available) in self.counts.items():
+            if key[position] is not None and sum(part is None for part in key) == 2 and total > 0:
+                values[key[position]] = (total, available)
+        return values
+
+class fleetCache():
+    """
+    In-process cache of the fleet state, keyed by BicycleID.
+
+    One cache is kept per database file (see `get_cache`). The whole fleet is read with a single query
+    the first time it is needed, after which status probes and searches are answered from memory.
+    `databaseWriteOperations` updates the cached rows write-through after each rent or return commits,
+    and bulk writes invalidate the cache so it is reloaded on the next read.
+
+    The cache also maintains a `facetIndex` with the total and available bicycle counts for every
+    Brand/Type/FrameSize combination, adjusted on each write-through update.
+
+    Every change increments `version`, so a caller holding a result can tell whether it is stale by
+    comparing the version it read with the current one. `hits` counts lookups served from memory and
+    `misses` counts lookups that had to (re)load the fleet from the database.
+
+    Methods:
+        - `get_cache`: Returns the shared cache for a connection manager.
+        - `get`: Returns the cached row of a bicycle as a tuple in FLEET_COLUMNS order, or None.
+        - `search`: Returns the cached rows whose Type, Brand or FrameSize match a value.
+        - `facet_count`: Returns (total, available) bicycles for a Brand/Type/FrameSize combination.
+        - `facet_values`: Returns the distinct values of a facet column with their counts.
+        - `update`: Changes cached fields of a bicycle (write-through).
+        - `invalidate`: Drops the cached fleet, the next read reloads it.
+        - `stats`: Returns the hit/miss counters and the current version.
+    """
+    def __init__(self, connection_manager, ttl=CACHE_TTL):
+        """
+        Create an empty cache, the fleet is loaded lazily on first use.
+
+        Args:
+            connection_manager (connectionManager): Pool of the database file to cache.
+            ttl (float): Seconds after which the cached fleet is reloaded.
+        """
+        self.connection_manager = connection_manager
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._rows = None         # BicycleID -> list in FLEET_COLUMNS order
+        self.facets = facetIndex()
+        self._loaded_at = 0.0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def get_cache(cls, connection_manager):
+        """Return the cache shared by all objects using the manager's database file."""
+        with connection_manager._lock:
+            cache = getattr(connection_manager, 'fleet_cache', None)
+            if cache is None:
+                cache = cls(connection_manager)
+                connection_manager.fleet_cache = cache
+            return cache
+
+    def _load(self):
+        """Read the whole fleet with its image URLs in one query."""
+        with self.connection_manager.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT B.BicycleID, B.Brand, B.Type, B.FrameSize, B.DailyRate, B.WeeklyRate, B.Status,
+                       B.DateOfPurchase, B.Condition, B.InventoryID, I.ImageURL
+                FROM Bicycle_Info B
+                LEFT JOIN Inventory_Data I ON I.InventoryID = B.InventoryID
+            ''')
+            return {row[0]: list(row) for row in cursor.fetchall()}
+
+    def _fleet(self):
+        """Return the cached fleet, loading it first if it is missing or older than the TTL."""
+        with self._lock:
+            if self._rows is not None and time.monotonic() - self._loaded_at < self.ttl:
+                self.hits += 1
+                return self._rows
+            self.misses += 1
+            self._rows = self._load()
+            self.facets.rebuild(self._rows.values())
+            self._loaded_at = time.monotonic()
+            self.version += 1
+            return self._rows
+
+    def get(self, bicycle_id):
+        """
+        Return the cached row of a bicycle.
+
+        Raises:
+            sqlite3.Error: If the fleet has to be loaded and the query fails.
+        """
+        try:
+            bicycle_id = int(bicycle_id)
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            row = self._fleet().get(bicycle_id)
+            return tuple(row) if row else None
+
+    def search(self, search_value, field_column):
+        """Return the cached rows whose `field_column` equals `search_value`, ignoring case."""
+        index = FLEET_COLUMNS.index(field_column)
+        search_value = str(search_value).lower()
+        with self._lock:
+            return [tuple(row) for row in self._fleet().values() if str(row[index]).lower() == search_value]
+
+    def update(self, bicycle_id, **fields):
+        """
+        Write-through update of a cached bicycle after its change was committed.
+
+        Args:
+            bicycle_id (int): ID of the changed bicycle.
+            **fields: New column values, e.g. Status='Rented' or Condition='Damaged'.
+        """
+        with self._lock:
+            self.version += 1
+            if self._rows is None:
+                return
+            row = self._rows.get(int(bicycle_id))
+            if row is None:
+                # A bicycle the cache has never seen, reload instead of guessing the other columns
+                self._rows = None
+                return
+            self.facets.add(row, sign=-1)
+            for column, value in fields.items():
+                row[FLEET_COLUMNS.index(column)] = value
+            self.facets.add(row)
+
+    def facet_count(self, brand=None, type_=None, frame_size=None):
+        """
+        Return the number of bicycles, and of available bicycles, matching the given facet values.
+
+        Args:
+            brand (str, optional): Brand to match, any brand if None.
+            type_ (str, optional): Type to match, any type if None.
+            frame_size (str, optional): Frame size to match, any frame size if None.
+
+        Returns:
+            tuple: (total, available).
+        """
+        with self._lock:
+            self._fleet()
+            return self.facets.count(brand, type_, frame_size)
+
+    def facet_values(self, column):
+        """Return {value: (total, available)} for 'Brand', 'Type' or 'FrameSize'."""
+        with self._lock:
+            self._fleet()
+            return self.facets.values(column)
+
+    def invalidate(self):
+        """Drop the cached fleet after a bulk change, the next read reloads it."""
+        with self._lock:
+            self._rows = None
+            self.version += 1
+
+    def stats(self):
+        """Return the hit and miss counters, the hit ratio and the current version."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_ratio': self.hits / lookups if lookups else 0.0,
+                    'version': self.version,
+                    'bicycles': len(self._rows) if self._rows is not None else 0}
+
 class writeToSql():
     """
     The `writeToSql` class manages creating tables, inserting records, managing relationships, and creating 
@@ -135,9 +725,88 @@ class writeToSql():
     - Relationship between the tables have been used properly
     """
     def __init__(self, db_name = 'BicycleRental.db'):
-        """Initialize the database with the specified name or default to 'BicycleRental.db'."""
+        """
+        Initialize the database with the specified name or default to 'BicycleRental.db'.
+        All instances on the same database file share a single pooled connection manager.
+        """
         self.db_name = db_name
-        
+        self.connection_manager = connectionManager.get_manager(db_name)
+        self.fleet_cache = fleetCache.get_cache(self.connection_manager)
+        if not self.connection_manager.schema_checked:
+            self.connection_manager.schema_checked = True
+            self.migrate_schema()
+
+    def add_listener(self, callback):
+        """
+        Registers a callback that is called after a rent or return on this database file commits,
+        as callback(event, bicycle_ids) with event 'rent' or 'return'.
+        """
+        if callback not in self.connection_manager.listeners:
+            self.connection_manager.listeners.append(callback)
+
+    def notify_listeners(self, event, bicycle_ids):
+        """Tells every registered listener about committed rents or returns; a failing listener is reported and skipped."""
+        for callback in list(self.connection_manager.listeners):
+            try:
+                callback(event, bicycle_ids)
+            except Exception as e:
+                print(f"Listener error on {event}: {e}")
+
+    def migrate_schema(self):
+        """
+        Brings an existing database file up to SCHEMA_VERSION by creating the managed indexes and views.
+        The version is stored in PRAGMA user_version so the migration only does work once per file.
+
+        Returns:
+            bool: True if the schema is up to date, None if an error occurs.
+        """
+        try:
+            with self.connection_manager.connection() as conn:
+                version = conn.execute('''PRAGMA user_version''').fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return True
+
+            created, missing_tables = self.write_indexes_to_db()
+            if missing_tables:
+                # Tables are created later by the write_*_to_db methods, which add their own indexes
+                return True
+            with self.connection_manager.connection() as conn:
+                conn.execute('''ANALYZE''')
+                conn.execute(f'''PRAGMA user_version = {SCHEMA_VERSION}''')
+            print(f"Schema migrated to version {SCHEMA_VERSION}, indexes and views created: {', '.join(created) or 'none'}.")
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error during schema migration: {e}")
+            return None
+
+    def write_indexes_to_db(self):
+        """
+        Creates the managed secondary indexes (see INDEXES) on every table that already exists,
+        and the aggregation views (see SUMMARY_VIEWS) whose tables all exist.
+
+        Returns:
+            tuple: (list of index and view names created, set of tables that do not exist yet).
+        """
+        created = []
+        try:
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                tables = {row[0] for row in cursor.execute('''SELECT name FROM sqlite_master WHERE type = 'table' ''')}
+                existing = {row[0] for row in cursor.execute('''SELECT name FROM sqlite_master WHERE type IN ('index', 'view') ''')}
+                for index_name, (table, statement) in INDEXES.items():
+                    if table in tables and index_name not in existing:
+                        cursor.execute(statement)
+                        created.append(index_name)
+                for view_name, (view_tables, statement) in SUMMARY_VIEWS.items():
+                    if tables.issuperset(view_tables) and view_name not in existing:
+                        cursor.execute(statement)
+                        created.append(view_name)
+                conn.commit()
+            return created, {table for table, _ in INDEXES.values()} - tables
+        except sqlite3.Error as e:
+            print(f"Database error while creating indexes: {e}")
+            return created, set()
+
 
     def write_bicycleData_to_db(self, records):
         """
@@ -151,54 +820,57 @@ class writeToSql():
             ValueError: If a (Brand, Type) combination doesn't exist in Inventory_Data.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 # Create Bicycle_Info table if it does not exist
-                cursor.execute('''CREATE TABLE IF NOT EXISTS "Bicycle_Info" (
-                    BicycleID INTEGER PRIMARY KEY,     -- Unique identifier for bicycles
-                    Brand TEXT NOT NULL,               -- Brand name (mandatory)
-                    Type TEXT NOT NULL,                -- Type of bicycle (mandatory)
-                    FrameSize TEXT NOT NULL,           -- Frame size (mandatory)
-                    DailyRate INTEGER NOT NULL,        -- Daily rental rate as an integer
-                    WeeklyRate INTEGER NOT NULL,       -- Weekly rental rate as an integer
-                    Status TEXT NOT NULL,              -- Availability status (e.g., Available/Rented)
-                    DateOfPurchase DATE NOT NULL,      -- Purchase date (stored as text in 'YYYY-MM-DD')
-                    Condition TEXT NOT NULL,           -- Bicycle condition (e.g., New/Good/Fair)
-                    InventoryID INTEGER,               -- Foreign key to Inventory_Data
-                    FOREIGN KEY (InventoryID) REFERENCES Inventory_Data(InventoryID)
-                )''')
-
-                # Insert each record if matching InventoryID is found
+                cursor.execute(BICYCLE_INFO_TABLE)
+
+                # Resolve every InventoryID from one in-memory (Brand, Type) lookup instead of a query per record
+                inventory_ids = self.read_inventoryLookup(cursor)
+                rows = []
                 for record in records:
                     bicycle_id, brand, type_, frame_size, daily_rate, weekly_rate, status, date_of_purchase, condition = record
-                    cursor.execute('''
-                        SELECT InventoryID FROM Inventory_Data
-                        WHERE BrandName = ? AND Type = ?
-                    ''', (brand, type_))
-
-                    inventory_id = cursor.fetchone()
+                    inventory_id = inventory_ids.get((brand, type_))
 
                     if inventory_id is None:
                         raise ValueError(f"No matching Inventory record found for Brand '{brand}' and Type '{type_}'.")
 
-                    inventory_id = inventory_id[0]
-                    cursor.execute('''
-                        INSERT INTO Bicycle_Info (
-                            BicycleID, Brand, Type, FrameSize, DailyRate, WeeklyRate,
-                            Status, DateOfPurchase, Condition, InventoryID
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (bicycle_id, brand, type_, frame_size, daily_rate, weekly_rate,
-                          status, date_of_purchase, condition, inventory_id))
+                    rows.append((bicycle_id, brand, type_, frame_size, daily_rate, weekly_rate,
+                                 status, date_of_purchase, condition, inventory_id))
+
+                cursor.executemany('''
+                    INSERT INTO Bicycle_Info (
+                        BicycleID, Brand, Type, FrameSize, DailyRate, WeeklyRate,
+                        Status, DateOfPurchase, Condition, InventoryID
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
 
                 conn.commit()
                 print("Records inserted successfully into Bicycle_Info.")
+            self.fleet_cache.invalidate()
+            self.write_indexes_to_db()
 
         except ValueError as ve:
             print(f"Error: {ve}")
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-        finally:
-            conn.close()
+
+    def read_inventoryLookup(self, cursor):
+        """
+        Builds the (Brand, Type) -> InventoryID lookup used to link bicycles to Inventory_Data.
+        The lowest InventoryID wins when several inventory items share a brand and type.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the connection doing the insert.
+
+        Returns:
+            dict: (BrandName, Type) -> InventoryID.
+        """
+        cursor.execute('''
+            SELECT BrandName, Type, MIN(InventoryID) FROM Inventory_Data
+            GROUP BY BrandName, Type
+        ''')
+        return {(brand, type_): inventory_id for brand, type_, inventory_id in cursor.fetchall()}
 
     def write_rentalData_to_db(self, records):
         """
@@ -208,34 +880,21 @@ class writeToSql():
             records (list of tuples): List of rental records to insert.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
 
-                cursor.execute('''CREATE TABLE IF NOT EXISTS "Rental_History" (
-                BicycleID INTEGER NOT NULL,                 -- References Bicycle_Info (cannot be null)
-                MemberID INTEGER  NOT NULL,                 -- Can be null (for non-members)
-                RentalDate DATE NOT NULL,                   -- Date of rental (YYYY-MM-DD format)
-                ReturnDate DATE NOT NULL,                   -- Date of return (YYYY-MM-DD format),
-
-                -- Foreign key constraints
-                FOREIGN KEY (BicycleID) REFERENCES Bicycle_Info(BicycleID)
-                ON DELETE CASCADE ON UPDATE CASCADE,
-
-                -- Ensure rental dates are valid
-                CHECK (RentalDate < ReturnDate)
-                )''')
+                cursor.execute(RENTAL_HISTORY_TABLE)
 
                 cursor.executemany('''
                     INSERT INTO Rental_History (BicycleID, MemberID, RentalDate, ReturnDate)
                     VALUES (?, ?, ?, ?)''', records)
+                conn.commit()
 
-            conn.commit()
             print("Records inserted successfully into normalized tables.")
+            self.write_indexes_to_db()
 
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-        finally:
-            conn.close()
 
     def write_InventoryData_to_db(self, records):
         """
@@ -245,61 +904,67 @@ class writeToSql():
             records (list of tuples): List of inventory records to insert.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''CREATE TABLE IF NOT EXISTS "Inventory_Data" (
-                    InventoryID INTEGER PRIMARY KEY,         -- Primary Key for Inventory table
-                    Price REAL NOT NULL,                     -- Purchase price of the bicycle
-                    ImageURL TEXT NOT NULL,                  -- URL for the bicycle image
-                    BrandName TEXT NOT NULL,                 -- Brand name of the bicycle
-                    Size TEXT NOT NULL,                      -- Size (e.g., M, L, S)
-                    Type TEXT NOT NULL,                      -- Type of bicycle (e.g., Mountain, Road)
-                    Gender TEXT NOT NULL,                    -- Gender (e.g., Unisex, Men, Women)
-                    Speed TEXT NOT NULL,                     -- Number of speeds
-                    Frame TEXT NOT NULL,                     -- Frame material (e.g., Carbon, Aluminum)
-                    BrakeType TEXT NOT NULL,                 -- Brake type (e.g., Disc, V-Brake)
-                    Age TEXT NOT NULL,                       -- Age group (e.g., 1 for one year)
-                    Suspension TEXT NOT NULL, 
-                    TireType TEXT NOT NULL, 
-                    CustomerRating INTEGER
-                )''')
+                cursor.execute(INVENTORY_DATA_TABLE)
 
                 cursor.executemany('''
                     INSERT INTO Inventory_Data (InventoryID, Price, ImageURL, BrandName, Size, Type, Gender, Speed, Frame, BrakeType, Age, Suspension, TireType, CustomerRating)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', records)
+                conn.commit()
 
-            conn.commit()
             print("Records inserted successfully into Inventory_Data.")
+            self.fleet_cache.invalidate()
+            self.write_indexes_to_db()
 
         except sqlite3.Error as e:
             print(f"Database error: {e}")
 
+    def write_membersTable(self, store):
+        """
+        Copies the membership store into the Members table, only when the store was reloaded since
+        the last copy into this database file.
+
+        Parameters:
+        - store (membershipStore): The membership store to copy.
+
+        Returns:
+        - True if the table is up to date, None if an error occurs.
+        """
+        version = (store.file_name, store.version)
+        if self.connection_manager.members_version == version:
+            return True
+        try:
+            records = store.records()
+            version = (store.file_name, store.version)
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(MEMBERS_TABLE)
+                cursor.execute('''DELETE FROM Members''')
+                cursor.executemany('''INSERT INTO Members (MemberID, RentalLimit, MembershipEndDate) VALUES (?, ?, ?)''',
+                                   [(r.member_id, r.rental_limit, r.end_date.isoformat()) for r in records])
+                conn.commit()
+            self.connection_manager.members_version = version
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+
     def write_logTable_to_db(self):
         """
         Creates a LogTable for recording late fees, damage charges, and repairs, if it doesn't exist.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS LogTable (
-                    LogID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    BicycleID INTEGER,
-                    ActionDate DATE DEFAULT CURRENT_TIMESTAMP,
-                    LateFee REAL DEFAULT NULL,
-                    DamageCharge REAL DEFAULT NULL,
-                    DamageNote TEXT DEFAULT NULL,
-                    StatusChange TEXT,
-                    FOREIGN KEY (BicycleID) REFERENCES Bicycle_Info (BicycleID)
-                )''')
+                cursor.execute(LOG_TABLE)
+                conn.commit()
                 
-            conn.commit()
             print("Table created successfully.")
+            self.write_indexes_to_db()
 
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-        finally:
-            conn.close()
 
     def droptable(self, table_name):
         """
@@ -312,16 +977,15 @@ class writeToSql():
             bool: True if successful, None if an error occurs.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(f'''DROP TABLE IF EXISTS {table_name}''')
                 conn.commit()
-                return True
+            self.fleet_cache.invalidate()
+            return True
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-                conn.close()
 
     def dropviewtable(self, view_name):
         """
@@ -334,7 +998,7 @@ class writeToSql():
             bool: True if successful, None if an error occurs.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(f"DROP VIEW IF EXISTS {view_name}")
                 conn.commit()
@@ -343,8 +1007,6 @@ class writeToSql():
         except sqlite3.Error as e:
             print(f"Database error while dropping view '{view_name}': {e}")
             return None
-        finally:
-                conn.close()
                 
     def createViewTable(self):
         """
@@ -355,7 +1017,7 @@ class writeToSql():
             bool: True if successful, None if an error occurs.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''CREATE VIEW BikesHistoryViews AS
                     SELECT 
@@ -372,8 +1034,6 @@ class writeToSql():
         except sqlite3.Error as e:
             print(f"Database error while creating view: {e}")
             return None
-        finally:
-                conn.close()
     
 class databaseOperations(writeToSql):
     """
@@ -394,20 +1054,26 @@ class databaseOperations(writeToSql):
     the main application to interact with the database in a streamlined manner.
     """
     def __init__(self, db_name='BicycleRental.db'):
-        """Initialize with database name and load membership data."""
+        """Initialize with database name and the process-wide membership store."""
         super().__init__(db_name)
-        self.memberships = M.load_memberships("members.txt")  
+        self.memberships = membershipStore.get_store(MEMBERS_FILE)
 
-    def validate_member(self, member_id):
-        """Validate membership status and rental limit for a given member ID."""
-        member_id = str(member_id)
+    def validate_member(self, member_id, check_limit=True):
+        """
+        Validate membership status and rental limit for a given member ID.
+        With check_limit=False only the membership itself is validated, leaving the rental
+        limit to be checked inside the rental transaction (see `write_rentTransaction`).
+        """
         if member_id not in self.memberships:
             return False, "Invalid Member ID."
         
-        if not M.check_membership(member_id, self.memberships):
+        if not self.memberships.is_active(member_id):
             return False, "Inactive membership."
+
+        if not check_limit:
+            return True, "Membership is valid."
         
-        rental_limit = int(M.get_rental_limit(member_id, self.memberships))
+        rental_limit = self.get_rentalLimit(member_id)
         current_rentals = self.get_currentRentals(member_id)
         
         if current_rentals >= rental_limit:
@@ -415,10 +1081,14 @@ class databaseOperations(writeToSql):
 
         return True, "Membership is valid."
 
+    def get_rentalLimit(self, member_id):
+        """Return the maximum number of active rentals allowed for a member ID."""
+        return self.memberships.get_rental_limit(member_id)
+
     def read_BicycleInfoTable(self):
         """Retrieve all records from the Bicycle_Info table."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''SELECT * FROM Bicycle_Info''')
                 results = cursor.fetchall() 
@@ -427,13 +1097,11 @@ class databaseOperations(writeToSql):
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     def read_RentalHistoryTable(self):
         """Retrieve all records from the Rental_History table."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''SELECT * FROM Rental_History''')
                 results = cursor.fetchall()  
@@ -442,13 +1110,11 @@ class databaseOperations(writeToSql):
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     def read_InventoryDataTable(self):
         """Retrieve all records from the Inventory_Data table."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''SELECT * FROM Inventory_Data''')
                 results = cursor.fetchall()  
@@ -457,13 +1123,11 @@ class databaseOperations(writeToSql):
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     def read_BikeRecommendatonView(self):
         """Retrieve data from BikesHistoryViews."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''SELECT * FROM BikesHistoryViews''')
                 results = cursor.fetchall()  
@@ -472,8 +1136,6 @@ class databaseOperations(writeToSql):
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
         
 
     def searchBicycles(self, search_value, search_field):
@@ -485,7 +1147,7 @@ class databaseOperations(writeToSql):
             search_field (str): Field to search in (e.g., 'Type', 'FrameSize', 'Brand').
         
         Returns:
-            list: Matched bicycle records, with Image URLs if available.
+            list: Matched bicycle records, with Image URLs if available, served from the fleet cache.
         """
         valid_fields = {'type': 'Type', 'frame_size': 'FrameSize', 'brand': 'Brand'}
         field_column = valid_fields.get(search_field.lower())
@@ -494,114 +1156,166 @@ class databaseOperations(writeToSql):
             return []
 
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                query = f'''SELECT * FROM Bicycle_Info WHERE LOWER({field_column}) = LOWER(?)'''
-                cursor.execute(query, (search_value,))
-                results = cursor.fetchall()
-                image_data = self.get_Images()
-                image_dict = {image[0]: image[1] for image in image_data}
-                merged_results = []
-
-                for row in results:
-                    inventory_id = row[-1]
-                    image_url = image_dict.get(inventory_id, None)
-
-                    merged_results.append(row + (image_url,))
-                    
-                return merged_results  
-                if merged_results:
-                    return merged_results
-                else:
-                    return []
+            return self.fleet_cache.search(search_value, field_column)
 
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return []
-        finally:
-            conn.close()
 
-    def get_uniquevalues(self):
-        """Retrieve distinct values for Type, Brand, and FrameSize from Bicycle_Info."""
+    def get_facetCounts(self, brand=None, type_=None, frame_size=None):
+        """
+        Return how many bicycles, and how many available bicycles, match a Brand/Type/FrameSize
+        combination (None meaning any value), e.g. get_facetCounts(type_='Road Bike', frame_size='Large').
+
+        Returns:
+            tuple: (total, available), None if an error occurs.
+        """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            return self.fleet_cache.facet_count(brand, type_, frame_size)
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+
+    def build_searchQuery(self, filters=None, sort_by='BicycleID', descending=False, page_size=PAGE_SIZE, offset=0, after=None):
+        """
+        Build the single Bicycle_Info LEFT JOIN Inventory_Data query behind `searchBicyclesPage`.
+
+        Returns:
+            tuple: (sql, params).
+
+        Raises:
+            ValueError: If a filter or the sort key is not supported.
+        """
+        if sort_by not in SEARCH_SORT_KEYS:
+            raise ValueError(f"Invalid sort key: {sort_by}. Valid options are: {', '.join(SEARCH_SORT_KEYS)}")
+
+        conditions, params = [], []
+        for name, value in (filters or {}).items():
+            column = SEARCH_FILTERS.get(name.lower())
+            if not column:
+                raise ValueError(f"Invalid search field: {name}. Valid options are: {', '.join(SEARCH_FILTERS)}")
+            if value is None or value == '':
+                continue
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(f"LOWER(B.{column}) IN ({', '.join('LOWER(?)' for _ in value)})")
+                params.extend(value)
+            else:
+                conditions.append(f"LOWER(B.{column}) = LOWER(?)")
+                params.append(value)
+
+        # Keyset pagination: continue strictly after the (sort value, BicycleID) of the previous page's last row
+        order = 'DESC' if descending else 'ASC'
+        if after is not None:
+            if sort_by == 'BicycleID':
+                conditions.append(f"B.BicycleID {'<' if descending else '>'} ?")
+                params.append(after[-1])
+            else:
+                conditions.append(f"(B.{sort_by}, B.BicycleID) {'<' if descending else '>'} (?, ?)")
+                params.extend(after)
+            offset = 0
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        order_by = f"B.{sort_by} {order}" if sort_by == 'BicycleID' else f"B.{sort_by} {order}, B.BicycleID {order}"
+        sql = f'''
+            SELECT B.BicycleID, B.Brand, B.Type, B.FrameSize, B.DailyRate, B.WeeklyRate, B.Status,
+                   B.DateOfPurchase, B.Condition, B.InventoryID, I.ImageURL
+            FROM Bicycle_Info B
+            LEFT JOIN Inventory_Data I ON I.InventoryID = B.InventoryID
+            {where}
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?'''
+        # One extra row tells whether there is a next page; no page size means every row (LIMIT -1)
+        params.extend([page_size + 1 if page_size is not None else -1, offset])
+        return sql, params
+
+    def searchBicyclesPage(self, filters=None, sort_by='BicycleID', descending=False, page_size=PAGE_SIZE, offset=0, after=None):
+        """
+        Search bicycles on any combination of filters and return one page of results with image URLs,
+        using a single joined query instead of joining the images of the whole fleet in Python.
+
+        Parameters:
+            filters (dict, optional): Filter name ('brand', 'type', 'frame_size', 'status') -> value,
+                or a list of values; matched ignoring case and combined with AND.
+            sort_by (str): Column to sort on, one of SEARCH_SORT_KEYS; ties are ordered by BicycleID.
+            descending (bool): Sort in descending order.
+            page_size (int): Maximum number of rows returned, None for every matching row in one query.
+            offset (int): Rows to skip (LIMIT/OFFSET pagination), ignored when `after` is given.
+            after (tuple, optional): `next_key` of the previous page (keyset pagination).
+
+        Returns:
+            tuple: (rows, next_key), rows in the column order of `searchBicycles` and next_key to pass
+            as `after` for the following page, or None on the last page. ([], None) on error.
+        """
+        try:
+            sql, params = self.build_searchQuery(filters, sort_by, descending, page_size, offset, after)
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''SELECT DISTINCT Type FROM Bicycle_Info''')
-                results_type = [row[0] for row in cursor.fetchall()]  # Return as a list of values
-                cursor.execute('''SELECT DISTINCT Brand FROM Bicycle_Info''')
-                results_brand = [row[0] for row in cursor.fetchall()]   
-                cursor.execute('''SELECT DISTINCT FrameSize FROM Bicycle_Info''')
-                results_framesize = [row[0] for row in cursor.fetchall()]  
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            if page_size is None or len(rows) <= page_size:
+                return rows, None
+            rows = rows[:page_size]
+            last = rows[-1]
+            return rows, (last[FLEET_COLUMNS.index(sort_by)], last[0])
+        except ValueError as e:
+            print(e)
+            return [], None
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return [], None
+
+    def get_uniquevalues(self):
+        """Retrieve distinct values for Type, Brand, and FrameSize from the facet counts of the fleet cache."""
+        try:
+            results_type = list(self.fleet_cache.facet_values('Type'))  # Return as a list of values
+            results_brand = list(self.fleet_cache.facet_values('Brand'))
+            results_framesize = list(self.fleet_cache.facet_values('FrameSize'))
             return results_type, results_brand, results_framesize
                 
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
         
     def know_rentalStatus(self, bicycle_id):
-        """Check if a bicycle is available for rent by Bicycle ID."""
+        """Check if a bicycle is available for rent by Bicycle ID, answered from the fleet cache."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''SELECT Status FROM Bicycle_Info WHERE BicycleID = ?''', (bicycle_id,))
-                results = cursor.fetchone()  
-                if not results:
-                    return False, f"Invalid Bicycle ID: {bicycle_id}"
-                elif results[0].lower() != "available":
-                    return False, f"{bicycle_id} not avaliable"
+            bicycle = self.fleet_cache.get(bicycle_id)
+            if not bicycle:
+                return False, f"Invalid Bicycle ID: {bicycle_id}"
+            elif bicycle[FLEET_COLUMNS.index('Status')].lower() != "available":
+                return False, f"{bicycle_id} not avaliable"
             return True, f"bicycle is available for Bicycle ID: {bicycle_id}"
                 
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     def verify_bicycleIDRentalStatus(self, bicycle_id):
-        """Verify bicycle ID and rental status; returns confirmation if rented."""
+        """Verify bicycle ID and rental status from the fleet cache; returns confirmation if rented."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT BicycleID, Status 
-                    FROM Bicycle_Info 
-                    WHERE BicycleID = ?
-                ''', (bicycle_id,))
-                result = cursor.fetchone()
-
-                if result is None:
-                    return False, f"Bicycle ID - {bicycle_id} not found."
-                
-                _, status = result
-                if status.lower() == 'rented':
-                    return True, f"Bicycle ID - {bicycle_id} and rental status verified."
-                else:
-                    return False, f"Bicycle ID - {bicycle_id} found, but rental status is not 'rented'."
+            bicycle = self.fleet_cache.get(bicycle_id)
+            if bicycle is None:
+                return False, f"Bicycle ID - {bicycle_id} not found."
+
+            status = bicycle[FLEET_COLUMNS.index('Status')]
+            if status.lower() == 'rented':
+                return True, f"Bicycle ID - {bicycle_id} and rental status verified."
+            else:
+                return False, f"Bicycle ID - {bicycle_id} found, but rental status is not 'rented'."
                 
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     
     def return_lateFeesCalculation(self, bicycle_id):
         """Calculates late fees if applicable and handles future return dates."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 
                 # Get the most recent rental record for the specified bicycle
-                cursor.execute('''
-                    SELECT B.DailyRate, R.RentalDate, R.ReturnDate 
-                    FROM Rental_History R 
-                    JOIN Bicycle_Info B ON R.BicycleID = B.BicycleID
-                    WHERE B.BicycleID = ? AND LOWER(B.Status) = LOWER('rented')
-                    ORDER BY R.RentalDate DESC
-                    LIMIT 1
-                ''', (bicycle_id,))
+                cursor.execute(LATE_FEE_SQL, (bicycle_id,))
                 
                 result = cursor.fetchone()
                 
@@ -627,20 +1341,13 @@ class databaseOperations(writeToSql):
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     def know_rentedDetails(self, bicycle_id):
         """Retrieve rental details for a given bicycle ID if still rented."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT B.Brand, B.Type, B.DailyRate, B.WeeklyRate, B.Status, R.RentalDate, R.ReturnDate
-                    FROM Bicycle_Info B 
-                    JOIN Rental_History R ON B.BicycleID = R.BicycleID
-                    WHERE R.BicycleID = ? AND R.ReturnDate > DATE('now')
-                ''', (bicycle_id,))
+                cursor.execute(RENTED_DETAILS_SQL, (bicycle_id,))
                 results = cursor.fetchone()  
 
                 if results:
@@ -661,15 +1368,13 @@ class databaseOperations(writeToSql):
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     def get_currentRentals(self,member_id):
         """Check how many active rentals with the given member ID to validate rental limit"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''SELECT COUNT(*) FROM Rental_History WHERE MemberID = ? AND  DATE(ReturnDate) > DATE('now')''', (member_id,))
+                cursor.execute(CURRENT_RENTALS_SQL, (member_id,))
                 results = cursor.fetchone()[0]  
 
                 if results>=0:
@@ -680,13 +1385,11 @@ class databaseOperations(writeToSql):
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     def get_Images(self):
         """Retrive the images based on inventory id, for display"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''SELECT id.InventoryID,id.ImageURl
                                 FROM Inventory_Data id JOIN Bicycle_Info bi
@@ -697,12 +1400,75 @@ class databaseOperations(writeToSql):
                     return results
                 else:
                     return []
-                
+
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+
+    def read_dataFingerprint(self):
+        """
+        Cheap fingerprint of the data the recommendations are computed from: row count and highest rowid
+        of Bicycle_Info and Rental_History and the highest LogID of LogTable. Rentals add a Rental_History
+        row and returns add a LogTable row, so any rent, return or load changes the fingerprint.
+
+        Returns:
+            tuple: The fingerprint values (None for a missing table), None if an error occurs.
+        """
+        parts = {
+            'Bicycle_Info': '''SELECT COUNT(*), MAX(rowid) FROM Bicycle_Info''',
+            'Rental_History': '''SELECT COUNT(*), MAX(rowid) FROM Rental_History''',
+            'LogTable': '''SELECT MAX(LogID) FROM LogTable''',
+        }
+        try:
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''SELECT name FROM sqlite_master WHERE type = 'table' ''')
+                tables = {row[0] for row in cursor.fetchall()}
+                fingerprint = ()
+                for table, query in parts.items():
+                    fingerprint += cursor.execute(query).fetchone() if table in tables else (None,)
+                return fingerprint
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+
+    def check_queryPlans(self):
+        """
+        Runs EXPLAIN QUERY PLAN on the hot lookups and on the statements of the rent and return
+        transactions, using the same SQL as the methods, and flags any that scans a whole table.
+        Used as a regression check that the managed indexes (see INDEXES) are still picked up.
+
+        Returns:
+            dict: Query name -> (True if no scan, list of plan lines), or None if an error occurs.
+        """
+        today = datetime.date.today().isoformat()
+        hot_queries = {
+            'get_currentRentals': (CURRENT_RENTALS_SQL, (1015,)),
+            'return_lateFeesCalculation': (LATE_FEE_SQL, (1,)),
+            'know_rentedDetails': (RENTED_DETAILS_SQL, (1,)),
+            'searchBicyclesPage': self.build_searchQuery({'brand': 'Giant', 'type': 'BMX', 'status': 'Available'},
+                                                         'DailyRate', after=(10, 1)),
+            'write_rentTransaction_update': (RENT_BICYCLE_SQL, (1,)),
+            'write_rentTransaction_read': (RENTAL_RECORD_SQL, (1,)),
+            'write_returnTransaction_rental': (OPEN_RENTAL_SQL, {"today": today, "bicycle_id": 1}),
+            'write_returnTransaction_update': (RETURN_BICYCLE_SQL, ('Available', 'Good', 1)),
+            'write_returnTransaction_close': (CLOSE_RENTAL_SQL, (today, 1, today)),
+        }
+        try:
+            plans = {}
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                for name, (query, params) in hot_queries.items():
+                    cursor.execute(f'''EXPLAIN QUERY PLAN {query}''', params)
+                    details = [row[-1] for row in cursor.fetchall()]
+                    # Every table of these statements is filtered, so any "SCAN" reads all of it; a
+                    # "SCAN ... USING (COVERING) INDEX" is a full index scan and is flagged too
+                    full_scan = any(line.startswith('SCAN') for line in details)
+                    plans[name] = (not full_scan, details)
+            return plans
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
 class databaseWriteOperations(writeToSql):
     """
@@ -719,13 +1485,13 @@ class databaseWriteOperations(writeToSql):
     """
     def __init__(self, db_name='BicycleRental.db'):
         """
-        Initializes the database connection and loads membership data.
+        Initializes the database connection and the process-wide membership store.
         
         Parameters:
         - db_name (str): The name of the SQLite database file. Defaults to 'BicycleRental.db'.
         """
         super().__init__(db_name)
-        self.memberships = M.load_memberships("members.txt")  # Load memberships data
+        self.memberships = membershipStore.get_store(MEMBERS_FILE)  # Shared, reloaded when members.txt changes
 
     def write_rentingBicycle(self, member_id, bicycle_id, rental_days = 1):
         """
@@ -742,7 +1508,7 @@ class databaseWriteOperations(writeToSql):
         try:
             rental_date = datetime.date.today()
             return_date = rental_date + datetime.timedelta(days=rental_days)
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''UPDATE Bicycle_Info SET Status = "Rented" WHERE BicycleID = ?''', (bicycle_id,))
                 cursor.execute('''
@@ -750,13 +1516,96 @@ class databaseWriteOperations(writeToSql):
                     VALUES (?, ?, ?, ?)
                     ''', (bicycle_id, member_id, rental_date, return_date))
                 conn.commit()
-                return True
+            self.fleet_cache.update(bicycle_id, Status="Rented")
+            self.notify_listeners('rent', [bicycle_id])
+            return True
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
-       
+
+    def write_rentTransaction(self, member_id, bicycle_id, rental_days=1, rental_limit=None, check_member=False):
+        """
+        Rents a bicycle in one BEGIN IMMEDIATE transaction: checks the member's rental limit, flips the
+        bicycle from "Available" to "Rented", records the rental and reads the rental details back.
+        With check_member=True the membership and its rental limit are read from the Members table
+        in the same transaction, so `validate_member` does not need to be called beforehand.
+
+        The write lock is taken before anything is read, so two clerks renting the same bicycle are
+        serialised and the second one sees it as no longer available instead of double-renting it.
+
+        Parameters:
+        - member_id (int): ID of the member renting the bicycle.
+        - bicycle_id (int): ID of the bicycle being rented.
+        - rental_days (int): Number of days for the rental. Defaults to 1 day.
+        - rental_limit (int, optional): Maximum active rentals for the member, skipped if None.
+        - check_member (bool): Validate the member and take the rental limit from the Members table.
+
+        Returns:
+        - (True, dict) with the same keys as `know_rentedDetails` if the rental was recorded.
+        - (False, str) with the reason if the member is invalid, the limit is reached or the bicycle cannot be rented.
+        - None if a database error occurs.
+        """
+        try:
+            rental_date = datetime.date.today()
+            return_date = rental_date + datetime.timedelta(days=rental_days)
+            if check_member and not self.write_membersTable(self.memberships):
+                return None
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''BEGIN IMMEDIATE''')
+
+                if check_member:
+                    cursor.execute('''SELECT RentalLimit, MembershipEndDate FROM Members WHERE MemberID = ?''', (member_id,))
+                    member = cursor.fetchone()
+                    if member is None:
+                        conn.rollback()
+                        return False, "Invalid Member ID."
+                    if rental_date.isoformat() >= member[1]:
+                        conn.rollback()
+                        return False, "Inactive membership."
+                    rental_limit = member[0]
+
+                if rental_limit is not None:
+                    cursor.execute(CURRENT_RENTALS_SQL, (member_id,))
+                    if cursor.fetchone()[0] >= rental_limit:
+                        conn.rollback()
+                        return False, "Rental limit exceeded."
+
+                # Only an available bicycle is flipped, rowcount tells whether this clerk won it
+                cursor.execute(RENT_BICYCLE_SQL, (bicycle_id,))
+                if cursor.rowcount == 0:
+                    cursor.execute('''SELECT 1 FROM Bicycle_Info WHERE BicycleID = ?''', (bicycle_id,))
+                    exists = cursor.fetchone()
+                    conn.rollback()
+                    if not exists:
+                        return False, f"Invalid Bicycle ID: {bicycle_id}"
+                    return False, f"{bicycle_id} not avaliable"
+
+                cursor.execute('''
+                    INSERT INTO Rental_History (BicycleID, MemberID, RentalDate, ReturnDate)
+                    VALUES (?, ?, ?, ?)
+                    ''', (bicycle_id, member_id, rental_date.isoformat(), return_date.isoformat()))
+
+                cursor.execute(RENTAL_RECORD_SQL, (cursor.lastrowid,))
+                bike_id, brand, bike_type, daily_rate, weekly_rate, status, rented_on, return_on = cursor.fetchone()
+                conn.commit()
+                self.fleet_cache.update(bike_id, Status=status)
+                self.notify_listeners('rent', [bike_id])
+
+                return True, {
+                    "Bicycle ID": bike_id,
+                    "Brand": brand,
+                    "Type": bike_type,
+                    "Daily Rate": daily_rate,
+                    "Weekly Rate": weekly_rate,
+                    "Status": status,
+                    "Rental Date": rented_on,
+                    "Return Date": return_on
+                }
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+
     def write_returnUpdate(self, bicycle_id,damage_charge=0, return_date=None):
         """
         Updates the status and condition of a returned bicycle based on damage charges and logs the return date.
@@ -771,7 +1620,7 @@ class databaseWriteOperations(writeToSql):
         """
         try:
             update_date = datetime.date.today()
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 new_status = "Available" if damage_charge == 0 else "Unavailable"
                 new_condition = "Good" if damage_charge == 0 else "Damaged"
@@ -782,14 +1631,15 @@ class databaseWriteOperations(writeToSql):
                     ''', (new_status, new_condition, bicycle_id))
                 if return_date:
                     cursor.execute('''UPDATE Rental_History SET ReturnDate = ? WHERE BicycleID = ? AND ReturnDate = ?''', (update_date, bicycle_id, return_date))
-                    conn.commit()
-                    return True, f"BicycleID- {bicycle_id}'s, status {new_status} and condition {new_condition} along with the return date in Rental_History table {update_date}"
-                return True, f"BicycleID- {bicycle_id}'s, status {new_status} and condition {new_condition}"
+                conn.commit()
+            self.fleet_cache.update(bicycle_id, Status=new_status, Condition=new_condition)
+            self.notify_listeners('return', [bicycle_id])
+            if return_date:
+                return True, f"BicycleID- {bicycle_id}'s, status {new_status} and condition {new_condition} along with the return date in Rental_History table {update_date}"
+            return True, f"BicycleID- {bicycle_id}'s, status {new_status} and condition {new_condition}"
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
 
     def write_inLogtable(self, bicycle_id, late_fee = 0, damage_charge=0, damage_note=None):
         """
@@ -805,7 +1655,7 @@ class databaseWriteOperations(writeToSql):
         - True if log entry is successfully added, None if an error occurs.
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connection_manager.connection() as conn:
                 cursor = conn.cursor()
                 # Update return_date
                 cursor.execute('''INSERT INTO LogTable (BicycleID, LateFee, DamageCharge, DamageNote, StatusChange) VALUES (?, ?, ?, ?, ?)''',
@@ -815,8 +1665,125 @@ class databaseWriteOperations(writeToSql):
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
+
+    def _write_returnInTransaction(self, cursor, bicycle_id, damage_charge, damage_note, update_date):
+        """
+        Closes out one rented bicycle on a cursor that is already inside a transaction.
+
+        The late fee is computed in SQL from the most recent rental, then Bicycle_Info, Rental_History
+        and LogTable are written. Nothing is written if the bicycle cannot be returned.
+
+        Returns:
+        - (True, dict) with the charges and the new status and condition of the bicycle.
+        - (False, str) with the reason if there is no open rental or its return date is in the future.
+        """
+        cursor.execute(OPEN_RENTAL_SQL, {"today": update_date, "bicycle_id": bicycle_id})
+        result = cursor.fetchone()
+        if not result:
+            return False, f"No rental record found for bicycle ID: {bicycle_id}."
+
+        rental_rowid, return_date, overdue_days, late_fee = result
+        if return_date > update_date:
+            return False, f"**Bicycle ID**: {bicycle_id} has a scheduled return date of **{return_date}**, which is in the future. **Return cannot be processed.**"
+
+        new_status = "Available" if damage_charge == 0 else "Unavailable"
+        new_condition = "Good" if damage_charge == 0 else "Damaged"
+        cursor.execute(RETURN_BICYCLE_SQL, (new_status, new_condition, bicycle_id))
+        # Late returns get the actual return date recorded in Rental_History
+        cursor.execute(CLOSE_RENTAL_SQL, (update_date, rental_rowid, update_date))
+        cursor.execute('''INSERT INTO LogTable (BicycleID, LateFee, DamageCharge, DamageNote, StatusChange) VALUES (?, ?, ?, ?, ?)''',
+                       (bicycle_id, late_fee, damage_charge, damage_note, "Damaged" if damage_charge > 0 else "Good"))
+
+        return True, {
+            "Bicycle ID": bicycle_id,
+            "Late Fee": late_fee,
+            "Overdue Days": overdue_days,
+            "Damage Charge": damage_charge,
+            "Damage Note": damage_note,
+            "Status": new_status,
+            "Condition": new_condition,
+            "Return Date": update_date
+        }
+
+    def write_returnTransaction(self, bicycle_id, damage_charge=0, damage_note=None):
+        """
+        Processes a bicycle return in one transaction: late fee calculation, Bicycle_Info and
+        Rental_History updates and the LogTable entry are committed together or not at all.
+
+        Parameters:
+        - bicycle_id (int): ID of the returned bicycle.
+        - damage_charge (int): Charge for any damages, defaults to 0.
+        - damage_note (str, optional): Note describing the damage.
+
+        Returns:
+        - (True, dict) with the late fee, damage charge, new status and condition of the bicycle.
+        - (False, str) with the reason if the bicycle cannot be returned.
+        - None if a database error occurs.
+        """
+        try:
+            update_date = datetime.date.today().isoformat()
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''BEGIN IMMEDIATE''')
+                result = self._write_returnInTransaction(cursor, bicycle_id, damage_charge, damage_note, update_date)
+                if result[0]:
+                    conn.commit()
+                    self.write_returnsToCache([result])
+                else:
+                    conn.rollback()
+                return result
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+
+    def write_returnsToCache(self, results):
+        """Applies committed return results to the fleet cache (write-through) and tells the listeners."""
+        returned_ids = []
+        for returned, details in results:
+            if returned:
+                self.fleet_cache.update(details["Bicycle ID"], Status=details["Status"], Condition=details["Condition"])
+                returned_ids.append(details["Bicycle ID"])
+        if returned_ids:
+            self.notify_listeners('return', returned_ids)
+
+    def write_returnBatch(self, returns):
+        """
+        Processes many bicycle returns (e.g. the end-of-day drop box) in a single transaction.
+        Bicycles that cannot be returned are reported and skipped, the others are committed together.
+
+        Parameters:
+        - returns (iterable): Bicycle IDs, or (bicycle_id[, damage_charge[, damage_note]]) tuples; missing
+          fields default to no damage charge and no note.
+
+        Returns:
+        - list: One (success, details or reason) tuple per bicycle, in input order; an entry of another
+          shape is reported as (False, "Invalid return entry: ...") and skipped.
+        - None if a database error occurs, in which case no return is recorded.
+        """
+        try:
+            update_date = datetime.date.today().isoformat()
+            results = []
+            with self.connection_manager.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''BEGIN IMMEDIATE''')
+                for item in returns:
+                    entry = tuple(item) if isinstance(item, (tuple, list)) else (item,)
+                    if not 1 <= len(entry) <= 3:
+                        results.append((False, f"Invalid return entry: {item!r}"))
+                        continue
+                    bicycle_id, damage_charge, damage_note = entry + (0, None)[len(entry) - 1:]
+                    results.append(self._write_returnInTransaction(cursor, bicycle_id, damage_charge, damage_note, update_date))
+                conn.commit()
+            self.write_returnsToCache(results)
+            return results
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+
+# Call counts, latency histograms and row counts of every public database method, see dbMetrics.py.
+# Helpers that never use the database are left out.
+for operations_class in (databaseOperations, databaseWriteOperations):
+    instrument_class(operations_class, exclude={'build_searchQuery', 'get_rentalLimit', 'write_returnsToCache'})
 
 def test():
     """
@@ -833,6 +1800,33 @@ def test():
         - Database tables and views must be initialized.
         - Input files should be available if file reading is enabled.
     """
+    # The hot lookups must use indexes instead of full table scans, checked on a freshly built database
+    import os
+    import tempfile
+    print("Checking the hot lookups use indexes instead of full table scans...")
+    plan_db = os.path.join(tempfile.mkdtemp(), "QueryPlans.db")
+    with sqlite3.connect(plan_db) as conn:
+        for statement in (INVENTORY_DATA_TABLE, BICYCLE_INFO_TABLE, RENTAL_HISTORY_TABLE, LOG_TABLE):
+            conn.execute(statement)
+    plan_handler = databaseOperations(plan_db)
+    assert plan_handler.migrate_schema(), "Schema migration failed"
+    plans = plan_handler.check_queryPlans()
+    assert plans, "Query plans could not be read"
+    for name, (uses_index, plan) in plans.items():
+        print(f"{name}: {'OK' if uses_index else 'FULL TABLE SCAN'} - {plan}")
+    assert all(ok for ok, _ in plans.values()), "A hot lookup falls back to a full table scan"
+
+    # Drop-box entries of the wrong shape are reported and skipped, the rest of the batch is returned
+    with sqlite3.connect(plan_db) as conn:
+        conn.execute('''INSERT INTO Bicycle_Info (BicycleID, Brand, Type, FrameSize, DailyRate, WeeklyRate, Status, DateOfPurchase, Condition)
+                        VALUES (1, 'Trek', 'Road Bike', 'Small', 30, 250, 'Rented', '2022-01-01', 'Good')''')
+        conn.execute('''INSERT INTO Rental_History (BicycleID, MemberID, RentalDate, ReturnDate)
+                        VALUES (1, 1000, DATE('now', '-10 days'), DATE('now', '-3 days'))''')
+    results = databaseWriteOperations(plan_db).write_returnBatch([(1, 20.0), (), (2, 0, None, 'extra')])
+    print("Batch return with malformed entries:", results)
+    assert results[0][0] and results[0][1]['Damage Charge'] == 20.0 and results[1] == (False, "Invalid return entry: ()")
+    assert not results[2][0]
+
     # Initialize database instance and handlers
     database = writeToSql()  # Assuming this sets up a database connection
     handler = databaseOperations()  # Handles general database queries
@@ -931,6 +1925,9 @@ def test():
         print("check where the bicycle id is rented or not")
         result = handler.verify_bicycleIDRentalStatus('55')
         print("Rental Status: ",result)
+
+        print("Fleet cache after the status probes (hits, misses, version)")
+        print("Fleet cache:", handler.fleet_cache.stats())
         database.write_logTable_to_db()
 
         print("get all images from inventory_data table whose inventoryid are in bicyle_info table")
@@ -0,0 +1,387 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to show where the time of the database layer goes. Every public method of
+    `databaseOperations` and `databaseWriteOperations` that uses the database is wrapped (see
+    `instrument_class`, applied at the end of database.py) to record its call count, a latency histogram,
+    the rows it returned and wrote, and its errors: exceptions it raised and SQLite errors it caught and
+    turned into an error result. Every pooled connection reports its SQL through the sqlite3 trace
+    callback, so statements are timed and counted too, and statements slower than a threshold are kept
+    in a slow-query log.
+    The registry is process-wide and can be dumped in the Prometheus text format or as JSON.
+    Recording costs a few microseconds per call and nothing is printed, so it can stay on in production.
+"""
+import bisect
+import collections
+import datetime
+import functools
+import json
+import re
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets, the last bucket is +Inf
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_QUERY_SECONDS = 0.1  # Statements slower than this go to the slow-query log
+SLOW_LOG_SIZE = 200       # Slow statements kept in memory
+MAX_STATEMENTS = 500      # Distinct normalised statements tracked, the rest are counted under OTHER_STATEMENT
+OTHER_STATEMENT = "<other>"
+METRIC_PREFIX = "bicycle_db"
+
+# Literals of the expanded SQL the trace callback receives, replaced by '?' to group statements
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+SQL_SPACES = re.compile(r"\s+")
+DIGIT_KEY = bytes.maketrans(b"0123456789", b"0000000000")  # Statements differing only in digits share a cache entry
+
+class latencyHistogram():
+    """Cumulative-style latency histogram with fixed buckets, a count and a sum."""
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self):
+        """(upper bound, observations at or below it) pairs, ending with ('+Inf', count)."""
+        total, buckets = 0, []
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, None if nothing was observed."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound if bound != '+Inf' else LATENCY_BUCKETS[-1]
+
+class metricsRegistry():
+    """
+    In-process registry of the database metrics.
+
+    Per method (`Class.method`): calls, errors (an exception, or None returned, which is how the database
+    methods report a database error), rows returned, rows written and a latency histogram.
+    Per normalised SQL statement (literals replaced by '?'): executions and a latency histogram.
+
+    Statement timing comes from the sqlite3 trace callback, which is called when a statement starts: a
+    statement is timed until the next statement starts on the same thread or its connection goes back to
+    the pool, so the time includes fetching its rows.
+
+    Methods:
+        - `configure`: Changes the slow-query threshold, the slow-log size or file, or turns recording off.
+        - `observe_call`, `trace_statement`, `end_statement`, `record_changes`: Recording hooks.
+        - `snapshot`, `to_json`, `to_prometheus`: Dump the metrics.
+        - `slow_queries`: Returns the slow-query log, most recent first.
+        - `reset`: Clears every metric.
+    """
+    def __init__(self, slow_query_seconds=SLOW_QUERY_SECONDS, slow_log_size=SLOW_LOG_SIZE, slow_log_file=None):
+        """
+        Args:
+            slow_query_seconds (float): Statements slower than this are added to the slow-query log.
+            slow_log_size (int): Number of slow statements kept in memory.
+            slow_log_file (str, optional): File every slow statement is also appended to, as a JSON line.
+        """
+        self.enabled = True
+        self.trace_sql = True
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_log_file = slow_log_file
+        self._slow = collections.deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._normalised = {}  # Expanded SQL with its digits zeroed -> normalised SQL, bounded
+        self.reset()
+
+    def configure(self, enabled=None, trace_sql=None, slow_query_seconds=None, slow_log_size=None, slow_log_file=None):
+        """Update the settings given; the others are kept."""
+        if enabled is not None:
+            self.enabled = enabled
+        if trace_sql is not None:
+            self.trace_sql = trace_sql
+        if slow_query_seconds is not None:
+            self.slow_query_seconds = slow_query_seconds
+        if slow_log_size is not None:
+            with self._lock:
+                self._slow = collections.deque(self._slow, maxlen=slow_log_size)
+        if slow_log_file is not None:
+            self.slow_log_file = slow_log_file or None
+
+    def reset(self):
+        """Clear every metric and the slow-query log."""
+        with self._lock:
+            self.started = time.time()
+            self._methods = {}     # method -> [calls, errors, rows returned, rows written, latencyHistogram]
+            self._statements = {}  # normalised SQL -> latencyHistogram
+            self._slow_total = 0
+            self._slow.clear()
+
+    # ---- Recording -------------------------------------------------------------------------------
+
+    def observe_call(self, method, seconds, rows_returned=0, rows_written=0, failed=False):
+        """Record one call of an instrumented method."""
+        with self._lock:
+            entry = self._methods.get(method)
+            if entry is None:
+                entry = self._methods[method] = [0, 0, 0, 0, latencyHistogram()]
+            entry[0] += 1
+            entry[1] += failed
+            entry[2] += rows_returned
+            entry[3] += rows_written
+            entry[4].observe(seconds)
+
+    def normalise(self, sql):
+        """
+        Statement text with its literals replaced by '?' and its white space collapsed.
+        The regular expressions only run once per statement shape: the cache key has every digit zeroed,
+        so the same statement with other numbers or dates is a dictionary lookup.
+        """
+        key = sql.encode().translate(DIGIT_KEY)
+        normalised = self._normalised.get(key)
+        if normalised is None:
+            normalised = SQL_SPACES.sub(" ", SQL_LITERALS.sub("?", sql)).strip()
+            if len(self._normalised) >= 4 * MAX_STATEMENTS:
+                self._normalised.clear()
+            self._normalised[key] = normalised
+        return normalised
+
+    def trace_statement(self, sql):
+        """sqlite3 trace callback: ends the statement running on this thread and starts timing `sql`."""
+        if not (self.enabled and self.trace_sql):
+            return
+        now = time.perf_counter()
+        self.end_statement(now)
+        self._local.statement = (sql, now, getattr(self._local, 'method', None))
+
+    def end_statement(self, now=None):
+        """Record the statement running on this thread, if any; called when its connection is released."""
+        pending = getattr(self._local, 'statement', None)
+        if pending is None:
+            return
+        self._local.statement = None
+        sql, start, method = pending
+        seconds = (now or time.perf_counter()) - start
+        normalised = self.normalise(sql)
+        with self._lock:
+            histogram = self._statements.get(normalised)
+            if histogram is None:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    normalised = OTHER_STATEMENT
+                histogram = self._statements.setdefault(normalised, latencyHistogram())
+            histogram.observe(seconds)
+            slow = seconds >= self.slow_query_seconds
+            if slow:
+                entry = {'time': datetime.datetime.now().isoformat(timespec='milliseconds'),
+                         'seconds': round(seconds, 6), 'method': method, 'sql': sql[:2000]}
+                self._slow.append(entry)
+                self._slow_total += 1
+        if slow and self.slow_log_file:
+            try:
+                with open(self.slow_log_file, "a") as file:
+                    file.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"Slow query log error: {e}")
+
+    def record_changes(self, rows):
+        """Add rows written by a committed transaction on this thread to the running method's count."""
+        self._local.rows_written = getattr(self._local, 'rows_written', 0) + rows
+
+    def record_error(self):
+        """Mark the running method as failed: a database error was raised inside one of its connection blocks."""
+        self._local.errors = getattr(self._local, 'errors', 0) + 1
+
+    # ---- Dumps -----------------------------------------------------------------------------------
+
+    def slow_queries(self):
+        """The slow statements kept in memory, most recent first."""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def snapshot(self):
+        """
+        Return the metrics as a JSON-serialisable dictionary.
+
+        Returns:
+            dict: 'methods' and 'statements' (calls, total and mean seconds, p50/p99 bucket bounds and the
+            cumulative buckets; methods also have errors and rows), 'slow_queries' and 'slow_query_total'.
+        """
+        def histogram_summary(histogram):
+            return {'calls': histogram.count, 'total_seconds': histogram.sum,
+                    'mean_seconds': histogram.sum / histogram.count if histogram.count else None,
+                    'p50_seconds': histogram.quantile(0.5), 'p99_seconds': histogram.quantile(0.99),
+                    'buckets': [[bound, count] for bound, count in histogram.cumulative()]}
+
+        with self._lock:
+            methods = {method: dict(histogram_summary(histogram), errors=errors, rows_returned=rows_returned,
+                                    rows_written=rows_written)
+                       for method, (_, errors, rows_returned, rows_written, histogram) in self._methods.items()}
+            statements = {sql: histogram_summary(histogram) for sql, histogram in self._statements.items()}
+            slow_total = self._slow_total
+        return {'since': datetime.datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+                'slow_query_seconds': self.slow_query_seconds, 'methods': methods, 'statements': statements,
+                'slow_query_total': slow_total, 'slow_queries': self.slow_queries()}
+
+    def to_json(self, indent=None):
+        """The `snapshot` as a JSON string."""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self):
+        """The metrics in the Prometheus text exposition format."""
+        def label(value):
+            return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+        def histogram_lines(name, label_name, label_value, histogram):
+            labels = f'{label_name}="{label(label_value)}"'
+            lines = [f'{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in histogram.cumulative()]
+            lines.append(f'{name}_sum{{{labels}}} {histogram.sum!r}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+            return lines
+
+        with self._lock:
+            methods = [(method, entry[:4], entry[4]) for method, entry in sorted(self._methods.items())]
+            statements = sorted(self._statements.items())
+            slow_total = self._slow_total
+        call_seconds, sql_seconds = f"{METRIC_PREFIX}_call_seconds", f"{METRIC_PREFIX}_sql_seconds"
+        lines = [f"# HELP {call_seconds} Latency of the database methods.", f"# TYPE {call_seconds} histogram"]
+        for method, _, histogram in methods:
+            lines += histogram_lines(call_seconds, 'method', method, histogram)
+        for suffix, position, help_text in (('errors_total', 1, "Calls that raised or reported a database error."),
+                                            ('rows_returned_total', 2, "Rows returned by the database methods."),
+                                            ('rows_written_total', 3, "Rows written by the database methods.")):
+            name = f"{METRIC_PREFIX}_{suffix}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f'{name}{{method="{label(method)}"}} {counters[position]}' for method, counters, _ in methods]
+        lines += [f"# HELP {sql_seconds} Latency of the SQL statements, literals replaced by '?'.",
+                  f"# TYPE {sql_seconds} histogram"]
+        for sql, histogram in statements:
+            lines += histogram_lines(sql_seconds, 'statement', sql, histogram)
+        lines += [f"# HELP {METRIC_PREFIX}_slow_queries_total Statements slower than {self.slow_query_seconds}s.",
+                  f"# TYPE {METRIC_PREFIX}_slow_queries_total counter", f"{METRIC_PREFIX}_slow_queries_total {slow_total}"]
+        return "\n".join(lines) + "\n"
+
+METRICS = metricsRegistry()  # Registry shared by every database file of the process
+
+def result_rows(result):
+    """Rows in a method result: the length of a list, or of the list heading a tuple like (rows, cursor)."""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    return 0
+
+def instrumented(method_name, function, registry=METRICS):
+    """
+    Wrap `function` so every call is recorded in `registry` under `method_name`.
+    A call counts as an error if it raises, or if a database error was recorded while it ran (see
+    `record_error`) even though the method caught it, e.g. to print it and return None. A None result
+    on its own is not an error, several methods return None for "not found".
+    """
+    local = registry._local
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return function(*args, **kwargs)
+        outer = getattr(local, 'method', None)
+        written = getattr(local, 'rows_written', 0)
+        errors = getattr(local, 'errors', 0)
+        local.method = method_name
+        failed, result = True, None
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+            failed = getattr(local, 'errors', 0) > errors
+            return result
+        finally:
+            seconds = time.perf_counter() - start
+            local.method = outer
+            local.errors = errors  # An error this call handled is not an error of the calling method
+            registry.observe_call(method_name, seconds, result_rows(result),
+                                  getattr(local, 'rows_written', 0) - written, failed)
+    wrapper.instrumented = True
+    return wrapper
+
+def instrument_class(cls, registry=METRICS, exclude=()):
+    """
+    Wrap every public method defined on `cls` (not inherited ones) with `instrumented`.
+
+    Args:
+        cls (type): The class to instrument.
+        registry (metricsRegistry): Registry the calls are recorded in.
+        exclude (iterable): Names of methods left alone, e.g. helpers that never use the database.
+
+    Returns:
+        list: Names of the methods wrapped.
+    """
+    wrapped = []
+    for name, function in list(vars(cls).items()):
+        if name.startswith('_') or not callable(function) or isinstance(function, (staticmethod, classmethod, type)):
+            continue
+        if name in exclude:
+            continue
+        if getattr(function, 'instrumented', False):
+            continue
+        setattr(cls, name, instrumented(f"{cls.__name__}.{name}", function, registry))
+        wrapped.append(name)
+    return wrapped
+
+def test():
+    import os
+    import tempfile
+    import dbMetrics
+    from database import databaseOperations, databaseWriteOperations
+
+    # The registry the database classes record in: run as a script this module is __main__, whose METRICS is
+    # a different object from dbMetrics.METRICS imported by database.py
+    METRICS = dbMetrics.METRICS
+    log_file = os.path.join(tempfile.mkdtemp(), "slow.jsonl")
+    METRICS.reset()
+    METRICS.configure(slow_query_seconds=0.001, slow_log_file=log_file)
+    operations, writer = databaseOperations(), databaseWriteOperations()
+    for bicycle_id in range(1, 21):
+        operations.know_rentalStatus(bicycle_id)
+        operations.know_rentedDetails(bicycle_id)
+    operations.searchBicyclesPage({'type': 'Road Bike'})
+    operations.read_RentalHistoryTable()
+    operations.know_rentedDetails(10 ** 9)  # Unknown bicycle: an answer, not an error
+    writer.write_inLogtable(1, 0, 0, "metrics test")
+    with operations.connection_manager.connection() as conn:
+        # A progress handler aborting every statement: the read fails, prints the error and returns None
+        conn.set_progress_handler(lambda: 1, 1)
+        operations.read_BicycleInfoTable()
+        conn.set_progress_handler(None, 1)
+
+    snapshot = METRICS.snapshot()
+    methods = snapshot['methods']
+    assert methods['databaseOperations.know_rentalStatus']['calls'] == 20
+    assert methods['databaseOperations.know_rentedDetails']['errors'] == 0
+    assert methods['databaseOperations.read_BicycleInfoTable']['errors'] == 1
+    assert methods['databaseWriteOperations.write_inLogtable']['rows_written'] == 1
+    assert sum(entry['calls'] for entry in snapshot['statements'].values()) > 0
+    assert 'databaseOperations.build_searchQuery' not in methods
+    for method, entry in sorted(snapshot['methods'].items()):
+        print(f"{method}: {entry['calls']} calls, p50 <= {entry['p50_seconds']}s, errors {entry['errors']}, "
+              f"rows returned {entry['rows_returned']}, written {entry['rows_written']}")
+    for sql, entry in sorted(snapshot['statements'].items(), key=lambda item: -item[1]['total_seconds'])[:5]:
+        print(f"{entry['calls']:5d} x {entry['total_seconds'] * 1000:8.3f} ms  {sql[:90]}")
+    print(f"Slow queries: {snapshot['slow_query_total']}, logged to file: "
+          f"{sum(1 for _ in open(log_file)) if os.path.exists(log_file) else 0}")
+    print(METRICS.to_prometheus().splitlines()[:6])
+
+    # Cost of the instrumentation on a cached lookup
+    for enabled in (False, True):
+        METRICS.configure(enabled=enabled)
+        start = time.perf_counter()
+        for _ in range(20000):
+            operations.know_rentalStatus(5)
+        print(f"Instrumentation {'on' if enabled else 'off'}: {(time.perf_counter() - start) / 20000 * 1e6:.2f} us per call")
+    METRICS.configure(slow_query_seconds=SLOW_QUERY_SECONDS, slow_log_file="")
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,202 @@
+"""
+    StudentID : F418164
+    The Aim of this program is to keep the membership file in memory once per process.
+    `membershipManager.load_memberships` parses members.txt every time a database class is created and
+    `check_membership` compares datetimes on every call. The store below parses the file once into typed
+    records keyed by the integer member ID, and only parses it again when the file's modification time
+    or size changes, so edits to members.txt are picked up without restarting the application.
+"""
+import csv
+import datetime
+import os
+import threading
+import time
+from collections import namedtuple
+
+MEMBERS_FILE = "members.txt"
+CHECK_INTERVAL = 1.0  # Minimum seconds between two stat() calls on the members file
+
+# One parsed line of the members file
+memberRecord = namedtuple('memberRecord', ['member_id', 'rental_limit', 'end_date'])
+
+class membershipStore():
+    """
+    Process-wide, typed view of the members file.
+
+    A single store is kept per file (see `get_store`), so every class validating members shares the
+    same parsed records. Lookups are dictionary lookups on the integer member ID; the file is checked
+    for changes at most once every `check_interval` seconds and reloaded only if it did change.
+
+    Methods:
+        - `get_store`: Returns the shared store for a members file.
+        - `refresh`: Reloads the file if its modification time or size changed.
+        - `get`: Returns the `memberRecord` of a member ID, or None.
+        - `is_active`: Checks whether a membership has not yet ended.
+        - `get_rental_limit`: Returns the rental limit of a member ID, 0 if unknown.
+        - `records`: Returns all records, for example to copy them into the Members table.
+    """
+    _stores = {}                     # absolute file path -> membershipStore
+    _stores_lock = threading.Lock()
+
+    def __init__(self, file_name=MEMBERS_FILE, check_interval=CHECK_INTERVAL):
+        """
+        Load the members file.
+
+        Args:
+            file_name (str): Path of the members CSV file (MemberID,RentalLimit,MembershipEndDate).
+            check_interval (float): Minimum seconds between two checks of the file for changes.
+        """
+        self.file_name = file_name
+        self.check_interval = check_interval
+        self.version = 0           # Incremented on every (re)load, lets callers cache derived data
+        self._members = {}
+        self._signature = None     # (mtime_ns, size) of the file as it was loaded
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    @classmethod
+    def get_store(cls, file_name=MEMBERS_FILE, **settings):
+        """
+        Return the store shared by everything reading `file_name`, creating it on first use.
+
+        Args:
+            file_name (str): Path of the members file.
+            **settings: Optional `check_interval` for a newly created store.
+
+        Returns:
+            membershipStore: The shared store for the file.
+        """
+        key = os.path.abspath(file_name)
+        with cls._stores_lock:
+            store = cls._stores.get(key)
+            if store is None:
+                store = cls(file_name, **settings)
+                cls._stores[key] = store
+            return store
+
+    @staticmethod
+    def parse_members(file):
+        """
+        Parse an open members file into a dictionary of records keyed by member ID.
+
+        Raises:
+            ValueError: If a line does not hold an integer ID, an integer limit and a YYYY-MM-DD date.
+        """
+        members = {}
+        reader = csv.reader(file)
+        next(reader, None)  # Skip header line
+        for line_no, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            try:
+                member_id, rental_limit, end_date = row
+                record = memberRecord(int(member_id), int(rental_limit),
+                                      datetime.datetime.strptime(end_date.strip(), "%Y-%m-%d").date())
+            except ValueError as e:
+                raise ValueError(f"Line {line_no} of the members file is invalid: {e}") from e
+            members[record.member_id] = record
+        return members
+
+    def refresh(self, force=False):
+        """
+        Reload the members file if its modification time or size changed since it was loaded.
+        A file that has become invalid keeps the previously loaded records and is reported once.
+
+        Args:
+            force (bool): Check the file now instead of waiting for `check_interval` to pass.
+
+        Returns:
+            bool: True if the records were reloaded.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.file_name)
+            except OSError as e:
+                if self._signature is None:
+                    raise
+                print(f"Members file error: {e}")
+                return False
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return False
+            try:
+                with open(self.file_name, "r", newline="") as file:
+                    members = self.parse_members(file)
+            except ValueError as e:
+                if self._signature is None:
+                    raise
+                print(f"Members file error: {e}")
+                self._signature = signature
+                return False
+            self._members = members
+            self._signature = signature
+            self.version += 1
+            return True
+
+    def get(self, member_id):
+        """Return the `memberRecord` for a member ID (int or numeric string), or None if unknown."""
+        self.refresh()
+        try:
+            return self._members.get(int(member_id))
+        except (TypeError, ValueError):
+            return None
+
+    def __contains__(self, member_id):
+        return self.get(member_id) is not None
+
+    def __len__(self):
+        self.refresh()
+        return len(self._members)
+
+    def is_active(self, member_id, today=None):
+        """
+        Check whether a membership is still active.
+
+        As in `membershipManager.check_membership`, a membership is active until the start of its end
+        date, so it is no longer active on the end date itself.
+
+        Args:
+            member_id (int): Member ID to check.
+            today (date, optional): Date to check against, defaults to today.
+
+        Returns:
+            bool: True if the member exists and the membership has not ended.
+        """
+        record = self.get(member_id)
+        if record is None:
+            return False
+        return (today or datetime.date.today()) < record.end_date
+
+    def get_rental_limit(self, member_id):
+        """Return the maximum number of active rentals for a member ID, 0 if the member is unknown."""
+        record = self.get(member_id)
+        return record.rental_limit if record else 0
+
+    def records(self):
+        """Return the current records as a list of `memberRecord`."""
+        self.refresh()
+        return list(self._members.values())
+
+def test():
+    store = membershipStore.get_store()
+    print(f"Loaded {len(store)} members (version {store.version}).")
+    print("Same store shared:", store is membershipStore.get_store(MEMBERS_FILE))
+    for member_id in (1000, "1015", 9999, "abc"):
+        print(f"Member {member_id!r}: record {store.get(member_id)}, active {store.is_active(member_id)}, "
+              f"limit {store.get_rental_limit(member_id)}")
+
+    # Unchanged file: no reload
+    print("Reloaded without changes:", store.refresh(force=True))
+
+    start = time.perf_counter()
+    for _ in range(100000):
+        store.is_active(1015)
+    print(f"100000 membership checks in {time.perf_counter() - start:.3f}s")
+
+if __name__ == "__main__":
+    test()